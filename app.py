@@ -1,14 +1,14 @@
 # flake8: noqa e501
-from flask import Flask, render_template, jsonify, request
-import pandas as pd
-import sqlite3
-import pymysql
+from flask import Flask, Response, render_template, jsonify, request
+from datetime import datetime, timezone
+from functools import wraps
+import base64
 import json
 import openai
 from pdfminer.high_level import extract_text
 from flask_cors import CORS
-from sqlalchemy import create_engine
-from docker_utils import get_db_host
+from db import get_database, is_mysql, ensure_columns, get_index_names, table_exists, bump_data_version, get_data_version
+from view_cache import ViewCache
 
 
 def load_config(file_name):
@@ -17,7 +17,29 @@ def load_config(file_name):
         return json.load(f)
 
 
+# Columns of the job list, the description, notes and resume of a job are loaded with /job_details
+LIST_COLUMNS = ["id", "title", "company", "location", "date", "applied", "interview", "rejected", "starred", "hidden"]
+# Status columns the job list can be filtered on, with ?<column>=0 or 1
+STATUS_FILTERS = ["applied", "interview", "rejected", "starred", "hidden"]
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 config = load_config("config.json")
+# Shared connection pool (MySQL) or per-thread connections (SQLite), see db.py
+db = get_database(config)
+
+
+def load_data_version():
+    with db.connection() as conn:
+        return get_data_version(conn, config)
+
+
+# Responses of the job list and job details, see view_cache.py. A cache size of 0 disables it.
+view_cache = (
+    ViewCache(load_data_version, config.get("response_cache_size", 512), config.get("response_cache_check_interval", 5))
+    if config.get("response_cache_size", 512) > 0
+    else None
+)
 app = Flask(__name__)
 CORS(app)
 app.config["TEMPLATES_AUTO_RELOAD"] = True
@@ -35,6 +57,39 @@ def read_pdf(file_path):
         return None
 
 
+def cached_view(view):
+    # Serve the response from the view cache while the data is unchanged, with an ETag and
+    # Last-Modified header, and answer revalidations (If-None-Match, If-Modified-Since) with a 304
+    @wraps(view)
+    def cached(*args, **kwargs):
+        if view_cache is None:
+            return view(*args, **kwargs)
+        version, last_modified = view_cache.current()
+        key = request.full_path
+        entry = view_cache.get(key)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = view_cache.put(key, version, response.get_data(), response.mimetype)
+        response = Response(entry.body, mimetype=entry.mimetype)
+        response.set_etag(entry.etag)
+        response.last_modified = datetime.fromtimestamp(last_modified, timezone.utc)
+        # Browsers revalidate every time, the cache makes that cheap
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    return cached
+
+
+def data_changed():
+    # Record an edit to the jobs, so the cached responses of every process are rebuilt
+    with db.connection() as conn:
+        bump_data_version(conn, config)
+    if view_cache is not None:
+        view_cache.invalidate()
+
+
 # db = load_config('config.json')['db_path']
 # try:
 #     api_key = load_config('config.json')['OpenAI_API_KEY']
@@ -51,259 +106,190 @@ def read_pdf(file_path):
 
 @app.route("/")
 def home():
-    jobs = read_jobs_from_db()
-    return render_template("jobs.html", jobs=jobs)
+    # The job list is loaded page by page by job_actions.js
+    return render_template("jobs.html")
 
 
 @app.route("/job/<int:job_id>")
 def job(job_id):
-    jobs = read_jobs_from_db()
-    return render_template("./templates/job_description.html", job=jobs[job_id])
+    job = read_job_from_db(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return render_template("./templates/job_description.html", job=job)
+
+
+def encode_cursor(values):
+    # Opaque pagination cursor: the sort key of the last job of a page
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, sort):
+    # The sort key in the cursor: [id] when sorting by id, [date, id] when sorting by date (the date is null for
+    # jobs without one). Raises ValueError if the cursor doesn't hold such a key.
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    if (
+        not isinstance(values, list)
+        or len(values) != (1 if sort == "id" else 2)
+        or not isinstance(values[-1], int)
+        or isinstance(values[-1], bool)
+        or (sort == "date" and not (values[0] is None or isinstance(values[0], str)))
+    ):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def build_job_list_query(args):
+    # Build the queries for one page of the job list from the request arguments:
+    # limit, cursor, sort (date or id, newest first), the status filters (hidden=0 by default),
+    # q (text in the title, company or description) and location.
+    # Keyset pagination: the next page starts after the sort key in the cursor, so every page
+    # is an index range scan instead of an OFFSET that reads all the rows before it.
+    # Returns (sql, params, count_sql, count_params, sort, limit); count_sql is None after the first page.
+    placeholder = "?"
+    sort = args.get("sort", "date")
+    if sort not in ("date", "id"):
+        raise ValueError(f"unknown sort {sort}")
+    limit = min(max(int(args.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+
+    conditions = []
+    params = []
+    for column in STATUS_FILTERS:
+        value = args.get(column, "0" if column == "hidden" else "")
+        if value != "":
+            conditions.append(f"{column} = {placeholder}")
+            params.append(int(value))
+    text = args.get("q", "").strip()
+    if text:
+        conditions.append(
+            f"(title LIKE {placeholder} OR company LIKE {placeholder} OR job_description LIKE {placeholder})"
+        )
+        params += [f"%{text}%"] * 3
+    location = args.get("location", "").strip()
+    if location:
+        conditions.append(f"location LIKE {placeholder}")
+        params.append(f"%{location}%")
+
+    count_sql = None
+    count_params = list(params)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    if args.get("cursor"):
+        values = decode_cursor(args["cursor"], sort)
+        if sort == "id":
+            conditions.append(f"id < {placeholder}")
+            params.append(values[-1])
+        elif values[0] is None:
+            # Jobs without a date come last
+            conditions.append(f"(date IS NULL AND id < {placeholder})")
+            params.append(values[-1])
+        else:
+            conditions.append(
+                f"(date < {placeholder} OR (date = {placeholder} AND id < {placeholder}) OR date IS NULL)"
+            )
+            params += [values[0], values[0], values[-1]]
+    else:
+        count_sql = f"SELECT COUNT(*) AS total FROM jobs{where}"
+
+    order = "id DESC" if sort == "id" else "date DESC, id DESC"
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    # One extra row tells if there is a next page
+    sql = f"SELECT {', '.join(LIST_COLUMNS)} FROM jobs{where} ORDER BY {order} LIMIT {limit + 1}"
+    return sql, params, count_sql, count_params, sort, limit
 
 
 @app.route("/get_all_jobs")
+@cached_view
 def get_all_jobs():
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        engine = create_engine(
-            f"mysql+pymysql://{config['user']}:{config['password']}@{host}/{config['database']}",
-            pool_recycle=3600,
-        )
-        query = "SELECT * FROM jobs"
-        df = pd.read_sql_query(query, engine)
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        query = "SELECT * FROM jobs"
-        df = pd.read_sql_query(query, conn)
+    # One page of the job list, with the list columns only. Returns the jobs, the cursor of the
+    # next page (null on the last page) and, for the first page, the total number of matching jobs.
+    try:
+        sql, params, count_sql, count_params, sort, limit = build_job_list_query(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid job list request: {e}"}), 400
 
-    # df = df.sort_values(by="id", ascending=False)
-    df = df.sort_values(by=["date", "id"], ascending=[False, False])
-    df.reset_index(drop=True, inplace=True)
-    jobs = df.to_dict("records")
-    return jsonify(jobs)
+    jobs = db.query(sql, params)
+    result = {"jobs": jobs[:limit], "next_cursor": None}
+    if count_sql is not None:
+        result["total"] = db.query_one(count_sql, count_params)["total"]
+    if len(jobs) > limit:
+        last = jobs[limit - 1]
+        result["next_cursor"] = encode_cursor([last["id"]] if sort == "id" else [last["date"], last["id"]])
+    return jsonify(result)
 
 
 @app.route("/job_details/<int:job_id>")
+@cached_view
 def job_details(job_id):
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-            cursorclass=pymysql.cursors.DictCursor,
-        )
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM jobs WHERE id = %s", (job_id,))
-        job = cursor.fetchone()
-        conn.close()
-        if job is not None:
-            return jsonify(job)
-        else:
-            return jsonify({"error": "Job not found"}), 404
+    job = read_job_from_db(job_id)
+    if job is not None:
+        return jsonify(job)
     else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
-        job_tuple = cursor.fetchone()
-        conn.close()
-        if job_tuple is not None:
-            # Get the column names from the cursor description
-            column_names = [column[0] for column in cursor.description]
-            # Create a dictionary mapping column names to row values
-            job = dict(zip(column_names, job_tuple))
-            return jsonify(job)
-        else:
-            return jsonify({"error": "Job not found"}), 404
+        return jsonify({"error": "Job not found"}), 404
 
 
 @app.route("/hide_job/<int:job_id>", methods=["POST"])
 def hide_job(job_id):
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-        )
-        cursor = conn.cursor()
-        cursor.execute("UPDATE jobs SET hidden = 1 WHERE id = %s", (job_id,))
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        cursor.execute("UPDATE jobs SET hidden = 1 WHERE id = ?", (job_id,))
-
-    conn.commit()
-    conn.close()
+    db.execute("UPDATE jobs SET hidden = 1 WHERE id = ?", (job_id,))
+    data_changed()
     return jsonify({"success": "Job marked as hidden"}), 200
 
 
 @app.route("/mark_applied/<int:job_id>", methods=["POST"])
 def mark_applied(job_id):
     print("Applied clicked!")
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-        )
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET applied = 1 WHERE id = %s"
-        print(f"Executing query: {query} with job_id: {job_id}")  # Log the query
-        cursor.execute(query, (job_id,))
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET applied = 1 WHERE id = ?"
-        print(f"Executing query: {query} with job_id: {job_id}")  # Log the query
-        cursor.execute(query, (job_id,))
-
-    conn.commit()
-    conn.close()
+    query = "UPDATE jobs SET applied = 1 WHERE id = ?"
+    print(f"Executing query: {query} with job_id: {job_id}")  # Log the query
+    db.execute(query, (job_id,))
+    data_changed()
     return jsonify({"success": "Job marked as applied"}), 200
 
 
 @app.route("/mark_interview/<int:job_id>", methods=["POST"])
 def mark_interview(job_id):
     print("Interview clicked!")
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-        )
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET interview = 1 WHERE id = %s"
-        print(f"Executing query: {query} with job_id: {job_id}")
-        cursor.execute(query, (job_id,))
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET interview = 1 WHERE id = ?"
-        print(f"Executing query: {query} with job_id: {job_id}")
-        cursor.execute(query, (job_id,))
-
-    conn.commit()
-    conn.close()
+    query = "UPDATE jobs SET interview = 1 WHERE id = ?"
+    print(f"Executing query: {query} with job_id: {job_id}")
+    db.execute(query, (job_id,))
+    data_changed()
     return jsonify({"success": "Job marked as interview"}), 200
 
 
 @app.route("/mark_rejected/<int:job_id>", methods=["POST"])
 def mark_rejected(job_id):
     print("Rejected clicked!")
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-        )
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET rejected = 1 WHERE id = %s"
-        print(f"Executing query: {query} with job_id: {job_id}")
-        cursor.execute(query, (job_id,))
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET rejected = 1 WHERE id = ?"
-        print(f"Executing query: {query} with job_id: {job_id}")
-        cursor.execute(query, (job_id,))
-
-    conn.commit()
-    conn.close()
+    query = "UPDATE jobs SET rejected = 1 WHERE id = ?"
+    print(f"Executing query: {query} with job_id: {job_id}")
+    db.execute(query, (job_id,))
+    data_changed()
     return jsonify({"success": "Job marked as rejected"}), 200
 
 
 @app.route("/toggle_star/<int:job_id>", methods=["POST"])
 def toggle_star(job_id):
     print("Star toggled!")
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-        )
+    with db.connection() as conn:
         cursor = conn.cursor()
-        
-        # First get current starred status
-        cursor.execute("SELECT starred FROM jobs WHERE id = %s", (job_id,))
-        result = cursor.fetchone()
-        current_status = result[0] if result and result[0] is not None else 0
-        
-        # Toggle the status
-        new_status = 0 if current_status == 1 else 1
-        
-        query = "UPDATE jobs SET starred = %s WHERE id = %s"
-        print(f"Executing query: {query} with job_id: {job_id} and starred: {new_status}")
-        cursor.execute(query, (new_status, job_id))
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        
+
         # First get current starred status
-        cursor.execute("SELECT starred FROM jobs WHERE id = ?", (job_id,))
+        cursor.execute(db.sql("SELECT starred FROM jobs WHERE id = ?"), (job_id,))
         result = cursor.fetchone()
         current_status = result[0] if result and result[0] is not None else 0
-        
+
         # Toggle the status
         new_status = 0 if current_status == 1 else 1
-        
+
         query = "UPDATE jobs SET starred = ? WHERE id = ?"
         print(f"Executing query: {query} with job_id: {job_id} and starred: {new_status}")
-        cursor.execute(query, (new_status, job_id))
-
-    conn.commit()
-    conn.close()
+        cursor.execute(db.sql(query), (new_status, job_id))
+    data_changed()
     return jsonify({"success": "Job star toggled", "starred": new_status}), 200
 
 
 @app.route("/get_notes/<int:job_id>")
+@cached_view
 def get_notes(job_id):
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-        )
-        cursor = conn.cursor()
-        cursor.execute("SELECT notes FROM jobs WHERE id = %s", (job_id,))
-        notes = cursor.fetchone()
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        cursor.execute("SELECT notes FROM jobs WHERE id = ?", (job_id,))
-        notes = cursor.fetchone()
-
-    conn.close()
+    notes = db.query_one("SELECT notes FROM jobs WHERE id = ?", (job_id,))
     if notes is not None:
-        return jsonify({"notes": notes[0] if notes[0] else ""})
+        return jsonify({"notes": notes["notes"] if notes["notes"] else ""})
     else:
         return jsonify({"notes": ""}), 200
 
@@ -311,34 +297,9 @@ def get_notes(job_id):
 @app.route("/get_resume/<int:job_id>", methods=["POST"])
 def get_resume(job_id):
     print("Resume clicked!")
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-            cursorclass=pymysql.cursors.DictCursor,
-        )
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT job_description, title, company FROM jobs WHERE id = %s", (job_id,)
-        )
-        job = cursor.fetchone()
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT job_description, title, company FROM jobs WHERE id = ?", (job_id,)
-        )
-        job_tuple = cursor.fetchone()
-        if job_tuple is not None:
-            # Get the column names from the cursor description
-            column_names = [column[0] for column in cursor.description]
-            # Create a dictionary mapping column names to row values
-            job = dict(zip(column_names, job_tuple))
+    job = db.query_one("SELECT job_description, title, company FROM jobs WHERE id = ?", (job_id,))
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
     resume = read_pdf(config["resume_path"])
 
     # Check if OpenAI API key is empty
@@ -376,16 +337,10 @@ def get_resume(job_id):
         print(f"Error connecting to OpenAI: {e}")
         return jsonify({"error": f"Error connecting to OpenAI: {e}"}), 500
 
-    if config.get("db_type", "sqlite") == "mysql":
-        query = "UPDATE jobs SET resume = %s WHERE id = %s"
-        print(f"Executing query: {query} with job_id: {job_id} and resume: {response}")
-        cursor.execute(query, (response, job_id))
-    else:
-        query = "UPDATE jobs SET resume = ? WHERE id = ?"
-        print(f"Executing query: {query} with job_id: {job_id} and resume: {response}")
-        cursor.execute(query, (response, job_id))
-    conn.commit()
-    conn.close()
+    query = "UPDATE jobs SET resume = ? WHERE id = ?"
+    print(f"Executing query: {query} with job_id: {job_id} and resume: {response}")
+    db.execute(query, (response, job_id))
+    data_changed()
     return jsonify({"resume": response}), 200
 
 
@@ -397,142 +352,50 @@ def save_notes(job_id):
     data = request.get_json()
     notes = data.get('notes', '')
     
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
-        )
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET notes = %s WHERE id = %s"
-        print(f"Executing query: {query} with job_id: {job_id} and notes: {notes}")
-        cursor.execute(query, (notes, job_id))
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-        query = "UPDATE jobs SET notes = ? WHERE id = ?"
-        print(f"Executing query: {query} with job_id: {job_id} and notes: {notes}")
-        cursor.execute(query, (notes, job_id))
-    
-    conn.commit()
-    conn.close()
+    query = "UPDATE jobs SET notes = ? WHERE id = ?"
+    print(f"Executing query: {query} with job_id: {job_id} and notes: {notes}")
+    db.execute(query, (notes, job_id))
+    data_changed()
     return jsonify({"success": True, "notes": notes}), 200
 
 
-def read_jobs_from_db():
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection using SQLAlchemy for pandas
-        host = get_db_host(config)
-        engine = create_engine(
-            f"mysql+pymysql://{config['user']}:{config['password']}@{host}/{config['database']}",
-            pool_recycle=3600,
-        )
-        query = "SELECT * FROM jobs WHERE hidden = 0"
-        df = pd.read_sql_query(query, engine)
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        query = "SELECT * FROM jobs WHERE hidden = 0"
-        df = pd.read_sql_query(query, conn)
-
-    # df = df.sort_values(by="id", ascending=False)
-    df = df.sort_values(by=["date", "id"], ascending=[False, False])
-    # df.reset_index(drop=True, inplace=True)
-    return df.to_dict("records")
+def read_job_from_db(job_id):
+    # A single job with all its columns, or None
+    return db.query_one("SELECT * FROM jobs WHERE id = ?", (job_id,))
+
+
+def create_list_indexes(conn):
+    # Indexes matching the job list queries: not hidden jobs, newest first by date or by id.
+    # MySQL can only index a prefix of TEXT columns.
+    list_indexes = {
+        "ix_jobs_hidden_date_id": [("hidden", None), ("date", 32), ("id", None)],
+        "ix_jobs_hidden_id": [("hidden", None), ("id", None)],
+    }
+    existing_indexes = get_index_names(conn, "jobs", config)
+    cursor = conn.cursor()
+    for index_name, columns in list_indexes.items():
+        if index_name in existing_indexes:
+            continue
+        if is_mysql(config):
+            index_columns = ", ".join(f"`{col}`({length})" if length else f"`{col}`" for col, length in columns)
+        else:
+            index_columns = ", ".join(f'"{col}"' for col, _ in columns)
+        cursor.execute(f"CREATE INDEX {index_name} ON jobs ({index_columns})")
+        print(f"Created index {index_name} on the jobs table")
 
 
 def verify_db_schema():
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL connection
-        host = get_db_host(config)
-        conn = pymysql.connect(
-            host=host,
-            user=config["user"],
-            password=config["password"],
-            database=config["database"],
+    # Add the columns and indexes the web app needs to the jobs table
+    with db.connection() as conn:
+        if not table_exists(conn, "jobs", config):
+            return
+        ensure_columns(
+            conn,
+            "jobs",
+            ["notes", "resume", "seniority_level", "employment_type", "job_function", "industries"],
+            config,
         )
-        cursor = conn.cursor()
-
-        # Check if the table exists
-        cursor.execute(
-            f"SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = '{config['database']}' AND table_name = 'jobs'"
-        )
-        if cursor.fetchone()[0] == 1:
-            # Check if columns exist
-            cursor.execute("SHOW COLUMNS FROM jobs LIKE 'notes'")
-            if cursor.fetchone() is None:
-                cursor.execute("ALTER TABLE jobs ADD COLUMN notes TEXT")
-                print("Added notes column to jobs table")
-
-            cursor.execute("SHOW COLUMNS FROM jobs LIKE 'resume'")
-            if cursor.fetchone() is None:
-                cursor.execute("ALTER TABLE jobs ADD COLUMN resume TEXT")
-                print("Added resume column to jobs table")
-
-            cursor.execute("SHOW COLUMNS FROM jobs LIKE 'seniority_level'")
-            if cursor.fetchone() is None:
-                cursor.execute("ALTER TABLE jobs ADD COLUMN seniority_level TEXT")
-                print("Added seniority_level column to jobs table")
-
-            cursor.execute("SHOW COLUMNS FROM jobs LIKE 'employment_type'")
-            if cursor.fetchone() is None:
-                cursor.execute("ALTER TABLE jobs ADD COLUMN employment_type TEXT")
-                print("Added employment_type column to jobs table")
-
-            cursor.execute("SHOW COLUMNS FROM jobs LIKE 'job_function'")
-            if cursor.fetchone() is None:
-                cursor.execute("ALTER TABLE jobs ADD COLUMN job_function TEXT")
-                print("Added job_function column to jobs table")
-
-            cursor.execute("SHOW COLUMNS FROM jobs LIKE 'industries'")
-            if cursor.fetchone() is None:
-                cursor.execute("ALTER TABLE jobs ADD COLUMN industries TEXT")
-                print("Added industries column to jobs table")
-    else:
-        # SQLite connection
-        conn = sqlite3.connect(config["db_path"])
-        cursor = conn.cursor()
-
-        # Get the table information
-        cursor.execute("PRAGMA table_info(jobs)")
-        table_info = cursor.fetchall()
-
-        # Check if the "notes" column exists
-        if "notes" not in [column[1] for column in table_info]:
-            # If it doesn't exist, add it
-            cursor.execute("ALTER TABLE jobs ADD COLUMN notes TEXT")
-            print("Added notes column to jobs table")
-
-        if "resume" not in [column[1] for column in table_info]:
-            # If it doesn't exist, add it
-            cursor.execute("ALTER TABLE jobs ADD COLUMN resume TEXT")
-            print("Added resume column to jobs table")
-
-        if "seniority_level" not in [column[1] for column in table_info]:
-            # If it doesn't exist, add it
-            cursor.execute("ALTER TABLE jobs ADD COLUMN seniority_level TEXT")
-            print("Added seniority_level column to jobs table")
-
-        if "employment_type" not in [column[1] for column in table_info]:
-            # If it doesn't exist, add it
-            cursor.execute("ALTER TABLE jobs ADD COLUMN employment_type TEXT")
-            print("Added employment_type column to jobs table")
-
-        if "job_function" not in [column[1] for column in table_info]:
-            # If it doesn't exist, add it
-            cursor.execute("ALTER TABLE jobs ADD COLUMN job_function TEXT")
-            print("Added job_function column to jobs table")
-
-        if "industries" not in [column[1] for column in table_info]:
-            # If it doesn't exist, add it
-            cursor.execute("ALTER TABLE jobs ADD COLUMN industries TEXT")
-            print("Added industries column to jobs table")
-
-    conn.close()
+        create_list_indexes(conn)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+# Compare row-by-row inserts with the batched insert_records on a SQLite database.
+# Usage: python benchmarks/bench_inserts.py [number of jobs]
+import sqlite3
+import sys
+import tempfile
+import time as tm
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main
+
+
+def synthetic_jobs(count):
+    return pd.DataFrame(
+        [
+            {
+                "title": f"Python Developer {i}",
+                "company": f"Company {i % 5000}",
+                "location": "Amsterdam, North Holland, Netherlands",
+                "date": f"2026-10-{i % 28 + 1:02d}",
+                "job_url": f"https://www.linkedin.com/jobs/view/{4000000000 + i}/",
+                "job_description": "We are looking for a Python developer. " * 20,
+                "applied": 0,
+                "hidden": 0,
+                "interview": 0,
+                "rejected": 0,
+                "starred": 0,
+                "date_loaded": "2026-10-18 12:00:00",
+            }
+            for i in range(count)
+        ]
+    ).astype(object)
+
+
+def create_jobs_table(conn, df):
+    columns = ", ".join(f'"{column}" TEXT' for column in df.columns)
+    conn.execute(f'CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})')
+    conn.commit()
+
+
+def insert_row_by_row(conn, df):
+    # The previous approach: one execute per record, default journal settings
+    insert_sql = f"""
+        INSERT INTO "jobs" ({', '.join(f'"{column}"' for column in df.columns)})
+        VALUES ({', '.join(['?' for _ in df.columns])})
+    """
+    cursor = conn.cursor()
+    for record in df.to_dict(orient="records"):
+        cursor.execute(insert_sql, list(record.values()))
+    conn.commit()
+
+
+def insert_batched(conn, df):
+    main.insert_records(conn, df, "jobs", {"db_type": "sqlite", "insert_batch_size": 500})
+
+
+def bench(name, insert, df):
+    with tempfile.TemporaryDirectory() as directory:
+        conn = sqlite3.connect(str(Path(directory) / "jobs.db"))
+        create_jobs_table(conn, df)
+        # Both approaches write to a table with the unique job indexes
+        main.create_indexes(conn, "jobs", {"db_type": "sqlite"})
+        start = tm.perf_counter()
+        insert(conn, df)
+        elapsed = tm.perf_counter() - start
+        rows = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        conn.close()
+    print(f"{name:<16}{elapsed:>10.2f}s{rows / elapsed:>14.0f} rows/s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    df = synthetic_jobs(count)
+    print(f"Inserting {count} synthetic jobs")
+    bench("row by row", insert_row_by_row, df)
+    bench("batched", insert_batched, df)
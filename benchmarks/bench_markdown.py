@@ -0,0 +1,56 @@
+# Time the conversion of job descriptions to Markdown, per job, on the saved job pages.
+# Compares the direct tree walk with the previous approach, serializing the description node back to
+# HTML and reparsing it with html2markdown (pip install html2markdown to include it).
+# Usage: python benchmarks/bench_markdown.py [iterations]
+import sys
+import time as tm
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import parsers
+
+try:
+    import html2markdown
+except ImportError:
+    html2markdown = None
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def description_node(content):
+    # The description node, as transform_job gets it
+    soup = parsers.make_soup(content, "html.parser", parsers.JOB_STRAINER)
+    div = soup.find("div", class_="description__text description__text--rich")
+    for element in div.find_all(["span"]):
+        element.decompose()
+    for a in div.find_all("a"):
+        if "Show less" in a.text or "Show more" in a.text:
+            a.decompose()
+    return div
+
+
+def reparse(div):
+    return html2markdown.convert(str(div)).replace("::marker", "-").strip()
+
+
+def bench(func, node, iterations):
+    start = tm.perf_counter()
+    for _ in range(iterations):
+        func(node)
+    return (tm.perf_counter() - start) / iterations * 1000
+
+
+def main(iterations):
+    candidates = [("tree walk", parsers.description_to_markdown)]
+    if html2markdown is not None:
+        candidates.append(("str() + html2markdown", reparse))
+
+    print(f"{'job page':<20}" + "".join(f"{name + ' (ms)':>28}" for name, _ in candidates))
+    for path in sorted(FIXTURES.glob("job_page*.html")):
+        node = description_node(path.read_bytes())
+        times = [bench(func, node, iterations) for _, func in candidates]
+        print(f"{path.stem:<20}" + "".join(f"{ms:>28.3f}" for ms in times))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,53 @@
+# Compare parsing a backlog of job pages (parse, Markdown conversion, language detection) in the
+# parser threads with parsing it in a pool of worker processes (the parse_processes option).
+# Usage: python benchmarks/bench_parse_processes.py [pages] [processes]
+import os
+import sys
+import time as tm
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def bench(config, pages):
+    # Same fan-out as iter_job_descriptions: one parser thread per worker, each waiting on the pool if there is one
+    pool = main.get_parse_pool(config)
+    workers = max(config.get("parse_workers", 2), config.get("parse_processes", 0))
+
+    def parse(content):
+        if pool is not None:
+            return pool.submit(main.parse_job_page, content, config).result()
+        return main.parse_job_page(content, config)
+
+    start = tm.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(parse, pages))
+    return tm.perf_counter() - start, results
+
+
+def main_bench(count, processes):
+    job_page = (FIXTURES / "job_page.html").read_bytes()
+    # Distinct pages, so that the language cache doesn't hide the detection cost
+    pages = [job_page.replace(b"</p>", f" ({i})</p>".encode(), 1) for i in range(count)]
+
+    threads_time, expected = bench({"parse_workers": 2}, pages)
+    # Warm up the worker processes before timing them
+    bench({"parse_workers": 2, "parse_processes": processes}, pages[:processes])
+    processes_time, results = bench({"parse_workers": 2, "parse_processes": processes}, pages)
+    main.close_parse_pool()
+
+    print(f"{count} job pages")
+    print(f"{'threads (parse_workers=2)':<32}{threads_time:8.2f} s {count / threads_time:8.1f} pages/s")
+    print(f"{f'processes (parse_processes={processes})':<32}{processes_time:8.2f} s {count / processes_time:8.1f} pages/s")
+    print("same output:", results == expected)
+
+
+if __name__ == "__main__":
+    main_bench(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count(),
+    )
@@ -0,0 +1,77 @@
+# Compare the HTML parser backends on the saved search and job page fixtures.
+# Usage: python benchmarks/bench_parsers.py [iterations]
+import sys
+import time as tm
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import parsers
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def full_parse_cards(content, backend):
+    # The previous approach: build the whole tree, then search it
+    return parsers.transform(parsers.make_soup(content, backend))
+
+
+def full_parse_job(content, backend):
+    return parsers.transform_job(parsers.make_soup(content, backend))
+
+
+def bench(func, content, iterations):
+    start = tm.perf_counter()
+    for _ in range(iterations):
+        func(content)
+    return (tm.perf_counter() - start) / iterations * 1000
+
+
+def main(iterations):
+    search_page = (FIXTURES / "search_page.html").read_bytes()
+    job_page = (FIXTURES / "job_page.html").read_bytes()
+    expected_cards = full_parse_cards(search_page, "html.parser")
+    expected_job = full_parse_job(job_page, "html.parser")
+
+    backends = [
+        backend
+        for backend in parsers.PARSER_BACKENDS
+        if parsers.get_parser_backend({"html_parser": backend}) == backend
+        and (backend != "lxml" or _available("lxml"))
+    ]
+    candidates = []
+    for backend in backends:
+        if backend != "selectolax":
+            candidates.append(
+                (
+                    f"{backend} (full tree)",
+                    lambda c, backend=backend: full_parse_cards(c, backend),
+                    lambda c, backend=backend: full_parse_job(c, backend),
+                )
+            )
+        config = {"html_parser": backend}
+        candidates.append(
+            (
+                f"{backend} (targeted)" if backend != "selectolax" else backend,
+                lambda c, config=config: parsers.parse_cards(c, config),
+                lambda c, config=config: parsers.parse_job(c, config),
+            )
+        )
+
+    print(f"{'backend':<28}{'search page (ms)':>18}{'job page (ms)':>16}  same output")
+    for name, parse_cards, parse_job in candidates:
+        same = parse_cards(search_page) == expected_cards and parse_job(job_page) == expected_job
+        cards_ms = bench(parse_cards, search_page, iterations)
+        job_ms = bench(parse_job, job_page, iterations)
+        print(f"{name:<28}{cards_ms:>18.2f}{job_ms:>16.2f}  {same}")
+
+
+def _available(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
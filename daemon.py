@@ -0,0 +1,250 @@
+import argparse
+import json
+import random
+import signal
+import threading
+import time as tm
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from filters import JobFilter
+from http_client import close_session, get_proxy_pool
+from db import close_databases, is_mysql
+from main import load_config, create_connection, get_known_jobs, run_pipeline, close_parse_pool
+from near_duplicates import NearDuplicates
+from watermarks import QueryWatermarks
+
+
+class QuerySchedule:
+    # Scheduling state of a single search query
+    def __init__(self, query, interval, min_interval):
+        self.query = query
+        self.interval = interval
+        self.min_interval = min_interval
+        self.next_run = 0.0
+        self.last_run = None
+        self.last_new_jobs = None
+        self.total_new_jobs = 0
+        self.runs = 0
+        self.errors = 0
+        self.last_error = None
+        # Moving average of the new jobs found per run
+        self.yield_score = 0.0
+
+    def effective_interval(self):
+        # Queries that keep finding new jobs are scraped more often, down to min_interval
+        return max(self.min_interval, self.interval / (1 + self.yield_score))
+
+    def status(self):
+        return {
+            "keywords": self.query["keywords"],
+            "location": self.query["location"],
+            "interval": round(self.effective_interval()),
+            "next_run": datetime.fromtimestamp(self.next_run).isoformat(timespec="seconds"),
+            "last_run": datetime.fromtimestamp(self.last_run).isoformat(timespec="seconds") if self.last_run else None,
+            "last_new_jobs": self.last_new_jobs,
+            "total_new_jobs": self.total_new_jobs,
+            "runs": self.runs,
+            "yield_score": round(self.yield_score, 2),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """
+    Decides when every search query is scraped next.
+
+    Every query runs every `interval_minutes` (from the query, or daemon_interval_minutes), shortened
+    for queries that found new jobs in their recent runs (down to daemon_min_interval_minutes), plus a
+    random jitter of up to daemon_jitter of the interval so that requests don't follow a fixed pattern.
+    When several queries are due at once, the ones finding the most new jobs run first.
+    """
+
+    def __init__(self, queries, config, rng=None):
+        self.rng = rng or random.Random()
+        self.jitter = config.get("daemon_jitter", 0.1)
+        self.smoothing = config.get("daemon_yield_smoothing", 0.3)
+        default_interval = config.get("daemon_interval_minutes", 15)
+        min_interval = config.get("daemon_min_interval_minutes", 5) * 60
+        self.schedules = [
+            QuerySchedule(query, query.get("interval_minutes", default_interval) * 60, min_interval)
+            for query in queries
+        ]
+        # Spread the first runs over a short period instead of starting all queries at once
+        now = tm.time()
+        for schedule in self.schedules:
+            schedule.next_run = now + self.rng.uniform(0, self.jitter * schedule.interval)
+
+    def due(self, now):
+        # The queries to run now, most productive first
+        due = [schedule for schedule in self.schedules if schedule.next_run <= now]
+        return sorted(due, key=lambda schedule: (-schedule.yield_score, schedule.next_run))
+
+    def seconds_until_next(self, now):
+        return max(0.0, min(schedule.next_run for schedule in self.schedules) - now)
+
+    def record(self, schedule, new_jobs, now, error=None):
+        # Update the statistics of the query after a run and schedule its next run
+        schedule.runs += 1
+        schedule.last_run = now
+        if error is not None:
+            schedule.errors += 1
+            schedule.last_error = str(error)
+        else:
+            schedule.last_new_jobs = new_jobs
+            schedule.total_new_jobs += new_jobs
+            schedule.yield_score += self.smoothing * (new_jobs - schedule.yield_score)
+        interval = schedule.effective_interval()
+        schedule.next_run = now + interval + self.rng.uniform(0, self.jitter * interval)
+
+
+class Daemon:
+    """
+    Long-running scraper. The database connection, the HTTP sessions (and their rate limiter, proxy
+    pool and response cache), the compiled job filter, the language detector cache, the known jobs,
+    the query watermarks and the near-duplicate index are created once and stay warm between runs, instead of being rebuilt
+    by every cron invocation of main.py.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        # One round per run, the scheduler decides how often a query is scraped
+        self.run_config = dict(config, rounds=1)
+        self.scheduler = Scheduler(config["search_queries"], config)
+        self.job_filter = JobFilter(config)
+        self.conn, _ = create_connection(config)
+        self.known = get_known_jobs(self.conn, config)
+        self.watermarks = None
+        if self.conn is not None and config.get("incremental", False):
+            self.watermarks = QueryWatermarks.load(self.conn, config)
+        self.near_duplicates = None
+        if self.conn is not None and config.get("near_duplicates", True):
+            self.near_duplicates = NearDuplicates.load(self.conn, config)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.started_at = tm.time()
+        self.current_query = None
+        self.total_runs = 0
+        self.total_new_jobs = 0
+
+    def ensure_connection(self):
+        # Reconnect to MySQL if the server closed the connection while the daemon was idle
+        if self.conn is None:
+            self.conn, _ = create_connection(self.config)
+        elif is_mysql(self.config):
+            self.conn.ping(reconnect=True)
+
+    def run_query(self, schedule):
+        with self.lock:
+            self.current_query = schedule.query
+        error = None
+        new_jobs = 0
+        try:
+            self.ensure_connection()
+            stats = run_pipeline(
+                self.run_config,
+                self.conn,
+                [schedule.query],
+                self.job_filter,
+                self.known,
+                watermarks=self.watermarks,
+                near_duplicates=self.near_duplicates,
+            )
+            new_jobs = stats["added"]
+        except Exception as e:
+            print(f"Scraping {schedule.query['keywords']} in {schedule.query['location']} failed: {e}")
+            error = e
+        with self.lock:
+            self.scheduler.record(schedule, new_jobs, tm.time(), error)
+            self.current_query = None
+            self.total_runs += 1
+            self.total_new_jobs += new_jobs
+
+    def run(self):
+        print(f"Scraper daemon started with {len(self.scheduler.schedules)} search queries")
+        while not self.stop_event.is_set():
+            with self.lock:
+                due = self.scheduler.due(tm.time())
+            if not due:
+                with self.lock:
+                    wait = self.scheduler.seconds_until_next(tm.time())
+                self.stop_event.wait(min(wait, 60))
+                continue
+            for schedule in due:
+                if self.stop_event.is_set():
+                    break
+                self.run_query(schedule)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def close(self):
+        close_session()
+        close_parse_pool()
+        if self.conn is not None:
+            self.conn.close()
+        close_databases()
+
+    def status(self):
+        with self.lock:
+            return {
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                "uptime_seconds": round(tm.time() - self.started_at),
+                "current_query": self.current_query,
+                "total_runs": self.total_runs,
+                "total_new_jobs": self.total_new_jobs,
+                "known_jobs": len(self.known),
+                "queries": [schedule.status() for schedule in self.scheduler.schedules],
+                "proxies": get_proxy_pool(self.config).stats(),
+            }
+
+
+def make_status_server(daemon, host, port):
+    # Small HTTP server reporting the state of the daemon as JSON on /status
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/status":
+                self.send_error(404)
+                return
+            body = json.dumps(daemon.status(), indent=2).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), StatusHandler)
+
+
+def run_daemon(config_file):
+    config = load_config(config_file)
+    daemon = Daemon(config)
+    server = None
+    port = config.get("daemon_status_port", 8765)
+    if port:
+        server = make_status_server(daemon, config.get("daemon_status_host", "127.0.0.1"), port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Daemon status available at http://{server.server_address[0]}:{server.server_address[1]}/status")
+    if threading.current_thread() is threading.main_thread():
+        # Finish the current query and stop on docker stop / kill
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("Stopping the scraper daemon")
+    finally:
+        daemon.stop()
+        if server is not None:
+            server.shutdown()
+        daemon.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape LinkedIn job postings continuously")
+    parser.add_argument("config_file", nargs="?", default="config.json")
+    args = parser.parse_args()
+
+    run_daemon(args.config_file)
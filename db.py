@@ -0,0 +1,278 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+from docker_utils import get_db_host
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def is_mysql(config):
+    return config.get("db_type", "sqlite") == "mysql"
+
+
+class ThreadConnection(sqlite3.Connection):
+    # SQLite connection cached for its thread. Closing it is a no-op, like returning a pooled
+    # MySQL connection to the pool, it is closed when the database is disposed. The connection
+    # is only used by one thread at a time, but it is handed to another thread once its thread
+    # has finished, so it is not bound to the thread that created it.
+    def close(self):
+        pass
+
+    def dispose(self):
+        sqlite3.Connection.close(self)
+
+
+class Database:
+    """
+    Process-wide access to the jobs database, shared by the web app and the scraper.
+
+    MySQL connections come from a SQLAlchemy connection pool (`db_pool_size` connections, plus up
+    to `db_max_overflow` under load), checked before use and recycled after an hour, so a request
+    never pays for a new connection. SQLite connections are cached per thread, in WAL mode so the
+    web app can read while the scraper writes; the connections of finished threads (the Flask
+    server runs every request in a new thread) are reused by new threads. Queries use `?`
+    placeholders with both databases.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.mysql = is_mysql(config)
+        self.local = threading.local()
+        # SQLite connections: thread -> connection, and the connections of finished threads
+        self.owners = {}
+        self.idle = []
+        self.lock = threading.Lock()
+        if self.mysql:
+            url = URL.create(
+                "mysql+pymysql",
+                username=config["user"],
+                password=config["password"],
+                host=get_db_host(config),
+                database=config["database"],
+            )
+            self.engine = create_engine(
+                url,
+                pool_size=config.get("db_pool_size", 5),
+                max_overflow=config.get("db_max_overflow", 10),
+                pool_recycle=3600,
+                pool_pre_ping=True,
+            )
+        else:
+            self.engine = create_engine(f"sqlite:///{config['db_path']}")
+
+    def connect(self):
+        # A connection for the current thread: checked out of the pool (MySQL, close it to return it)
+        # or the cached connection of the thread (SQLite)
+        if self.mysql:
+            return self.engine.raw_connection()
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.sqlite_connection()
+            self.local.conn = conn
+        return conn
+
+    def sqlite_connection(self):
+        # The connection of a finished thread, or a new connection
+        with self.lock:
+            for thread, conn in list(self.owners.items()):
+                if not thread.is_alive():
+                    del self.owners[thread]
+                    self.idle.append(conn)
+            conn = self.idle.pop() if self.idle else None
+            self.owners[threading.current_thread()] = conn
+        if conn is None:
+            conn = sqlite3.connect(
+                self.config["db_path"], timeout=30, check_same_thread=False, factory=ThreadConnection
+            )
+            # Write-ahead logging lets readers (the web app) continue during the scraper's writes, and
+            # synchronous=NORMAL only syncs at checkpoints, which is safe in WAL mode
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self.lock:
+                self.owners[threading.current_thread()] = conn
+        elif conn.in_transaction:
+            # Left open by the finished thread
+            conn.rollback()
+        return conn
+
+    @contextmanager
+    def connection(self):
+        # Connection for a unit of work, committed at the end, or rolled back on errors
+        conn = self.connect()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def sql(self, query):
+        # Queries are written with ? placeholders, pymysql expects %s
+        return query.replace("?", "%s") if self.mysql else query
+
+    def query(self, query, params=()):
+        # Rows of a query, as dicts
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.sql(query), params)
+            column_names = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+            cursor.close()
+        return [dict(zip(column_names, row)) for row in rows]
+
+    def query_one(self, query, params=()):
+        rows = self.query(query, params)
+        return rows[0] if rows else None
+
+    def execute(self, query, params=()):
+        # Run a statement and commit it, returns the number of affected rows
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.sql(query), params)
+            rowcount = cursor.rowcount
+            cursor.close()
+        return rowcount
+
+    def dispose(self):
+        # Close all the connections of the database
+        with self.lock:
+            connections = [conn for conn in self.owners.values() if conn is not None] + self.idle
+            self.owners = {}
+            self.idle = []
+        for conn in connections:
+            conn.dispose()
+        self.local = threading.local()
+        self.engine.dispose()
+
+
+def get_database(config):
+    # The Database of the process for the configured database. Forked processes get their own,
+    # connections can't be shared between processes.
+    if is_mysql(config):
+        key = (os.getpid(), "mysql", get_db_host(config), config["user"], config["database"])
+    else:
+        key = (os.getpid(), "sqlite", os.path.abspath(config["db_path"]))
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None:
+            database = _databases[key] = Database(config)
+    return database
+
+
+def close_databases():
+    # Dispose of the databases of the process
+    with _databases_lock:
+        databases = [database for key, database in _databases.items() if key[0] == os.getpid()]
+        _databases.clear()
+    for database in databases:
+        database.dispose()
+
+
+def get_table_columns(conn, table_name, config):
+    # Return the column names of an existing table
+    cursor = conn.cursor()
+    if is_mysql(config):
+        cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+        return [column[0] for column in cursor.fetchall()]
+    cursor.execute(f'PRAGMA table_info("{table_name}")')
+    return [column[1] for column in cursor.fetchall()]
+
+
+def ensure_columns(conn, table_name, columns, config):
+    # Add the columns missing from the table (as TEXT columns)
+    existing_columns = get_table_columns(conn, table_name, config)
+    missing_columns = [col for col in columns if col not in existing_columns]
+    cursor = conn.cursor()
+    for col in missing_columns:
+        if is_mysql(config):
+            cursor.execute(f"ALTER TABLE `{table_name}` ADD COLUMN `{col}` TEXT")
+        else:
+            cursor.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" TEXT')
+        print(f"Added missing column {col} to {table_name} table")
+    if missing_columns:
+        conn.commit()
+
+
+def get_index_names(conn, table_name, config):
+    # Return the names of the indexes of the table
+    cursor = conn.cursor()
+    if is_mysql(config):
+        cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+        return {row[2] for row in cursor.fetchall()}
+    cursor.execute(f'PRAGMA index_list("{table_name}")')
+    return {row[1] for row in cursor.fetchall()}
+
+
+def table_exists(conn, table_name, config):
+    # Check if the table already exists in the database
+    cur = conn.cursor()
+    if is_mysql(config):
+        cur.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = %s AND table_name = %s",
+            (config["database"], table_name),
+        )
+    else:
+        cur.execute("SELECT count(name) FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+
+    if cur.fetchone()[0] == 1:
+        # Table exists, now check if it has the required structure
+        if is_mysql(config):
+            try:
+                cur.execute(f"SELECT title, company, date FROM {table_name} LIMIT 1")
+                cur.fetchone()  # Just to execute the query and see if it works
+            except Exception as e:
+                print(f"Table {table_name} exists but has incorrect structure: {e}")
+                # Drop the table so it can be recreated with correct structure
+                cur.execute(f"DROP TABLE {table_name}")
+                conn.commit()
+                return False
+        return True
+    return False
+
+
+def create_data_version_table(conn, config):
+    # Single row table counting the changes to the jobs, read by the response cache of the web app
+    cursor = conn.cursor()
+    if is_mysql(config):
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS data_version (id INT PRIMARY KEY, version BIGINT, updated_at DOUBLE)"
+        )
+    else:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS data_version (id INTEGER PRIMARY KEY, version INTEGER, updated_at REAL)"
+        )
+    conn.commit()
+
+
+def bump_data_version(conn, config):
+    # Record a change to the jobs (new jobs from the scraper, or an edit in the web app)
+    create_data_version_table(conn, config)
+    if is_mysql(config):
+        sql = """
+            INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, %s)
+            ON DUPLICATE KEY UPDATE version = version + 1, updated_at = VALUES(updated_at)
+        """
+    else:
+        sql = """
+            INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, ?)
+            ON CONFLICT (id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+        """
+    cursor = conn.cursor()
+    cursor.execute(sql, (time.time(),))
+    conn.commit()
+
+
+def get_data_version(conn, config):
+    # The (version, time of the last change) of the jobs, (0, None) before the first change
+    create_data_version_table(conn, config)
+    cursor = conn.cursor()
+    cursor.execute("SELECT version, updated_at FROM data_version WHERE id = 1")
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else (0, None)
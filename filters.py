@@ -0,0 +1,136 @@
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from language import get_language_detector
+
+# The rules that only need the job card, checked before the job page is fetched,
+# and the rules that need the description
+CARD_RULES = (
+    "days_to_scrape",
+    "title_exclude",
+    "title_include",
+    "location_exclude",
+    "location_include",
+    "company_exclude",
+)
+DESCRIPTION_RULES = ("desc_words", "seniority_exclude", "languages")
+
+
+def compile_words(words):
+    # One regex matching any of the (lowercased) words as a substring, or None if there are no words
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word.lower()) for word in words))
+
+
+def get_date_cutoff(config, today=None):
+    # The oldest posting date to keep, as an ISO date string. A posting dated exactly days_to_scrape days ago
+    # is already too old: its day started more than days_to_scrape days before any time of today.
+    today = today or date.today()
+    return (today - timedelta(days=config["days_to_scrape"] - 1)).isoformat()
+
+
+def is_too_old(job, cutoff):
+    # Check if the job was posted before the cutoff date. Card dates are ISO dates, so they are compared
+    # with the cutoff as strings, without parsing. Jobs without a (valid) date are kept.
+    job_date = job.get("date")
+    if not job_date:
+        return False
+    if len(job_date) == 10 and job_date[4] == "-" and job_date[7] == "-":
+        return job_date < cutoff
+    try:
+        return datetime.strptime(job_date, "%Y-%m-%d").date().isoformat() < cutoff
+    except ValueError:
+        return False
+
+
+class JobFilter:
+    """
+    Job filter compiled once from the config (days_to_scrape, title_include/exclude,
+    location_include/exclude, company_exclude, desc_words, seniority_exclude and languages).
+
+    Every word list becomes a single regex over the lowercased field. The rules are split in two
+    stages: `card_rejection_reason` checks the rules that only need the job card (CARD_RULES),
+    so that cards are rejected before their job page is fetched, and
+    `description_rejection_reason` checks the rules that need the description
+    (DESCRIPTION_RULES). Both return the name of the config option that rejected the job, or
+    None if the job is kept. Language detection only runs for jobs that passed every other rule,
+    and is skipped if the job already has its language.
+    """
+
+    def __init__(self, config):
+        self.desc_words = compile_words(config["desc_words"])
+        self.title_exclude = compile_words(config["title_exclude"])
+        self.title_include = compile_words(config["title_include"])
+        self.location_exclude = compile_words(config["location_exclude"])
+        self.location_include = compile_words(config["location_include"])
+        self.company_exclude = compile_words(config["company_exclude"])
+        self.seniority_exclude = compile_words(config.get("seniority_exclude", []))
+        self.languages = config["languages"]
+        self.detector = get_language_detector(config)
+        self.days_to_scrape = config.get("days_to_scrape")
+        self.cutoff_day = None
+        self.cutoff = None
+
+    def date_cutoff(self):
+        # Recomputed when the day changes, a filter can live for days in the daemon
+        today = date.today()
+        if today != self.cutoff_day:
+            self.cutoff = get_date_cutoff({"days_to_scrape": self.days_to_scrape}, today)
+            self.cutoff_day = today
+        return self.cutoff
+
+    def card_rejection_reason(self, job):
+        if self.days_to_scrape is not None and is_too_old(job, self.date_cutoff()):
+            return "days_to_scrape"
+        if self.title_exclude or self.title_include:
+            title = job["title"].lower()
+            if self.title_exclude and self.title_exclude.search(title):
+                return "title_exclude"
+            if self.title_include and not self.title_include.search(title):
+                return "title_include"
+        if self.location_exclude or self.location_include:
+            location = job["location"].lower()
+            if self.location_exclude and self.location_exclude.search(location):
+                return "location_exclude"
+            if self.location_include and not self.location_include.search(location):
+                return "location_include"
+        if self.company_exclude and self.company_exclude.search(job["company"].lower()):
+            return "company_exclude"
+        return None
+
+    def description_rejection_reason(self, job):
+        if self.desc_words and self.desc_words.search(job["job_description"].lower()):
+            return "desc_words"
+        if (
+            self.seniority_exclude
+            and job.get("seniority_level") is not None
+            and self.seniority_exclude.search(job["seniority_level"].lower())
+        ):
+            return "seniority_exclude"
+        if self.languages:
+            language = job.get("language") or self.detector.detect(job["job_description"])
+            if language not in self.languages:
+                return "languages"
+        return None
+
+    def rejection_reason(self, job):
+        return self.card_rejection_reason(job) or self.description_rejection_reason(job)
+
+    def __call__(self, job):
+        # True if the job passes the filter
+        return self.rejection_reason(job) is None
+
+    def split(self, joblist):
+        # Split the jobs into the kept and the rejected ones, and count the rejections per rule
+        kept = []
+        rejected = []
+        reasons = Counter()
+        for job in joblist:
+            reason = self.rejection_reason(job)
+            if reason is None:
+                kept.append(job)
+            else:
+                rejected.append(job)
+                reasons[reason] += 1
+        return kept, rejected, reasons
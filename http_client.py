@@ -0,0 +1,424 @@
+import random
+import threading
+import time as tm
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from response_cache import ResponseCache, conditional_headers
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+# LinkedIn answers with 429 or its own 999 status code when it throttles a client
+THROTTLE_STATUS_CODES = (429, 999)
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+_sessions = {}
+_session_lock = threading.Lock()
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+_proxy_pool = None
+_proxy_pool_lock = threading.Lock()
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate to a single host.
+
+    The refill rate adapts to the server: it is halved every time the server throttles us and
+    raised again in small steps while requests succeed, up to the configured rate. A rate of 0
+    disables the limit, but pauses requested by the server (Retry-After) are still honored.
+    """
+
+    def __init__(self, rate, burst=1, min_rate=0.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self.tokens = burst
+        self.updated = tm.monotonic()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Block until a request may be sent
+        while True:
+            with self.lock:
+                now = tm.monotonic()
+                if self.rate > 0:
+                    self.tokens = min(
+                        self.burst, self.tokens + (now - self.updated) * self.rate
+                    )
+                self.updated = now
+                if now >= self.blocked_until and self.rate <= 0:
+                    return
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = self.blocked_until - now
+                if self.rate > 0:
+                    wait = max(wait, (1 - self.tokens) / self.rate)
+            tm.sleep(wait)
+
+    def throttled(self, pause):
+        # The server throttled us: slow down and hold all requests for `pause` seconds
+        with self.lock:
+            if self.rate > 0:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = 0
+            self.blocked_until = max(self.blocked_until, tm.monotonic() + pause)
+
+    def succeeded(self):
+        # A request went through: recover towards the configured rate
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class RateLimiter:
+    # Keeps one adaptive token bucket per host and egress proxy, shared by all worker threads
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url, proxy_name=None):
+        key = (urlparse(url).netloc, proxy_name)
+        with self.lock:
+            if key not in self.buckets:
+                self.buckets[key] = TokenBucket(self.rate, self.burst)
+            return self.buckets[key]
+
+    def acquire(self, url, proxy_name=None):
+        self.bucket(url, proxy_name).acquire()
+
+    def throttled(self, url, pause, proxy_name=None):
+        self.bucket(url, proxy_name).throttled(pause)
+
+    def succeeded(self, url, proxy_name=None):
+        self.bucket(url, proxy_name).succeeded()
+
+
+class Proxy:
+    # A proxy of the pool with its health statistics
+    def __init__(self, proxies):
+        self.proxies = proxies
+        self.name = proxies.get("https") or proxies.get("http") or "direct"
+        self.score = 1.0
+        self.latency = None
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0
+        self.current_weight = 0.0
+
+    def weight(self):
+        # Healthy and fast proxies get more traffic
+        latency = self.latency if self.latency is not None else 0
+        return max(self.score, 0.01) / (1 + latency)
+
+
+class ProxyPool:
+    """
+    Pool of proxies with health scoring.
+
+    Every proxy keeps a success score and a latency average, both exponentially weighted. Proxies
+    are assigned with smooth weighted round-robin on those statistics. After `max_failures`
+    consecutive failures or throttled responses a proxy is ejected for `cooldown` seconds,
+    doubling with every further ejection.
+    """
+
+    def __init__(self, proxy_list, max_failures=3, cooldown=300):
+        self.proxies = [Proxy(proxy or {}) for proxy in proxy_list]
+        if not self.proxies:
+            self.proxies = [Proxy({})]
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+
+    def choose(self):
+        # Pick the next proxy. If all of them are ejected, use the one that comes back first.
+        with self.lock:
+            now = tm.monotonic()
+            available = [proxy for proxy in self.proxies if proxy.ejected_until <= now]
+            if not available:
+                return min(self.proxies, key=lambda proxy: proxy.ejected_until)
+            total = 0.0
+            for proxy in available:
+                proxy.current_weight += proxy.weight()
+                total += proxy.weight()
+            chosen = max(available, key=lambda proxy: proxy.current_weight)
+            chosen.current_weight -= total
+            return chosen
+
+    def report_success(self, proxy, latency):
+        with self.lock:
+            proxy.score = 0.8 * proxy.score + 0.2
+            proxy.latency = (
+                latency if proxy.latency is None else 0.8 * proxy.latency + 0.2 * latency
+            )
+            proxy.failures = 0
+            proxy.ejections = 0
+
+    def report_failure(self, proxy):
+        with self.lock:
+            proxy.score = 0.8 * proxy.score
+            proxy.failures += 1
+            if proxy.failures >= self.max_failures and len(self.proxies) > 1:
+                pause = self.cooldown * 2**proxy.ejections
+                proxy.ejected_until = tm.monotonic() + pause
+                proxy.ejections += 1
+                proxy.failures = 0
+                print(f"Ejecting proxy {proxy.name} for {pause}s after repeated failures")
+
+    def stats(self):
+        # Health statistics of every proxy, for logging and status reports
+        with self.lock:
+            now = tm.monotonic()
+            return [
+                {
+                    "proxy": proxy.name,
+                    "score": round(proxy.score, 3),
+                    "latency": round(proxy.latency, 3) if proxy.latency is not None else None,
+                    "ejected": proxy.ejected_until > now,
+                }
+                for proxy in self.proxies
+            ]
+
+
+def create_session(config, proxy=None):
+    """
+    Creates the HTTP session used for scraper requests.
+
+    The session keeps connections alive between requests and its connection pool is sized to the
+    scraper's concurrency. Set "http_backend" to "httpx" in the config to use an HTTP/2 capable
+    httpx client instead of requests (requires `pip install httpx[http2]`). A requests session is
+    shared by all proxies (they are passed per request), an httpx client is bound to one proxy.
+    """
+    # While streaming, max_workers search page scrapers and max_workers description fetchers share the pool
+    # (the parse workers make no requests)
+    pool_size = 2 * config.get("max_workers", 4)
+
+    if config.get("http_backend", "requests") == "httpx" and httpx is None:
+        print("httpx is not installed, falling back to requests for HTTP sessions")
+    if is_httpx_backend(config):
+        proxies = proxy.proxies if proxy is not None else {}
+        return httpx.Client(
+            http2=True,
+            headers=config["headers"],
+            proxy=proxies.get("https") or proxies.get("http"),
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            follow_redirects=True,
+        )
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(config["headers"])
+    return session
+
+
+def is_httpx_backend(config):
+    # Check if the config asks for the httpx backend and httpx is installed
+    return config.get("http_backend", "requests") == "httpx" and httpx is not None
+
+
+def get_session(config, proxy=None):
+    # Return the process-wide HTTP session (per proxy for httpx), creating it on first use
+    key = proxy.name if proxy is not None and is_httpx_backend(config) else None
+    with _session_lock:
+        if key not in _sessions:
+            _sessions[key] = create_session(config, proxy)
+        return _sessions[key]
+
+
+def close_session():
+    # Close the process-wide HTTP sessions and their pooled connections, and forget the rate limiter and proxy state
+    global _rate_limiter, _proxy_pool, _response_cache
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+    with _rate_limiter_lock:
+        _rate_limiter = None
+    with _proxy_pool_lock:
+        _proxy_pool = None
+    with _response_cache_lock:
+        if _response_cache is not None:
+            _response_cache.close()
+            _response_cache = None
+
+
+def get_proxy_pool(config):
+    # Return the process-wide proxy pool, built from "proxy_pool" or the single "proxies" entry of the config
+    global _proxy_pool
+    with _proxy_pool_lock:
+        if _proxy_pool is None:
+            proxy_list = config.get("proxy_pool") or [config.get("proxies") or {}]
+            _proxy_pool = ProxyPool(
+                proxy_list,
+                config.get("proxy_max_failures", 3),
+                config.get("proxy_cooldown", 300),
+            )
+        return _proxy_pool
+
+
+def get_rate_limiter(config):
+    # Return the process-wide rate limiter, creating it on first use
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(
+                config.get("requests_per_second", 2), config.get("burst", 1)
+            )
+        return _rate_limiter
+
+
+def get_response_cache(config):
+    # Return the process-wide response cache, or None if "http_cache" is not configured
+    global _response_cache
+    cache_config = config.get("http_cache")
+    if not cache_config:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                cache_config.get("path", "data/http_cache.sqlite"),
+                cache_config.get("ttl"),
+                int(cache_config.get("max_size_mb", 256) * 1024 * 1024),
+            )
+        return _response_cache
+
+
+def backoff_delay(attempt, delay, max_delay):
+    # Exponential backoff with full jitter, so that workers failing together do not retry together
+    return random.uniform(0, min(max_delay, delay * 2**attempt))
+
+
+def retry_after_seconds(response):
+    # Parse the Retry-After header (seconds or HTTP date), returns None if it is missing or invalid
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_timeout(error):
+    # Check if the error is a timeout of either HTTP backend
+    if isinstance(error, requests.exceptions.Timeout):
+        return True
+    return httpx is not None and isinstance(error, httpx.TimeoutException)
+
+
+def fetch_with_retry(url, config, retries=None, delay=None):
+    """
+    Gets the raw page content of the URL, or None if all attempts failed.
+
+    If "http_cache" is configured, fresh cached responses are returned without any request and
+    stale ones are revalidated with a conditional request. Every attempt picks a proxy from the
+    pool and goes through the shared rate limiter. Timeouts, connection errors and 5xx responses
+    are retried with jittered exponential backoff (there is no wait after the last attempt).
+    Throttling responses (429/999) additionally slow down the limiter for that host and pause all
+    workers for the Retry-After period, up to max_retry_after seconds. Backoff delays are capped
+    at max_backoff seconds. Any other status than 2xx or 304 (403, 404, 410...) returns None
+    right away, without counting as a success of the proxy and the limiter or being cached.
+    """
+    retries = retries if retries is not None else config.get("retries", 3)
+    delay = delay if delay is not None else config.get("retry_delay", 1)
+    max_backoff = config.get("max_backoff", 60)
+    max_retry_after = config.get("max_retry_after", 900)
+    cache = get_response_cache(config)
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and cached.fresh:
+        return cached.body
+    headers = conditional_headers(cached)
+
+    limiter = get_rate_limiter(config)
+    pool = get_proxy_pool(config)
+    for attempt in range(retries):
+        last_attempt = attempt == retries - 1
+        proxy = pool.choose()
+        session = get_session(config, proxy)
+        limiter.acquire(url, proxy.name)
+        start = tm.perf_counter()
+        try:
+            if is_httpx_backend(config):
+                r = session.get(
+                    url, headers=headers, timeout=config.get("request_timeout", 5)
+                )
+            else:
+                r = session.get(
+                    url,
+                    headers=headers,
+                    proxies=proxy.proxies,
+                    timeout=config.get("request_timeout", 5),
+                )
+        except Exception as e:
+            pool.report_failure(proxy)
+            wait = 0 if last_attempt else backoff_delay(attempt, delay, max_backoff)
+            retrying = "" if last_attempt else f", retrying in {wait:.1f}s..."
+            if is_timeout(e):
+                print(f"Timeout occurred for URL: {url}{retrying}")
+            else:
+                print(f"An error occurred while retrieving the URL: {url}, error: {e}{retrying}")
+            if wait:
+                tm.sleep(wait)
+            continue
+
+        if r.status_code in THROTTLE_STATUS_CODES or r.status_code in RETRY_STATUS_CODES:
+            pool.report_failure(proxy)
+            wait = retry_after_seconds(r)
+            if wait is None:
+                wait = backoff_delay(attempt, delay, max_backoff)
+            else:
+                # The pause asked for by the server, unless it is unreasonably long
+                wait = min(wait, max_retry_after)
+            if r.status_code in THROTTLE_STATUS_CODES:
+                print(f"Got HTTP {r.status_code} for URL: {url}, pausing for {wait:.1f}s...")
+                # the next acquire() waits for the pause, for every worker using this host and proxy
+                limiter.throttled(url, wait, proxy.name)
+            elif last_attempt:
+                print(f"Got HTTP {r.status_code} for URL: {url}")
+            else:
+                print(f"Got HTTP {r.status_code} for URL: {url}, retrying in {wait:.1f}s...")
+                tm.sleep(wait)
+            continue
+
+        if not (200 <= r.status_code < 300 or r.status_code == 304):
+            print(f"Got HTTP {r.status_code} for URL: {url}, giving up")
+            return None
+
+        pool.report_success(proxy, tm.perf_counter() - start)
+        limiter.succeeded(url, proxy.name)
+        if r.status_code == 304 and cached is not None:
+            cache.refresh(url)
+            return cached.body
+        if cache is not None and r.status_code == 200:
+            cache.put(url, r.content, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        if config.get("debug_output_file"):
+            # save to file for debugging
+            with open(config["debug_output_file"], "w") as output_file:
+                output_file.write(r.text)
+        return r.content
+    print(f"Giving up on URL: {url} after {retries} attempts")
+    return None
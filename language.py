@@ -0,0 +1,95 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from langdetect import DetectorFactory, detect
+from langdetect.lang_detect_exception import LangDetectException
+
+try:
+    import fasttext
+except ImportError:
+    fasttext = None
+
+
+# langdetect is randomized, seed it so that a text always gets the same language
+DetectorFactory.seed = 0
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+class LanguageDetector:
+    """
+    Detects the language of job descriptions.
+
+    Only the first `sample_chars` characters of a text are looked at, which is plenty to tell the
+    language of a job description, and results are memoized by a hash of that sample (up to
+    `cache_size` entries), so a description is never analysed twice. The default backend is
+    langdetect. With backend "fasttext" a local fastText language identification model is used
+    instead (`pip install fasttext` and download lid.176.ftz), which is much faster.
+    Texts without any detectable language are reported as `default`.
+    """
+
+    def __init__(
+        self,
+        sample_chars=1000,
+        cache_size=10000,
+        backend="langdetect",
+        model_path=None,
+        default="en",
+    ):
+        self.sample_chars = sample_chars
+        self.cache_size = cache_size
+        self.default = default
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        # langdetect is not thread safe, concurrent detections can return wrong languages
+        self.detect_lock = threading.Lock()
+        self.model = None
+        if backend == "fasttext":
+            if fasttext is None or not model_path:
+                print("fasttext or its model is not available, using langdetect for language detection")
+            else:
+                self.model = fasttext.load_model(model_path)
+
+    def detect(self, text):
+        sample = (text or "")[: self.sample_chars]
+        key = hashlib.sha1(sample.encode("utf-8")).digest()
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        language = self._detect(sample)
+        with self.lock:
+            self.cache[key] = language
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return language
+
+    def _detect(self, sample):
+        if self.model is not None:
+            labels, _ = self.model.predict(sample.replace("\n", " "))
+            return labels[0].replace("__label__", "") if labels else self.default
+        try:
+            with self.detect_lock:
+                return detect(sample)
+        except LangDetectException:
+            return self.default
+
+
+def get_language_detector(config=None):
+    # Return the process-wide language detector, created from the config on first use
+    global _detector
+    config = config or {}
+    with _detector_lock:
+        if _detector is None:
+            _detector = LanguageDetector(
+                config.get("language_sample_chars", 1000),
+                config.get("language_cache_size", 10000),
+                config.get("language_backend", "langdetect"),
+                config.get("language_model_path"),
+            )
+        return _detector
+
+
+def safe_detect(text):
+    return get_language_detector().detect(text)
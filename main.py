@@ -1,17 +1,41 @@
 # flake8: noqa e501
-import requests
+import argparse
 import json
-import sys
+import multiprocessing
 import pymysql
-from sqlalchemy import create_engine
-from bs4 import BeautifulSoup
 import time as tm
+import threading
+import queue
+from collections import Counter
 from itertools import groupby
-from datetime import datetime, timedelta, time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
 import pandas as pd
 from urllib.parse import quote
-from langdetect import detect
-from langdetect.lang_detect_exception import LangDetectException
+import db
+from db import get_database, close_databases, is_mysql, get_table_columns, ensure_columns, get_index_names
+from http_client import fetch_with_retry, close_session
+from filters import JobFilter, get_date_cutoff, is_too_old
+from language import get_language_detector
+from run_state import RunState, PENDING, DONE, FAILED
+from watermarks import QueryWatermarks
+from near_duplicates import NearDuplicates, description_signature
+from parsers import parse_cards, parse_job
+
+
+# Columns of the stored jobs, in the order they are written to the CSV files
+JOB_COLUMNS = [
+    "title", "company", "location", "date", "job_url", "job_description",
+    "applied", "hidden", "interview", "rejected", "starred",
+    "seniority_level", "employment_type", "job_function", "industries", "language",
+]
+# Status flags set by the user in the web app
+STATUS_COLUMNS = ["applied", "hidden", "interview", "rejected", "starred"]
+# The filtered jobs also record the rule (or near-duplicate check) that rejected them
+FILTERED_JOB_COLUMNS = JOB_COLUMNS + ["filter_reason"]
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
 
 
 def load_config(file_name):
@@ -20,306 +44,341 @@ def load_config(file_name):
         return json.load(f)
 
 
-def get_with_retry(url, config, retries=3, delay=1):
-    # Get the URL with retries and delay
-    for i in range(retries):
+def parse_job_page(content, config, location=None):
+    # Parse a fetched job page into a small dict: the description, the criteria and the language of the description.
+    # Only takes and returns plain data, so that it can run in a worker process (see get_parse_pool).
+    # The location of the job card goes into the near-duplicate signature of the description.
+    job_data = parse_job(content, config)
+    # Detected once here and stored with the job, the filters reuse it
+    job_data["language"] = get_language_detector(config).detect(job_data["description"])
+    if config.get("near_duplicates", True):
+        # Hashed here rather than on the thread writing the jobs, see NearDuplicates.match_description
+        job_data["description_minhash"] = description_signature(job_data["description"], location)
+    return job_data
+
+
+def describe_job(job, content, config, job_data=None):
+    # Add the description, criteria and language of a fetched job page to the job card.
+    # job_data is the already parsed page, if it was parsed elsewhere (in a worker process).
+    if content is None:
+        raise ValueError("the job page could not be fetched")
+    if job_data is None:
+        job_data = parse_job_page(content, config, job.get("location"))
+
+    # Add job description
+    job["job_description"] = job_data["description"]
+
+    # Add job criteria if available
+    criteria = job_data["criteria"]
+    if "seniority_level" in criteria:
+        job["seniority_level"] = criteria["seniority_level"]
+    if "employment_type" in criteria:
+        job["employment_type"] = criteria["employment_type"]
+    if "job_function" in criteria:
+        job["job_function"] = criteria["job_function"]
+    if "industries" in criteria:
+        job["industries"] = criteria["industries"]
+
+    job["language"] = job_data["language"]
+    if "description_minhash" in job_data:
+        job["description_minhash"] = job_data["description_minhash"]
+    if job["language"] not in config["languages"]:
+        print("Job description language not supported: ", job["language"])
+    return job
+
+
+def get_parse_pool(config):
+    # Return the process-wide pool of parse_processes worker processes, or None if parsing runs in threads
+    global _parse_pool
+    processes = config.get("parse_processes", 0)
+    if not processes:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # Created from a parser thread while the fetcher threads may hold locks (logging, the HTTP session, the
+            # queues): the worker processes are started by a fork server (or spawned) rather than forked from here
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _parse_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method))
+        return _parse_pool
+
+
+def close_parse_pool():
+    # Stop the parse worker processes
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown()
+            _parse_pool = None
+
+
+def put_unless_stopped(q, item, stop):
+    # Put the item on the queue, giving up if the stop event is set (the consumer went away). Returns True if the item was put.
+    while not stop.is_set():
         try:
-            if len(config["proxies"]) > 0:
-                r = requests.get(
-                    url, headers=config["headers"], proxies=config["proxies"], timeout=5
-                )
-            else:
-                r = requests.get(url, headers=config["headers"], timeout=5)
-                # save to file for debugging
-                output_file = open("linkedin_jobs_output.txt", "w")
-                output_file.write(r.text)
-                output_file.close()
-            return BeautifulSoup(r.content, "html.parser")
-        except requests.exceptions.Timeout:
-            print(f"Timeout occurred for URL: {url}, retrying in {delay}s...")
-            tm.sleep(delay)
-        except Exception as e:
-            print(f"An error occurred while retrieving the URL: {url}, error: {e}")
-    return None
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
 
 
-def transform(soup):
-    # Parsing the job card info (title, company, location, date, job_url) from the beautiful soup object
-    joblist = []
-    try:
-        divs = soup.find_all("div", class_="base-search-card__info")
-    except:
-        print("Empty page, no jobs found")
-        return joblist
-    for item in divs:
-        title = item.find("h3").text.strip()
-        company = item.find("a", class_="hidden-nested-link")
-        location = item.find("span", class_="job-search-card__location")
-        parent_div = item.parent
-        entity_urn = parent_div["data-entity-urn"]
-        job_posting_id = entity_urn.split(":")[-1]
-        job_url = "https://www.linkedin.com/jobs/view/" + job_posting_id + "/"
-
-        date_tag_new = item.find("time", class_="job-search-card__listdate--new")
-        date_tag = item.find("time", class_="job-search-card__listdate")
-        date = (
-            date_tag["datetime"]
-            if date_tag
-            else date_tag_new["datetime"] if date_tag_new else ""
-        )
-        job_description = ""
-        job = {
-            "title": title,
-            "company": company.text.strip().replace("\n", " ") if company else "",
-            "location": location.text.strip() if location else "",
-            "date": date,
-            "job_url": job_url,
-            "job_description": job_description,
-            "applied": 0,
-            "hidden": 0,
-            "interview": 0,
-            "rejected": 0,
-            "starred": 0,
-        }
-        joblist.append(job)
-    return joblist
-
-
-import html2markdown
-
-def transform_job(soup):
-    # Extract job description
-    div = soup.find("div", class_="description__text description__text--rich")
-    job_description = ""
-    if div:
-        # Remove unwanted elements
-        for element in div.find_all(["span"]):
-            element.decompose()
-            
-        # Remove "Show less" and "Show more" links
-        for a in div.find_all("a"):
-            if "Show less" in a.text or "Show more" in a.text:
-                a.decompose()
-            
-        # Get the HTML content
-        html_content = str(div)
-        
-        # Convert HTML to Markdown to preserve formatting
-        markdown_content = html2markdown.convert(html_content)
-        
-        # Clean up the markdown
-        markdown_content = markdown_content.replace("::marker", "-")
-        markdown_content = markdown_content.strip()
-        
-        job_description = markdown_content
-    else:
-        job_description = "Could not find Job Description"
-    
-    # Extract job criteria (seniority level, employment type, etc.)
-    job_criteria = {}
-    criteria_list = soup.find("ul", class_="description__job-criteria-list")
-    
-    if criteria_list:
-        for item in criteria_list.find_all("li", class_="description__job-criteria-item"):
-            header = item.find("h3", class_="description__job-criteria-subheader")
-            text = item.find("span", class_="description__job-criteria-text")
-            
-            if header and text:
-                key = header.text.strip().lower().replace(' ', '_')
-                value = text.text.strip()
-                job_criteria[key] = value
-    
-    return {
-        "description": job_description,
-        "criteria": job_criteria
-    }
+def get_unless_stopped(q, stop):
+    # Get an item from the queue, returns None if the stop event is set
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
 
 
-def safe_detect(text):
-    try:
-        return detect(text)
-    except LangDetectException:
-        return "en"
-
-
-def remove_irrelevant_jobs(joblist, config):
-    # Filter out jobs based on description, title, and language. Set up in config.json.
-    new_joblist = [
-        job
-        for job in joblist
-        if not any(
-            word.lower() in job["job_description"].lower()
-            for word in config["desc_words"]
-        )
+def iter_job_descriptions(jobs, config, stats=None, on_failed=None):
+    # Fetch and parse the job pages of the incoming jobs and yield each job as soon as it is described.
+    # A feeder thread pulls the jobs from the input iterator into a bounded queue, a pool of fetcher threads downloads
+    # the pages and hands them over another bounded queue to a pool of parser threads, so that network waits and parsing
+    # overlap and only a bounded number of jobs is in flight at any time.
+    # Jobs whose page could not be fetched or parsed are left out (and passed to on_failed), they will be picked up by the next run.
+    # Jobs already rejected on their card (with a filter_reason) are passed through without fetching their page.
+    # With parse_processes, the parser threads hand the raw pages to a pool of worker processes, so that parsing
+    # uses several cores; only the page bytes and the small parsed dicts cross the process boundary.
+    queue_size = config.get("description_queue_size", 32)
+    todo = queue.Queue(maxsize=queue_size)
+    pages = queue.Queue(maxsize=queue_size)
+    described = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    lock = threading.Lock()
+    stats = stats if stats is not None else Counter()
+
+    def feeder():
+        try:
+            for job in jobs:
+                if not put_unless_stopped(described if job.get("filter_reason") else todo, job, stop):
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for _ in fetchers:
+                put_unless_stopped(todo, None, stop)
+
+    def fetch_worker():
+        while True:
+            job = get_unless_stopped(todo, stop)
+            if job is None:
+                break
+            print("Found new job: ", job["title"], "at ", job["company"], job["job_url"])
+            try:
+                content = fetch_with_retry(job["job_url"], config)
+            except Exception as e:
+                print(f"An error occurred while retrieving the URL: {job['job_url']}, error: {e}")
+                content = None
+            if not put_unless_stopped(pages, (job, content), stop):
+                break
+
+    def parse_worker():
+        while True:
+            item = get_unless_stopped(pages, stop)
+            if item is None:
+                break
+            job, content = item
+            try:
+                job_data = None
+                if parse_pool is not None and content is not None:
+                    job_data = parse_pool.submit(parse_job_page, content, config, job.get("location")).result()
+                describe_job(job, content, config, job_data)
+            except Exception as e:
+                print(f"Could not process job: {job['job_url']}, error: {e}")
+                with lock:
+                    stats["failed"] += 1
+                if on_failed is not None:
+                    on_failed(job)
+                continue
+            with lock:
+                stats["described"] += 1
+            if not put_unless_stopped(described, job, stop):
+                break
+
+    def coordinator():
+        # Signal the end of every stage once the previous one is done
+        for fetcher in fetchers:
+            fetcher.join()
+        for _ in parsers:
+            put_unless_stopped(pages, None, stop)
+        for parser in parsers:
+            parser.join()
+        put_unless_stopped(described, None, stop)
+
+    fetchers = [
+        threading.Thread(target=fetch_worker, daemon=True)
+        for _ in range(config.get("max_workers", 4))
     ]
-    new_joblist = (
-        [
-            job
-            for job in new_joblist
-            if not any(
-                word.lower() in job["title"].lower() for word in config["title_exclude"]
-            )
-        ]
-        if len(config["title_exclude"]) > 0
-        else new_joblist
-    )
-    new_joblist = (
-        [
-            job
-            for job in new_joblist
-            if any(
-                word.lower() in job["title"].lower() for word in config["title_include"]
-            )
-        ]
-        if len(config["title_include"]) > 0
-        else new_joblist
-    )
-    new_joblist = (
-        [
-            job
-            for job in new_joblist
-            if not any(
-                word.lower() in job["location"].lower() for word in config["location_exclude"]
-            )
-        ]
-        if len(config["location_exclude"]) > 0
-        else new_joblist
-    )
-    new_joblist = (
-        [
-            job
-            for job in new_joblist
-            if any(
-                word.lower() in job["location"].lower() for word in config["location_include"]
-            )
-        ]
-        if len(config["location_include"]) > 0
-        else new_joblist
-    )
-    new_joblist = (
-        [
-            job
-            for job in new_joblist
-            if safe_detect(job["job_description"]) in config["languages"]
-        ]
-        if len(config["languages"]) > 0
-        else new_joblist
-    )
-    new_joblist = (
-        [
-            job
-            for job in new_joblist
-            if not any(
-                word.lower() in job["company"].lower()
-                for word in config["company_exclude"]
-            )
-        ]
-        if len(config["company_exclude"]) > 0
-        else new_joblist
-    )
-    
-    # Filter out jobs based on seniority level
-    new_joblist = (
-        [
-            job
-            for job in new_joblist
-            if "seniority_level" not in job or not any(
-                level.lower() in job["seniority_level"].lower()
-                for level in config["seniority_exclude"]
-            )
-        ]
-        if "seniority_exclude" in config and len(config["seniority_exclude"]) > 0
-        else new_joblist
-    )
-
-    return new_joblist
-
-
-def remove_duplicates(joblist, config):
-    # Remove duplicate jobs in the joblist. Duplicate is defined as having the same title and company.
-    joblist.sort(key=lambda x: (x["title"], x["company"]))
-    joblist = [
-        next(g) for k, g in groupby(joblist, key=lambda x: (x["title"], x["company"]))
+    parse_pool = get_parse_pool(config)
+    # Enough parser threads to keep every worker process busy
+    parse_threads = max(config.get("parse_workers", 2), config.get("parse_processes", 0))
+    parsers = [
+        threading.Thread(target=parse_worker, daemon=True)
+        for _ in range(parse_threads)
     ]
-    return joblist
-
+    feeder_thread = threading.Thread(target=feeder, daemon=True)
+    threads = [feeder_thread] + fetchers + parsers
+    threads.append(threading.Thread(target=coordinator, daemon=True))
+    for thread in threads:
+        thread.start()
 
-def convert_date_format(date_string):
-    """
-    Converts a date string to a date object.
-
-    Args:
-        date_string (str): The date in string format.
-
-    Returns:
-        date: The converted date object, or None if conversion failed.
-    """
-    date_format = "%Y-%m-%d"
     try:
-        job_date = datetime.strptime(date_string, date_format).date()
-        return job_date
-    except ValueError:
-        print(f"Error: The date for job {date_string} - is not in the correct format.")
-        return None
+        while True:
+            job = described.get()
+            if job is None:
+                break
+            yield job
+    finally:
+        stop.set()
+        # The input iterator is closed here, once the feeder is done with it: closing a generator while another
+        # thread runs it fails. The feeder stops at its next job.
+        feeder_thread.join()
+        if hasattr(jobs, "close"):
+            jobs.close()
+    if errors:
+        raise errors[0]
 
 
 def create_connection(config):
-    # Create a database connection to a MySQL database
-    conn = None
-    engine = None
+    # Connection to the configured database and its SQLAlchemy engine, from the shared data-access layer
+    # (see db.py): a pooled MySQL connection, or the cached SQLite connection of the thread
     try:
-        if config.get("db_type", "sqlite") == "mysql":
-            # Import the get_db_host function
-            from docker_utils import get_db_host
-            
-            # Get the appropriate host
-            host = get_db_host(config)
-            
-            # MySQL connection
-            conn = pymysql.connect(
-                host=host,
-                user=config["user"],
-                password=config["password"],
-                database=config["database"],
+        database = get_database(config)
+        return database.connect(), database.engine
+    except Exception as e:
+        print(f"Error connecting to database: {e}")
+        return None, None
+
+
+def remove_duplicate_rows(conn, table_name, columns, config):
+    # Delete the rows duplicating an earlier row (lower id) on the key of a unique index, so that the index can be built.
+    # columns are the (column, prefix length) pairs of the index: MySQL compares the prefixes, like the index does.
+    # Rows with a NULL in the key never collide. The user's work on a removed row is kept: its status flags are
+    # merged into the kept row, and its notes and resume are used if the kept row has none. Every removal is logged.
+    if is_mysql(config):
+        keys = [f"LEFT(t.`{col}`, {length})" for col, length in columns]
+        table = f"`{table_name}`"
+    else:
+        keys = [f't."{col}"' for col, _ in columns]
+        table = f'"{table_name}"'
+    existing_columns = set(get_table_columns(conn, table_name, config))
+    flags = [col for col in STATUS_COLUMNS if col in existing_columns]
+    texts = [col for col in ["notes", "resume"] if col in existing_columns]
+    group_columns = ", ".join(f"d.k{i}" for i in range(len(keys)))
+    state_columns = "".join(f", t.{col}" for col in flags + texts)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT {group_columns}, t.id, t.job_url{state_columns}
+        FROM {table} t JOIN (
+            SELECT {", ".join(f"{key} AS k{i}" for i, key in enumerate(keys))} FROM {table} t
+            WHERE {" AND ".join(f"{key} IS NOT NULL" for key in keys)}
+            GROUP BY {", ".join(keys)} HAVING COUNT(*) > 1
+        ) d ON {" AND ".join(f"{key} = d.k{i}" for i, key in enumerate(keys))}
+        ORDER BY {group_columns}, t.id
+        """
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return
+    placeholder = "%s" if is_mysql(config) else "?"
+    removed = 0
+    for _, group in groupby(rows, key=lambda row: row[: len(keys)]):
+        group = [dict(zip(["id", "job_url"] + flags + texts, row[len(keys):])) for row in group]
+        kept, duplicates = group[0], group[1:]
+        values = {col: max(int(row[col] or 0) for row in group) for col in flags}
+        for col in texts:
+            values[col] = next((row[col] for row in group if row[col]), kept[col])
+        if values:
+            assignments = ", ".join(f"{col} = {placeholder}" for col in values)
+            cursor.execute(
+                f"UPDATE {table} SET {assignments} WHERE id = {placeholder}", list(values.values()) + [kept["id"]]
             )
-            # Create SQLAlchemy engine for pandas
-            engine = create_engine(
-                f"mysql+pymysql://{config['user']}:{config['password']}@{host}/{config['database']}",
-                pool_recycle=3600,
+        cursor.executemany(f"DELETE FROM {table} WHERE id = {placeholder}", [(row["id"],) for row in duplicates])
+        removed += len(duplicates)
+        print(
+            f"Removed duplicates of job {kept['id']} ({kept['job_url']}) from the {table_name} table:",
+            ", ".join(f"{row['id']} ({row['job_url']})" for row in duplicates),
+        )
+    print(f"Removed {removed} duplicate records from the {table_name} table")
+    conn.commit()
+
+
+def create_indexes(conn, table_name, config):
+    # Create the unique indexes on job_url and on (title, company, date). Writes rely on them to skip
+    # jobs that are already stored. Existing duplicates are removed first, otherwise the index can't be built.
+    # MySQL can only index a prefix of TEXT columns.
+    unique_indexes = {
+        f"uq_{table_name}_job_url": [("job_url", 255)],
+        f"uq_{table_name}_title_company_date": [
+            ("title", 191),
+            ("company", 191),
+            ("date", 32),
+        ],
+    }
+    existing_indexes = get_index_names(conn, table_name, config)
+    cursor = conn.cursor()
+    for index_name, columns in unique_indexes.items():
+        if index_name in existing_indexes:
+            continue
+        remove_duplicate_rows(conn, table_name, columns, config)
+        if is_mysql(config):
+            index_columns = ", ".join(f"`{col}`({length})" for col, length in columns)
+            cursor.execute(
+                f"CREATE UNIQUE INDEX `{index_name}` ON `{table_name}` ({index_columns})"
             )
         else:
-            # Fallback to SQLite for backward compatibility
-            import sqlite3
+            index_columns = ", ".join(f'"{col}"' for col, _ in columns)
+            cursor.execute(
+                f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ({index_columns})'
+            )
+        print(f"Created unique index {index_name} on the {table_name} table")
+    conn.commit()
 
-            conn = sqlite3.connect(config["db_path"])
-            # Create SQLAlchemy engine for pandas
-            engine = create_engine(f"sqlite:///{config['db_path']}")
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
 
-    return conn, engine
+def insert_records(conn, df, table_name, config):
+    # Insert the DataFrame records, skipping the ones that collide with a unique index (jobs already stored).
+    # Records are sent in batches of insert_batch_size rows, all in a single transaction.
+    # Returns the number of inserted records.
+    columns = list(df.columns)
+    if is_mysql(config):
+        # pymysql turns executemany into multi-row INSERT statements
+        insert_sql = f"""
+            INSERT IGNORE INTO `{table_name}` ({', '.join(f'`{column}`' for column in columns)})
+            VALUES ({', '.join(['%s' for _ in columns])})
+        """
+    else:
+        # The SQLite connections of db.Database are in WAL mode with synchronous=NORMAL
+        insert_sql = f"""
+            INSERT INTO "{table_name}" ({', '.join(f'"{column}"' for column in columns)})
+            VALUES ({', '.join(['?' for _ in columns])})
+            ON CONFLICT DO NOTHING
+        """
 
+    # Missing values (NaN) are stored as NULL
+    records = df.astype(object).where(pd.notna(df), None).values.tolist()
+    batch_size = config.get("insert_batch_size", 500)
+    cursor = conn.cursor()
+    inserted = 0
+    try:
+        for start in range(0, len(records), batch_size):
+            cursor.executemany(insert_sql, records[start:start + batch_size])
+            inserted += cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted
 
-def create_table(conn, df, table_name):
-    # Create a new table with the data from the DataFrame
-    config = load_config("config.json")
 
-    if config.get("db_type", "sqlite") == "mysql":
-        # MySQL data type mapping
-        type_mapping = {
-            "int64": "INT",
-            "float64": "FLOAT",
-            "datetime64[ns]": "DATETIME",
-            "object": "TEXT",
-            "bool": "TINYINT",
-        }
-
-        # Prepare a string with column names and their types
-        columns_with_types = ", ".join(
-            f"`{column}` {type_mapping[str(df.dtypes[column])]}"
-            for column in df.columns
-        )
+def create_table(conn, df, table_name, config=None):
+    # Create a new table with the data from the DataFrame
+    config = config or load_config("config.json")
 
+    if is_mysql(config):
         # Prepare SQL query to create a new table
         create_table_sql = f"""
             CREATE TABLE IF NOT EXISTS `{table_name}` (
@@ -339,6 +398,7 @@ def create_table(conn, df, table_name):
                 employment_type TEXT,
                 job_function TEXT,
                 industries TEXT,
+                language TEXT,
                 date_loaded TEXT
             );
         """
@@ -350,18 +410,8 @@ def create_table(conn, df, table_name):
         # Commit the transaction
         conn.commit()
 
-        # Insert DataFrame records one by one
-        placeholders = ", ".join(["%s" for _ in df.columns])
-        insert_sql = f"""
-            INSERT INTO `{table_name}` ({', '.join(f'`{column}`' for column in df.columns)})
-            VALUES ({placeholders})
-        """
-
-        for record in df.to_dict(orient="records"):
-            cursor.execute(insert_sql, list(record.values()))
-
-        # Commit the transaction
-        conn.commit()
+        # Columns of the DataFrame that are not part of the fixed schema
+        ensure_columns(conn, table_name, df.columns, config)
     else:
         # SQLite implementation (original code)
         type_mapping = {
@@ -369,11 +419,12 @@ def create_table(conn, df, table_name):
             "float64": "REAL",
             "datetime64[ns]": "TIMESTAMP",
             "object": "TEXT",
+            "str": "TEXT",
             "bool": "INTEGER",
         }
 
         columns_with_types = ", ".join(
-            f'"{column}" {type_mapping[str(df.dtypes[column])]}'
+            f'"{column}" {type_mapping.get(str(df.dtypes[column]), "TEXT")}'
             for column in df.columns
         )
 
@@ -388,272 +439,441 @@ def create_table(conn, df, table_name):
         cursor.execute(create_table_sql)
         conn.commit()
 
-        insert_sql = f"""
-            INSERT INTO "{table_name}" ({', '.join(f'"{column}"' for column in df.columns)})
-            VALUES ({', '.join(['?' for _ in df.columns])})
-        """
-        for record in df.to_dict(orient="records"):
-            cursor.execute(insert_sql, list(record.values()))
-
-        conn.commit()
-
-    print(f"Created the {table_name} table and added {len(df)} records")
+    create_indexes(conn, table_name, config)
+    inserted = insert_records(conn, df, table_name, config)
+    print(f"Created the {table_name} table and added {inserted} records")
+    return inserted
 
 
-def update_table(conn, engine, df, table_name):
-    # Update the existing table with new records.
-    config = load_config("config.json")
+def update_table(conn, df, table_name, config=None):
+    # Update the existing table with new records. Jobs that are already stored are skipped by the unique indexes,
+    # so the cost doesn't depend on the size of the table.
+    config = config or load_config("config.json")
 
-    if config.get("db_type", "sqlite") == "mysql":
-        # Use the provided SQLAlchemy engine
-        
-        # First, check if the table has all required columns
-        cursor = conn.cursor()
-        cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-        existing_columns = [column[0] for column in cursor.fetchall()]
-        
-        # Check for required columns
-        required_columns = ['title', 'company', 'date', 'job_url', 'job_description', 'starred']
-        missing_columns = [col for col in required_columns if col not in existing_columns]
-        
-        # Add any missing columns
-        for col in missing_columns:
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN `{col}` TEXT")
-            print(f"Added missing column {col} to {table_name} table")
-        
-        if missing_columns:
-            conn.commit()
-        
-        # Now proceed with the update
-        df_existing = pd.read_sql(f"SELECT * FROM {table_name}", engine)
-
-        # Create a dataframe with unique records in df that are not in df_existing
-        if not df_existing.empty and 'title' in df_existing.columns and 'company' in df_existing.columns and 'date' in df_existing.columns:
-            df_new_records = pd.concat([df, df_existing, df_existing]).drop_duplicates(
-                ["title", "company", "date"], keep=False
-            )
-        else:
-            # If the table is empty or missing key columns, all records are new
-            df_new_records = df
+    # First, check if the table has all required columns
+    required_columns = ['title', 'company', 'date', 'job_url', 'job_description', 'starred']
+    ensure_columns(conn, table_name, required_columns + list(df.columns), config)
+    create_indexes(conn, table_name, config)
 
-        # If there are new records, append them to the existing table
-        if len(df_new_records) > 0:
-            df_new_records.to_sql(table_name, engine, if_exists="append", index=False)
-            print(f"Added {len(df_new_records)} new records to the {table_name} table")
-        else:
-            print(f"No new records to add to the {table_name} table")
+    inserted = insert_records(conn, df, table_name, config)
+    if inserted > 0:
+        print(f"Added {inserted} new records to the {table_name} table")
     else:
-        # Original SQLite implementation
-        df_existing = pd.read_sql(f"SELECT * FROM {table_name}", conn)
-        df_new_records = pd.concat([df, df_existing, df_existing]).drop_duplicates(
-            ["title", "company", "date"], keep=False
-        )
-
-        if len(df_new_records) > 0:
-            df_new_records.to_sql(table_name, conn, if_exists="append", index=False)
-            print(f"Added {len(df_new_records)} new records to the {table_name} table")
-        else:
-            print(f"No new records to add to the {table_name} table")
+        print(f"No new records to add to the {table_name} table")
+    return inserted
 
 
-def table_exists(conn, table_name):
+def table_exists(conn, table_name, config=None):
     # Check if the table already exists in the database
-    config = load_config("config.json")
+    config = config or load_config("config.json")
+    return db.table_exists(conn, table_name, config)
 
-    cur = conn.cursor()
-    if config.get("db_type", "sqlite") == "mysql":
-        cur.execute(
-            f"SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = '{config['database']}' AND table_name = '{table_name}'"
-        )
-    else:
-        cur.execute(
-            f"SELECT count(name) FROM sqlite_master WHERE type='table' AND name='{table_name}'"
-        )
 
-    if cur.fetchone()[0] == 1:
-        # Table exists, now check if it has the required structure
-        if config.get("db_type", "sqlite") == "mysql":
-            try:
-                cur.execute(f"SELECT title, company, date FROM {table_name} LIMIT 1")
-                cur.fetchone()  # Just to execute the query and see if it works
-            except Exception as e:
-                print(f"Table {table_name} exists but has incorrect structure: {e}")
-                # Drop the table so it can be recreated with correct structure
-                cur.execute(f"DROP TABLE {table_name}")
-                conn.commit()
-                return False
-        return True
-    return False
+class KnownJobs:
+    # Keys of the jobs already stored in the database: their URLs and (title, company, date) triples
+    def __init__(self):
+        self.urls = set()
+        self.keys = set()
 
+    def add(self, job):
+        self.urls.add(job["job_url"])
+        self.keys.add((job["title"], job["company"], job["date"]))
 
-def job_exists(df, job):
-    # Check if the job already exists in the dataframe
-    if df.empty:
-        return False
-    # return ((df['title'] == job['title']) & (df['company'] == job['company']) & (df['date'] == job['date'])).any()
-    # The job exists if there's already a job in the database that has the same URL
-    return (df["job_url"] == job["job_url"]).any() | (
-        (
-            (df["title"] == job["title"])
-            & (df["company"] == job["company"])
-            & (df["date"] == job["date"])
-        ).any()
-    )
+    def __contains__(self, job):
+        return (
+            job["job_url"] in self.urls
+            or (job["title"], job["company"], job["date"]) in self.keys
+        )
 
+    def __len__(self):
+        return len(self.urls)
 
-def get_jobcards(config):
-    # Function to get the job cards from the search results page
-    all_jobs = []
-    for k in range(0, config["rounds"]):
-        for query in config["search_queries"]:
-            keywords = quote(query["keywords"])  # URL encode the keywords
-            location = quote(query["location"])  # URL encode the location
-            for i in range(0, config["pages_to_scrape"]):
-                url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keywords}&location={location}&f_TPR=&f_WT={query['f_WT']}&geoId=&f_TPR={config['timespan']}&start={config['jobs_per_page']*i}"
-                soup = get_with_retry(url, config)
-                jobs = transform(soup)
-                num_jobs = len(jobs)
-                all_jobs = all_jobs + jobs
-                print("Finished scraping page: ", url, f"with {num_jobs} jobs")
-                if num_jobs == 0:
-                    print("No more jobs found, stopping scraping.")
-                    break
-    print("Total job cards scraped: ", len(all_jobs))
-    all_jobs = remove_duplicates(all_jobs, config)
-    print("Total job cards after removing duplicates: ", len(all_jobs))
-    all_jobs = remove_irrelevant_jobs(all_jobs, config)
-    print("Total job cards after removing irrelevant jobs: ", len(all_jobs))
-    return all_jobs
-
-
-def find_new_jobs(all_jobs, conn, engine, config):
-    # From all_jobs, find the jobs that are not already in the database. Function checks both the jobs and filtered_jobs tables.
-    jobs_tablename = config["jobs_tablename"]
-    filtered_jobs_tablename = config["filtered_jobs_tablename"]
-    jobs_db = pd.DataFrame()
-    filtered_jobs_db = pd.DataFrame()
-    if conn is not None and engine is not None:
-        if table_exists(conn, jobs_tablename):
-            query = f"SELECT * FROM {jobs_tablename}"
-            jobs_db = pd.read_sql_query(query, engine)
-        if table_exists(conn, filtered_jobs_tablename):
-            query = f"SELECT * FROM {filtered_jobs_tablename}"
-            filtered_jobs_db = pd.read_sql_query(query, engine)
-
-    new_joblist = [
-        job
-        for job in all_jobs
-        if not job_exists(jobs_db, job) and not job_exists(filtered_jobs_db, job)
-    ]
-    return new_joblist
 
+def load_known_jobs(conn, table_name, config, known):
+    # Stream only the key columns of the table into the known jobs sets
+    if is_mysql(config):
+        # Unbuffered cursor, so the rows are not all held in memory at once
+        cur = conn.cursor(pymysql.cursors.SSCursor)
+    else:
+        cur = conn.cursor()
+    cur.execute(f"SELECT job_url, title, company, date FROM {table_name}")
+    while True:
+        rows = cur.fetchmany(10000)
+        if not rows:
+            break
+        for job_url, title, company, date in rows:
+            known.urls.add(job_url)
+            known.keys.add((title, company, date))
+    cur.close()
+    return known
+
+
+def build_search_url(query, config, page):
+    # Build the guest search API URL for the given query and page number
+    keywords = quote(query["keywords"])  # URL encode the keywords
+    location = quote(query["location"])  # URL encode the location
+    url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keywords}&location={location}&f_TPR=&f_WT={query['f_WT']}&geoId=&f_TPR={config['timespan']}&start={config['jobs_per_page']*page}"
+    if config.get("incremental", False):
+        # Newest postings first, so that the pages after the first page of known postings are known as well
+        url += "&sortBy=DD"
+    return url
+
+
+def iter_query_pages(query, config, start_page=0, is_skipped=None):
+    # Scrape the search result pages of a single query and yield the page number and the job cards of each page,
+    # stopping at the first page without job cards, or at the first page made only of cards for which is_skipped is True.
+    # If a page can't be fetched, its job cards are None and the query stops there.
+    for i in range(start_page, config["pages_to_scrape"]):
+        url = build_search_url(query, config, i)
+        content = fetch_with_retry(url, config)
+        if content is None:
+            print("Could not fetch page: ", url, "stopping this query")
+            yield i, None
+            break
+        page_jobs = parse_cards(content, config)
+        num_jobs = len(page_jobs)
+        print("Finished scraping page: ", url, f"with {num_jobs} jobs")
+        yield i, page_jobs
+        if num_jobs == 0:
+            print("No more jobs found, stopping scraping.")
+            break
+        if is_skipped is not None and all(is_skipped(job) for job in page_jobs):
+            print("Only known or old jobs on this page, stopping scraping.")
+            break
+
+
+def get_search_tasks(config, queries=None):
+    # The search queries to scrape, once per round, with a key identifying the query within the run
+    queries = config["search_queries"] if queries is None else queries
+    return [
+        (f"{k}:{i}", query)
+        for k in range(0, config["rounds"])
+        for i, query in enumerate(queries)
+    ]
 
-def main(config_file):
-    start_time = tm.perf_counter()
-    job_list = []
 
-    config = load_config(config_file)
-    jobs_tablename = config[
-        "jobs_tablename"
-    ]  # name of the table to store the "approved" jobs
-    filtered_jobs_tablename = config[
-        "filtered_jobs_tablename"
-    ]  # name of the table to store the jobs that have been filtered out based on description keywords (so that in future they are not scraped again)
-    # Scrape search results page and get job cards. This step might take a while based on the number of pages and search queries.
-    all_jobs = get_jobcards(config)
-    conn, engine = create_connection(config)
-    # filtering out jobs that are already in the database
-    all_jobs = find_new_jobs(all_jobs, conn, engine, config)
-    print("Total new jobs found after comparing to the database: ", len(all_jobs))
-
-    if len(all_jobs) > 0:
-
-        for job in all_jobs:
-            job_date = convert_date_format(job["date"])
-            job_date = datetime.combine(job_date, time())
-            # if job is older than a week, skip it
-            if job_date < datetime.now() - timedelta(days=config["days_to_scrape"]):
-                print(
-                    "Skipping job: ",
-                    job["title"],
-                    "at",
-                    job["company"], job["job_url"],
-                    "because it is older than",
-                    config["days_to_scrape"],
-                    "days",
+def iter_jobcards(config, queries=None, run=None, known=None, watermarks=None):
+    # Yield the job cards page by page while the search queries are scraped concurrently (at most max_workers in flight).
+    # Every query hands its pages over a bounded queue of its own, so the scrapers wait when the rest of the pipeline
+    # falls behind, and the queries are consumed in order: the cards come out as if the queries were scraped one after
+    # the other, and of two duplicate cards the one of the earlier query is always seen first.
+    # With a run state, finished queries are skipped, the others continue from their next page, and the progress
+    # is recorded once all the cards of a page have been consumed.
+    # With the known jobs (and the query watermarks), a query stops at the first page with only jobs seen by earlier runs,
+    # and the watermarks are raised with the consumed pages. Only the first round stops early: the later rounds of the run
+    # would otherwise stop at their first page, made of the jobs found by the first round.
+    stop = threading.Event()
+    cutoff = get_date_cutoff(config)
+
+    def scrape(query_key, query, pages):
+        # Puts the (page, cards) of the query, then (None, None) once the query is finished, and always None at the end
+        try:
+            start_page = run.start_page(query_key) if run is not None else 0
+            if start_page is None:
+                return
+
+            def is_skipped(job):
+                # Results are sorted newest first, so the pages after a page of known or old jobs hold known or old jobs too
+                return (
+                    job in known
+                    or is_too_old(job, cutoff)
+                    or (watermarks is not None and watermarks.is_seen(query, job))
                 )
-                continue
-            print(
-                "Found new job: ", job["title"], "at ", job["company"], job["job_url"]
-            )
-            desc_soup = get_with_retry(job["job_url"], config)
-            job_data = transform_job(desc_soup)
-            
-            # Add job description
-            job["job_description"] = job_data["description"]
-            
-            # Add job criteria if available
-            criteria = job_data["criteria"]
-            if "seniority_level" in criteria:
-                job["seniority_level"] = criteria["seniority_level"]
-            if "employment_type" in criteria:
-                job["employment_type"] = criteria["employment_type"]
-            if "job_function" in criteria:
-                job["job_function"] = criteria["job_function"]
-            if "industries" in criteria:
-                job["industries"] = criteria["industries"]
-            
-            language = safe_detect(job["job_description"])
-            if language not in config["languages"]:
-                print("Job description language not supported: ", language)
-                # continue
-            job_list.append(job)
-        # Final check - removing jobs based on job description keywords words from the config file
-        jobs_to_add = remove_irrelevant_jobs(job_list, config)
-        print("Total jobs to add: ", len(jobs_to_add))
-        # Create a list for jobs removed based on job description keywords - they will be added to the filtered_jobs table
-        filtered_list = [job for job in job_list if job not in jobs_to_add]
-        df = pd.DataFrame(jobs_to_add)
-        df_filtered = pd.DataFrame(filtered_list)
-        
-        # Ensure starred column exists
-        if 'starred' not in df.columns:
-            df['starred'] = 0
-        if 'starred' not in df_filtered.columns:
-            df_filtered['starred'] = 0
-            
-        df["date_loaded"] = datetime.now()
-        df_filtered["date_loaded"] = datetime.now()
-        df["date_loaded"] = df["date_loaded"].astype(str)
-        df_filtered["date_loaded"] = df_filtered["date_loaded"].astype(str)
-
-        if conn is not None:
-            # Update or Create the database table for the job list
-            if table_exists(conn, jobs_tablename):
-                update_table(conn, engine, df, jobs_tablename)
-            else:
-                create_table(conn, df, jobs_tablename)
 
-            # Update or Create the database table for the filtered out jobs
-            if table_exists(conn, filtered_jobs_tablename):
-                update_table(conn, engine, df_filtered, filtered_jobs_tablename)
+            first_round = query_key.split(":", 1)[0] == "0"
+            for page, page_jobs in iter_query_pages(
+                query, config, start_page, is_skipped if known is not None and first_round else None
+            ):
+                if page_jobs is None:
+                    # The query is left unfinished, a resumed run continues from this page
+                    return
+                if stop.is_set() or not put_unless_stopped(pages, (page, page_jobs), stop):
+                    return
+            put_unless_stopped(pages, (None, None), stop)
+        finally:
+            put_unless_stopped(pages, None, stop)
+
+    tasks = [
+        (query_key, query, queue.Queue(maxsize=config.get("card_queue_size", 16)))
+        for query_key, query in get_search_tasks(config, queries)
+    ]
+    # Started in order, so the query being consumed is always running or done
+    executor = ThreadPoolExecutor(max_workers=config.get("max_workers", 4))
+    futures = [executor.submit(scrape, query_key, query, pages) for query_key, query, pages in tasks]
+    try:
+        for query_key, query, pages in tasks:
+            while True:
+                item = pages.get()
+                if item is None:
+                    break
+                page, page_jobs = item
+                if page is not None:
+                    yield from page_jobs
+                    if watermarks is not None:
+                        watermarks.observe(query, page_jobs)
+                if run is not None:
+                    if page is None:
+                        run.query_done(query_key)
+                    else:
+                        run.page_done(query_key, page)
+    finally:
+        stop.set()
+        # The queries that haven't started are dropped, the running ones stop at their next page
+        executor.shutdown(wait=False, cancel_futures=True)
+    # Raise the errors of the scraping threads
+    for future in futures:
+        future.result()
+
+
+def get_known_jobs(conn, config):
+    # Load the keys of the jobs stored in the jobs and filtered_jobs tables
+    known = KnownJobs()
+    if conn is not None:
+        for table_name in [config["jobs_tablename"], config["filtered_jobs_tablename"]]:
+            if table_exists(conn, table_name, config):
+                load_known_jobs(conn, table_name, config, known)
+    return known
+
+
+class JobSink:
+    # Writes jobs to a database table (and a CSV file, unless csv_file is None) in batches of db_batch_size jobs
+    # as they come in, so a crash only loses the current batch. The written jobs are added to the near-duplicate
+    # index, if there is one.
+    def __init__(self, conn, table_name, csv_file, config, columns=JOB_COLUMNS, near_duplicates=None):
+        self.conn = conn
+        self.table_name = table_name
+        self.csv_file = csv_file
+        self.config = config
+        self.columns = columns
+        self.near_duplicates = near_duplicates
+        self.batch_size = config.get("db_batch_size", 25)
+        self.batch = []
+        self.csv_started = False
+        self.written = 0
+
+    def add(self, job):
+        self.batch.append(job)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        # Fixed columns, so that every batch has the same layout
+        df = pd.DataFrame(self.batch).reindex(columns=self.columns)
+        df["date_loaded"] = str(datetime.now())
+
+        if self.conn is not None:
+            # Update or Create the database table
+            if table_exists(self.conn, self.table_name, self.config):
+                inserted = update_table(self.conn, df, self.table_name, self.config)
             else:
-                create_table(conn, df_filtered, filtered_jobs_tablename)
+                try:
+                    inserted = create_table(self.conn, df, self.table_name, self.config)
+                except Exception:
+                    # Another process (see workers.py) created the table in the meantime
+                    self.conn.rollback()
+                    if not table_exists(self.conn, self.table_name, self.config):
+                        raise
+                    inserted = update_table(self.conn, df, self.table_name, self.config)
+            if inserted > 0:
+                # Let the web app rebuild its cached job lists
+                db.bump_data_version(self.conn, self.config)
+            if self.near_duplicates is not None:
+                for job in self.batch:
+                    self.near_duplicates.add(job)
+                self.near_duplicates.save()
         else:
             print("Error! cannot create the database connection.")
 
-        df.to_csv("linkedin_jobs.csv", index=False, encoding="utf-8")
-        df_filtered.to_csv("linkedin_jobs_filtered.csv", index=False, encoding="utf-8")
-    else:
-        print("No jobs found")
+        if self.csv_file is not None:
+            df.to_csv(
+                self.csv_file,
+                mode="a" if self.csv_started else "w",
+                header=not self.csv_started,
+                index=False,
+                encoding="utf-8",
+            )
+            self.csv_started = True
+        self.written += len(self.batch)
+        self.batch = []
+
+
+def run_pipeline(
+    config, conn, queries=None, job_filter=None, known=None, run=None, watermarks=None, near_duplicates=None
+):
+    # Stream the jobs from the search pages to the database:
+    # cards -> card filters (date, title, location, company) -> dedup -> new jobs only -> near-duplicate cards
+    # -> describe -> description filters and near-duplicate descriptions -> sink.
+    # Every card rejected before the describe stage saves a request.
+    # Only the keys of the jobs seen so far are kept in memory, the jobs themselves are written in small batches.
+    # With a run state (see run_state.py), the progress is checkpointed every time a batch is written.
+    # In incremental mode, the queries stop at the first page of jobs seen by earlier runs.
+    stats = Counter()
+    job_filter = job_filter if job_filter is not None else JobFilter(config)
+    known = known if known is not None else get_known_jobs(conn, config)
+    incremental = config.get("incremental", False)
+    if incremental and watermarks is None and conn is not None:
+        watermarks = QueryWatermarks.load(conn, config)
+    if near_duplicates is None and conn is not None and config.get("near_duplicates", True):
+        near_duplicates = NearDuplicates.load(conn, config)
+    seen = set()
+
+    def new_cards():
+        if run is not None:
+            # Jobs of the interrupted run that were still waiting for their description
+            for job in run.pending_jobs():
+                seen.add((job["title"], job["company"]))
+                if job in known:
+                    run.set_job_status(job, DONE)
+                    continue
+                stats["resumed"] += 1
+                yield job
+        for job in iter_jobcards(
+            config,
+            queries,
+            run,
+            known if incremental else None,
+            watermarks if incremental else None,
+        ):
+            stats["cards"] += 1
+            # Stale or irrelevant postings cost neither a database lookup nor a description request
+            reason = job_filter.card_rejection_reason(job)
+            if reason is not None:
+                stats["rejected card: " + reason] += 1
+                continue
+            key = (job["title"], job["company"])
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+            if job in known:
+                stats["known"] += 1
+                continue
+            # The same role reposted with a slightly different title, possibly found by another query:
+            # its description is not fetched, the card goes straight to the filtered jobs
+            if near_duplicates is not None and near_duplicates.match_card(job) is not None:
+                stats["near duplicates"] += 1
+                job["filter_reason"] = "near_duplicate_card"
+            if run is not None:
+                run.set_job_status(job, PENDING)
+            yield job
+
+    def on_failed(job):
+        if run is not None:
+            run.set_job_status(job, FAILED)
+
+    def checkpoint():
+        jobs_sink.flush()
+        filtered_sink.flush()
+        if run is not None:
+            run.flush()
+
+    # name of the table to store the "approved" jobs
+    jobs_sink = JobSink(conn, config["jobs_tablename"], "linkedin_jobs.csv", config, near_duplicates=near_duplicates)
+    # name of the table to store the jobs that have been filtered out based on description keywords (so that in future they are not scraped again)
+    filtered_sink = JobSink(
+        conn,
+        config["filtered_jobs_tablename"],
+        "linkedin_jobs_filtered.csv",
+        config,
+        FILTERED_JOB_COLUMNS,
+        near_duplicates,
+    )
+    processed = 0
+    try:
+        for job in iter_job_descriptions(new_cards(), config, stats, on_failed):
+            # Final check - removing jobs based on job description keywords words from the config file
+            reason = job.get("filter_reason") or job_filter.description_rejection_reason(job)
+            if reason is None and near_duplicates is not None and near_duplicates.match_description(job) is not None:
+                # Same description as a stored job, e.g. reposted by a staffing agency
+                reason = "near_duplicate"
+            if reason is None:
+                jobs_sink.add(job)
+            else:
+                stats["filtered: " + reason] += 1
+                job["filter_reason"] = reason
+                filtered_sink.add(job)
+            known.add(job)
+            if run is not None:
+                run.set_job_status(job, DONE)
+            processed += 1
+            if processed % jobs_sink.batch_size == 0:
+                checkpoint()
+    finally:
+        checkpoint()
+    if run is not None:
+        run.finish()
+    if watermarks is not None and incremental:
+        watermarks.save()
+
+    stats["added"] = jobs_sink.written
+    stats["filtered"] = filtered_sink.written
+    print_run_summary(stats)
+    return stats
+
+
+def print_run_summary(stats):
+    if stats["resumed"]:
+        print("Jobs resumed from the interrupted run: ", stats["resumed"])
+    print("Total job cards scraped: ", stats["cards"])
+    rejected_cards = 0
+    for key, count in sorted(stats.items()):
+        if key.startswith("rejected card: "):
+            print("Job cards rejected by", key[len("rejected card: "):], count)
+            rejected_cards += count
+    print("Duplicate job cards: ", stats["duplicates"])
+    print("Job cards already in the database: ", stats["known"])
+    print("Near-duplicate job cards: ", stats["near duplicates"])
+    print(
+        "Description fetches avoided: ",
+        rejected_cards + stats["duplicates"] + stats["known"] + stats["near duplicates"],
+        "of",
+        stats["cards"],
+    )
+    print("Job descriptions fetched: ", stats["described"], "failed: ", stats["failed"])
+    print("Total jobs added: ", stats["added"])
+    print("Total jobs filtered out: ", stats["filtered"])
+    for key, count in sorted(stats.items()):
+        if key.startswith("filtered: "):
+            print("  ", key[len("filtered: "):], count)
+
 
+def main(config_file, resume=False):
+    start_time = tm.perf_counter()
+
+    config = load_config(config_file)
+    conn, _ = create_connection(config)
+    # Record the progress of the run, so that it can be resumed if it gets interrupted
+    run = RunState.start(conn, config, resume) if conn is not None else None
+    # Scrape the search results pages and process the job cards as they come in. This step might take a while based on the number of pages and search queries.
+    run_pipeline(config, conn, run=run)
+
+    close_session()
+    close_parse_pool()
+    close_databases()
     end_time = tm.perf_counter()
     print(f"Scraping finished in {end_time - start_time:.2f} seconds")
 
 
 if __name__ == "__main__":
-    config_file = "config.json"  # default config file
-    if len(sys.argv) == 2:
-        config_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Scrape LinkedIn job postings")
+    parser.add_argument("config_file", nargs="?", default="config.json")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the last interrupted run instead of starting from the first page of every query",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and scrape the search queries on a schedule (see daemon.py)",
+    )
+    args = parser.parse_args()
+
+    if args.daemon:
+        from daemon import run_daemon
 
-    main(config_file)
+        run_daemon(args.config_file)
+    else:
+        main(args.config_file, args.resume)
@@ -0,0 +1,275 @@
+import re
+import threading
+import zlib
+from array import array
+from random import Random
+import pymysql
+from db import is_mysql, table_exists
+from parsers import MISSING_DESCRIPTION
+
+# MinHash signatures have NUM_PERM values, split into BANDS bands of ROWS values for the LSH index.
+# Two jobs with a Jaccard similarity of 0.8 share a band with a probability of 99.9%, of 0.5 with 64%.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+# Fixed seed, so that the stored signatures stay comparable between runs and processes
+_rng = Random(1)
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(NUM_PERM)]
+
+# Signatures of a job: its title, company and location (known from the card) and its description in its location.
+# Signatures without the location were stored as "card" and "description", they are dropped by load.
+CARD = "card_location"
+DESCRIPTION = "description_location"
+KINDS = (CARD, DESCRIPTION)
+# Shorter descriptions (and the placeholder of the pages that could not be parsed) say too little to compare
+MIN_DESCRIPTION_WORDS = 20
+
+BRACKETS = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+NON_WORDS = re.compile(r"\W+")
+
+
+def normalize(text):
+    # Lowercase words, without punctuation and bracketed remarks such as (m/f/d) or [Remote]
+    return " ".join(NON_WORDS.sub(" ", BRACKETS.sub(" ", (text or "").lower())).split())
+
+
+def card_shingles(job):
+    # Character 3-grams of the title and company, so that small changes to the title keep most of them. Every
+    # shingle is tagged with the location, so that the same role in another city never shares a shingle with it.
+    text = normalize(job["title"]) + " @ " + normalize(job["company"])
+    location = normalize(job.get("location"))
+    return {location + "|" + text[i : i + 3] for i in range(max(1, len(text) - 2))}
+
+
+def description_shingles(text, location=None):
+    # Word 3-grams of the description, tagged with the location like the card shingles. Empty for a missing or
+    # too short description.
+    if text is None or text.strip() == MISSING_DESCRIPTION:
+        return set()
+    words = normalize(text).split()
+    if len(words) < MIN_DESCRIPTION_WORDS:
+        return set()
+    location = normalize(location)
+    return {location + "|" + " ".join(words[i : i + 3]) for i in range(len(words) - 2)}
+
+
+def minhash(shingles):
+    # MinHash signature of a set of shingles, or None for an empty set
+    if not shingles:
+        return None
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    return array("I", [min((a * h + b) % PRIME for h in hashes) & MAX_HASH for a, b in PERMUTATIONS])
+
+
+def description_signature(text, location=None):
+    # MinHash signature of a job description, or None. Computed by the parse workers with the rest of the job page
+    # (see main.parse_job_page), it costs a few milliseconds per description.
+    return minhash(description_shingles(text, location))
+
+
+def similarity(signature, other):
+    # Estimated Jaccard similarity of the shingles behind two signatures
+    return sum(x == y for x, y in zip(signature, other)) / NUM_PERM
+
+
+def band_keys(signature):
+    # One LSH bucket per band: the band number and the hash values of the band
+    return [
+        bytes([band]) + signature[band * ROWS : (band + 1) * ROWS].tobytes()
+        for band in range(BANDS)
+    ]
+
+
+class NearDuplicates:
+    """
+    Near-duplicate detector for job postings, across queries and runs: MinHash signatures of the
+    title, company and location of every job (checked on the cards, before the description is fetched) and
+    of its description (checked once it is fetched, to catch reposts by staffing agencies), with
+    a locality-sensitive hashing index per kind.
+
+    The index only looks at the jobs that share an LSH band with the new one, and a job is a near
+    duplicate if the estimated similarity reaches `near_duplicate_threshold` (cards) or
+    `near_duplicate_description_threshold` (descriptions). Only stored jobs are indexed: `add` is
+    called by main.JobSink once a job is written, so a job whose page could not be fetched or
+    stored never hides a later copy of it. The signatures of the stored jobs are kept in the
+    job_minhash table; `load` rebuilds the index from them (computing the signatures of the
+    stored jobs that have none, once, in batches), and `save` writes the new ones.
+    """
+
+    def __init__(self, conn, config):
+        self.conn = conn
+        self.config = config
+        self.thresholds = {
+            CARD: config.get("near_duplicate_threshold", 0.8),
+            DESCRIPTION: config.get("near_duplicate_description_threshold", 0.8),
+        }
+        self.lock = threading.Lock()
+        # kind -> job url -> signature
+        self.signatures = {CARD: {}, DESCRIPTION: {}}
+        # kind -> band key -> job urls
+        self.buckets = {CARD: {}, DESCRIPTION: {}}
+        # job url -> description signature of the checked jobs, indexed once they are stored
+        self.pending = {}
+        # (job url, kind) of the signatures to write with the next save
+        self.unsaved = []
+
+    @classmethod
+    def load(cls, conn, config):
+        cursor = conn.cursor()
+        if is_mysql(config):
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_minhash (
+                    job_url VARCHAR(255),
+                    kind VARCHAR(16),
+                    signature TEXT,
+                    PRIMARY KEY (job_url, kind)
+                )
+                """
+            )
+        else:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_minhash (
+                    job_url TEXT,
+                    kind TEXT,
+                    signature TEXT,
+                    PRIMARY KEY (job_url, kind)
+                )
+                """
+            )
+        # Signatures of an older kind
+        cursor.execute(
+            "DELETE FROM job_minhash WHERE kind NOT IN (%s)" % ", ".join(f"'{kind}'" for kind in KINDS)
+        )
+        conn.commit()
+        if is_mysql(config):
+            # Unbuffered cursor, so the rows are not all held in memory at once
+            cursor = conn.cursor(pymysql.cursors.SSCursor)
+        index = cls(conn, config)
+        cursor.execute("SELECT job_url, kind, signature FROM job_minhash")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for job_url, kind, signature in rows:
+                if kind in index.signatures:
+                    index.index(kind, job_url, array("I", bytes.fromhex(signature)))
+        cursor.close()
+        index.index_stored_jobs()
+        return index
+
+    def index_stored_jobs(self, batch_size=1000):
+        # Compute the signatures of the stored jobs that have none yet (stored before the job_minhash table existed,
+        # or when near-duplicate detection was off), a batch at a time by id, and save them with every batch.
+        # Once every job has its signatures, this is a single pass over the job ids.
+        placeholder = "%s" if is_mysql(self.config) else "?"
+        for table_name in [self.config["jobs_tablename"], self.config["filtered_jobs_tablename"]]:
+            if not table_exists(self.conn, table_name, self.config):
+                continue
+            sql = f"""
+                SELECT id, job_url, title, company, location, job_description FROM {table_name} j
+                WHERE id > {placeholder} AND job_url IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM job_minhash m WHERE m.job_url = j.job_url AND m.kind = {placeholder}
+                )
+                ORDER BY id LIMIT {batch_size}
+            """
+            last_id, total = 0, 0
+            while True:
+                cursor = self.conn.cursor()
+                cursor.execute(sql, (last_id, CARD))
+                rows = cursor.fetchall()
+                cursor.close()
+                if not rows:
+                    break
+                for _, job_url, title, company, location, description in rows:
+                    job = {"job_url": job_url, "title": title, "company": company, "location": location}
+                    self.pending[job_url] = description_signature(description, location)
+                    self.add(job)
+                self.save()
+                last_id = rows[-1][0]
+                total += len(rows)
+            if total:
+                print(f"Computed the near-duplicate signatures of {total} stored jobs of the {table_name} table")
+
+    def index(self, kind, job_url, signature):
+        # Returns False if the job was indexed already
+        with self.lock:
+            if job_url in self.signatures[kind]:
+                return False
+            self.signatures[kind][job_url] = signature
+            buckets = self.buckets[kind]
+            for key in band_keys(signature):
+                buckets.setdefault(key, []).append(job_url)
+            return True
+
+    def find(self, kind, signature, job_url=None):
+        # The url of the most similar indexed job (other than job_url) above the threshold, or None
+        best, best_similarity = None, self.thresholds[kind]
+        with self.lock:
+            signatures = self.signatures[kind]
+            buckets = self.buckets[kind]
+            candidates = {url for key in band_keys(signature) for url in buckets.get(key, ())}
+            candidates.discard(job_url)
+            for url in candidates:
+                score = similarity(signature, signatures[url])
+                if score >= best_similarity:
+                    best, best_similarity = url, score
+        return best
+
+    def match_card(self, job):
+        # Near duplicate of the card among the stored jobs
+        signature = minhash(card_shingles(job))
+        if signature is None:
+            return None
+        return self.find(CARD, signature, job["job_url"])
+
+    def match_description(self, job):
+        # Near duplicate of the job description among the stored jobs in the same location. Uses (and removes)
+        # the signature computed with the job page, if there is one, and keeps it for add.
+        if "description_minhash" in job:
+            signature = job.pop("description_minhash")
+        else:
+            signature = description_signature(job["job_description"], job.get("location"))
+        if signature is None:
+            return None
+        match = self.find(DESCRIPTION, signature, job["job_url"])
+        if match is None:
+            with self.lock:
+                self.pending[job["job_url"]] = signature
+        return match
+
+    def add(self, job):
+        # Index the signatures of a stored job, and record them to be written by the next save
+        with self.lock:
+            description = self.pending.pop(job["job_url"], None)
+        for kind, signature in [(CARD, minhash(card_shingles(job))), (DESCRIPTION, description)]:
+            if signature is not None and self.index(kind, job["job_url"], signature):
+                with self.lock:
+                    self.unsaved.append((job["job_url"], kind))
+
+    def save(self):
+        # Write the signatures of the jobs stored since the last save
+        with self.lock:
+            rows = [
+                (job_url, kind, self.signatures[kind][job_url].tobytes().hex())
+                for job_url, kind in self.unsaved
+            ]
+            self.unsaved = []
+        if not rows:
+            return
+        if is_mysql(self.config):
+            sql = """
+                INSERT INTO job_minhash (job_url, kind, signature) VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE signature = VALUES(signature)
+            """
+        else:
+            sql = """
+                INSERT INTO job_minhash (job_url, kind, signature) VALUES (?, ?, ?)
+                ON CONFLICT (job_url, kind) DO UPDATE SET signature = excluded.signature
+            """
+        cursor = self.conn.cursor()
+        cursor.executemany(sql, rows)
+        self.conn.commit()
@@ -0,0 +1,420 @@
+import re
+from bs4 import BeautifulSoup, SoupStrainer, NavigableString, Tag
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+try:
+    import lxml
+except ImportError:
+    lxml = None
+
+
+# Supported values of the "html_parser" config option
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+# Description of the job pages without one
+MISSING_DESCRIPTION = "Could not find Job Description"
+
+_warned = set()
+
+
+def has_class(*names):
+    # Match a class attribute containing one of the names. While parsing, strainers see the raw
+    # attribute string rather than the list of classes.
+    def match(value):
+        if value is None:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return any(name in classes for name in names)
+
+    return match
+
+
+# Only build the parts of the page we extract data from: the job cards of a search results page
+# (the elements carrying the job posting URN, which wrap the base-search-card__info divs) and the
+# description and criteria list of a job page.
+CARD_STRAINER = SoupStrainer(attrs={"data-entity-urn": True})
+JOB_STRAINER = SoupStrainer(
+    class_=has_class("description__text", "description__job-criteria-list")
+)
+
+
+def get_parser_backend(config):
+    # Return the configured parser backend, falling back to html.parser if it is not available
+    backend = config.get("html_parser", "html.parser")
+    if backend not in PARSER_BACKENDS:
+        fallback = f"Unknown html_parser {backend}, using html.parser"
+    elif backend == "selectolax" and HTMLParser is None:
+        fallback = "selectolax is not installed, using html.parser"
+    elif backend == "lxml" and lxml is None:
+        fallback = "lxml is not installed, using html.parser"
+    else:
+        return backend
+    if fallback not in _warned:
+        _warned.add(fallback)
+        print(fallback)
+    return "html.parser"
+
+
+def make_soup(content, backend="html.parser", parse_only=None):
+    # Build a beautiful soup object with the html.parser or lxml tree builder
+    features = "lxml" if backend == "lxml" else "html.parser"
+    return BeautifulSoup(content, features, parse_only=parse_only)
+
+
+def make_job_card(title, company, location, date, job_posting_id):
+    # Build the job dictionary stored for every job card
+    return {
+        "title": title,
+        "company": company,
+        "location": location,
+        "date": date,
+        "job_url": "https://www.linkedin.com/jobs/view/" + job_posting_id + "/",
+        "job_description": "",
+        "applied": 0,
+        "hidden": 0,
+        "interview": 0,
+        "rejected": 0,
+        "starred": 0,
+    }
+
+
+def criteria_key(header):
+    # Turn a job criteria header like "Seniority level" into a column name like "seniority_level"
+    return header.strip().lower().replace(" ", "_")
+
+
+WHITESPACE = re.compile(r"\s+")
+BLOCK_TAGS = {"p", "div", "section", "article", "blockquote", "pre", "table", "tr"}
+SKIPPED_TAGS = {"script", "style", "button", "template"}
+
+
+def _node_children(node):
+    # The children of a BeautifulSoup or selectolax node, as ("text", string) or ("tag", name, node) tuples
+    if isinstance(node, Tag):
+        for child in node.children:
+            if isinstance(child, Tag):
+                yield "tag", child.name, child
+            elif type(child) is NavigableString:
+                yield "text", str(child), None
+    else:
+        for child in node.iter(include_text=True):
+            if child.tag == "-text":
+                yield "text", child.text(deep=False), None
+            elif not child.tag.startswith("-"):
+                yield "tag", child.tag, child
+
+
+def _node_attribute(node, name):
+    if isinstance(node, Tag):
+        return node.get(name)
+    return node.attributes.get(name)
+
+
+class MarkdownWriter:
+    """
+    Emits Markdown while walking a parsed description node, without serializing it back to HTML:
+    paragraphs and other blocks, line breaks, bold and italic text, links, headings and (nested)
+    bulleted and numbered lists. Other tags are replaced by their content. Whitespace is collapsed
+    like a browser would. Works on BeautifulSoup and selectolax nodes.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.indent = ""
+        # True right after a list item marker
+        self.item_start = False
+
+    def _last_char(self):
+        return self.parts[-1][-1] if self.parts else "\n"
+
+    def _trailing_newlines(self):
+        tail = "".join(self.parts[-3:])
+        return len(tail) - len(tail.rstrip("\n")) if self.parts else 2
+
+    def write(self, text):
+        # Append text, indented if it starts a line inside a list item
+        if self._last_char() == "\n":
+            text = self.indent + text
+        self.parts.append(text)
+        self.item_start = False
+
+    def text(self, text):
+        text = WHITESPACE.sub(" ", text)
+        if self._last_char() in " \n":
+            text = text.lstrip(" ")
+        if text:
+            self.write(text)
+
+    def newline(self):
+        # Line break, at most one blank line in a row
+        if self.parts:
+            self.parts[-1] = self.parts[-1].rstrip(" ")
+        if self._trailing_newlines() < 2:
+            self.parts.append("\n")
+
+    def block_break(self):
+        # Separate a block from its surroundings: by a blank line, or by a line break inside a list item
+        if not self.indent:
+            self.blank_line()
+        elif not self.item_start:
+            self.newline()
+
+    def blank_line(self):
+        if self.parts:
+            self.parts[-1] = self.parts[-1].rstrip(" ")
+        while self._trailing_newlines() < 2:
+            self.parts.append("\n")
+
+    def inline(self, node, marker_open, marker_close):
+        # Wrap the content of an inline tag in markers, keeping the surrounding spaces outside of them
+        inner = convert_inline(node)
+        if not inner.strip():
+            self.text(inner)
+            return
+        if "\n" in inner.strip():
+            # Blocks inside an inline tag, no markers
+            self.children(node)
+            return
+        if inner[0] == " ":
+            self.text(" ")
+        self.write(marker_open + inner.strip() + marker_close)
+        if inner[-1] == " ":
+            self.parts.append(" ")
+
+    def children(self, node):
+        for kind, name, child in _node_children(node):
+            if kind == "text":
+                self.text(name)
+            else:
+                self.tag(name, child)
+
+    def list(self, node, ordered):
+        if self.indent:
+            if not self.item_start:
+                self.newline()
+        else:
+            self.blank_line()
+        number = 0
+        for kind, name, child in _node_children(node):
+            if kind != "tag" or name != "li":
+                continue
+            number += 1
+            if self._last_char() != "\n":
+                self.newline()
+            marker = f"{number}. " if ordered else "- "
+            self.write(marker)
+            self.item_start = True
+            outer_indent = self.indent
+            self.indent = outer_indent + " " * len(marker)
+            self.children(child)
+            self.indent = outer_indent
+        if self.indent:
+            self.newline()
+        else:
+            self.blank_line()
+
+    def tag(self, name, node):
+        if name in SKIPPED_TAGS:
+            return
+        if name == "br":
+            self.newline()
+        elif name in ("strong", "b"):
+            self.inline(node, "**", "**")
+        elif name in ("em", "i"):
+            self.inline(node, "*", "*")
+        elif name == "a":
+            href = _node_attribute(node, "href")
+            inner = convert_inline(node).strip()
+            if href and inner and not href.startswith("javascript"):
+                if convert_inline(node)[:1] == " ":
+                    self.text(" ")
+                self.write(f"[{inner}]({href})")
+            else:
+                self.children(node)
+        elif name in ("ul", "ol"):
+            self.list(node, ordered=name == "ol")
+        elif name in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.blank_line()
+            self.write("#" * int(name[1]) + " ")
+            self.children(node)
+            self.blank_line()
+        elif name in BLOCK_TAGS:
+            self.block_break()
+            self.children(node)
+            self.block_break()
+        else:
+            self.children(node)
+
+    def markdown(self):
+        markdown_content = "".join(self.parts)
+        # Clean up the markdown
+        markdown_content = markdown_content.replace("::marker", "-")
+        return markdown_content.strip()
+
+
+def convert_inline(node):
+    # Markdown of the content of an inline tag, with the spaces around it kept
+    writer = MarkdownWriter()
+    # Placeholder for the text before the tag, so that a leading space is not dropped
+    writer.parts.append("x")
+    writer.children(node)
+    return "".join(writer.parts)[1:]
+
+
+def description_to_markdown(node):
+    # Convert the parsed description node (BeautifulSoup or selectolax) to Markdown to preserve formatting
+    writer = MarkdownWriter()
+    writer.children(node)
+    return writer.markdown()
+
+
+def transform(soup):
+    # Parsing the job card info (title, company, location, date, job_url) from the beautiful soup object
+    joblist = []
+    try:
+        divs = soup.find_all("div", class_="base-search-card__info")
+    except:
+        print("Empty page, no jobs found")
+        return joblist
+    for item in divs:
+        title = item.find("h3").text.strip()
+        company = item.find("a", class_="hidden-nested-link")
+        location = item.find("span", class_="job-search-card__location")
+        parent_div = item.parent
+        entity_urn = parent_div["data-entity-urn"]
+        job_posting_id = entity_urn.split(":")[-1]
+
+        date_tag_new = item.find("time", class_="job-search-card__listdate--new")
+        date_tag = item.find("time", class_="job-search-card__listdate")
+        date = (
+            date_tag["datetime"]
+            if date_tag
+            else date_tag_new["datetime"] if date_tag_new else ""
+        )
+        job = make_job_card(
+            title,
+            company.text.strip().replace("\n", " ") if company else "",
+            location.text.strip() if location else "",
+            date,
+            job_posting_id,
+        )
+        joblist.append(job)
+    return joblist
+
+
+def transform_job(soup):
+    # Extract job description
+    div = soup.find("div", class_="description__text description__text--rich")
+    job_description = ""
+    if div:
+        # Remove unwanted elements
+        for element in div.find_all(["span"]):
+            element.decompose()
+
+        # Remove "Show less" and "Show more" links
+        for a in div.find_all("a"):
+            if "Show less" in a.text or "Show more" in a.text:
+                a.decompose()
+
+        job_description = description_to_markdown(div)
+    else:
+        job_description = MISSING_DESCRIPTION
+
+    # Extract job criteria (seniority level, employment type, etc.)
+    job_criteria = {}
+    criteria_list = soup.find("ul", class_="description__job-criteria-list")
+
+    if criteria_list:
+        for item in criteria_list.find_all("li", class_="description__job-criteria-item"):
+            header = item.find("h3", class_="description__job-criteria-subheader")
+            text = item.find("span", class_="description__job-criteria-text")
+
+            if header and text:
+                job_criteria[criteria_key(header.text)] = text.text.strip()
+
+    return {
+        "description": job_description,
+        "criteria": job_criteria
+    }
+
+
+def transform_selectolax(tree):
+    # Same as transform, for a selectolax tree
+    joblist = []
+    for item in tree.css("div.base-search-card__info"):
+        title = item.css_first("h3").text().strip()
+        company = item.css_first("a.hidden-nested-link")
+        location = item.css_first("span.job-search-card__location")
+        entity_urn = item.parent.attributes["data-entity-urn"]
+        job_posting_id = entity_urn.split(":")[-1]
+
+        date_tag_new = item.css_first("time.job-search-card__listdate--new")
+        date_tag = item.css_first("time.job-search-card__listdate")
+        date = (
+            date_tag.attributes["datetime"]
+            if date_tag
+            else date_tag_new.attributes["datetime"] if date_tag_new else ""
+        )
+        job = make_job_card(
+            title,
+            company.text().strip().replace("\n", " ") if company else "",
+            location.text().strip() if location else "",
+            date,
+            job_posting_id,
+        )
+        joblist.append(job)
+    return joblist
+
+
+def transform_job_selectolax(tree):
+    # Same as transform_job, for a selectolax tree
+    div = tree.css_first("div.description__text.description__text--rich")
+    if div:
+        for element in div.css("span"):
+            element.decompose()
+        for a in div.css("a"):
+            text = a.text()
+            if "Show less" in text or "Show more" in text:
+                a.decompose()
+        job_description = description_to_markdown(div)
+    else:
+        job_description = MISSING_DESCRIPTION
+
+    job_criteria = {}
+    criteria_list = tree.css_first("ul.description__job-criteria-list")
+    if criteria_list:
+        for item in criteria_list.css("li.description__job-criteria-item"):
+            header = item.css_first("h3.description__job-criteria-subheader")
+            text = item.css_first("span.description__job-criteria-text")
+            if header and text:
+                job_criteria[criteria_key(header.text())] = text.text().strip()
+
+    return {
+        "description": job_description,
+        "criteria": job_criteria
+    }
+
+
+def parse_cards(content, config):
+    # Parse the job cards of a search results page with the configured backend
+    if not content:
+        print("Empty page, no jobs found")
+        return []
+    backend = get_parser_backend(config)
+    if backend == "selectolax":
+        return transform_selectolax(HTMLParser(content))
+    return transform(make_soup(content, backend, CARD_STRAINER))
+
+
+def parse_job(content, config):
+    # Parse the description and criteria of a job page with the configured backend
+    backend = get_parser_backend(config)
+    if backend == "selectolax":
+        return transform_job_selectolax(HTMLParser(content))
+    return transform_job(make_soup(content, backend, JOB_STRAINER))
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time as tm
+import zlib
+from collections import namedtuple
+
+
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "last_modified", "fresh"])
+
+# Default time to live in seconds per URL type. Search pages change quickly, job postings hardly ever.
+DEFAULT_TTL = {
+    "search": 15 * 60,
+    "job": 7 * 24 * 60 * 60,
+    "default": 60 * 60,
+}
+
+
+def url_type(url):
+    # Classify the URL to pick its time to live
+    if "/jobs-guest/jobs/api/seeMoreJobPostings" in url:
+        return "search"
+    if "/jobs/view/" in url:
+        return "job"
+    return "default"
+
+
+class ResponseCache:
+    """
+    On-disk cache of HTTP response bodies, stored in a SQLite database.
+
+    Entries are keyed by the SHA-256 hash of the URL and hold the zlib compressed body together with
+    the ETag and Last-Modified validators, so stale entries can be revalidated with a conditional
+    request. Once the stored bodies exceed `max_size` bytes, the least recently used entries are
+    evicted. The cache can be shared by all worker threads.
+    """
+
+    def __init__(self, path, ttl=None, max_size=256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                body BLOB,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                accessed_at REAL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses(accessed_at)"
+        )
+        self.conn.commit()
+        self.size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        # Return the cached response for the URL (fresh or stale), or None if it is not cached
+        key = self.key(url)
+        now = tm.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.conn.commit()
+        body, etag, last_modified, fetched_at = row
+        fresh = now - fetched_at < self.ttl[url_type(url)]
+        return CachedResponse(zlib.decompress(body), etag, last_modified, fresh)
+
+    def put(self, url, body, etag=None, last_modified=None):
+        # Store the response body, evicting the least recently used entries if the cache is full
+        key = self.key(url)
+        compressed = zlib.compress(body)
+        now = tm.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.size -= row[0]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, compressed, len(compressed), etag, last_modified, now, now),
+            )
+            self.size += len(compressed)
+            if self.size > self.max_size:
+                self._evict()
+            self.conn.commit()
+
+    def refresh(self, url):
+        # The server confirmed the cached response is still valid (HTTP 304)
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE key = ?", (tm.time(), self.key(url))
+            )
+            self.conn.commit()
+
+    def _evict(self):
+        # Drop the least recently used entries until the cache is back to 90% of its size limit
+        target = self.max_size * 0.9
+        rows = self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        )
+        evicted = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            evicted.append((key,))
+            self.size -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def conditional_headers(cached):
+    # Headers revalidating a stale cached response
+    headers = {}
+    if cached is None:
+        return headers
+    if cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    return headers
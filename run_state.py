@@ -0,0 +1,248 @@
+import hashlib
+import json
+import threading
+from datetime import datetime
+from db import is_mysql
+
+
+# Statuses of the jobs of a run. Pending jobs passed the card filters and wait for their description,
+# done jobs are stored (in the jobs or the filtered_jobs table), failed jobs could not be fetched or parsed.
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def create_run_state_tables(conn, config):
+    # Create the tables recording the scrape runs, the pagination cursor of every query of a run and the status of its jobs
+    cursor = conn.cursor()
+    if is_mysql(config):
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS scrape_runs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                started_at TEXT,
+                finished_at TEXT,
+                status VARCHAR(16),
+                queries_key VARCHAR(64)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS scrape_run_queries (
+                run_id INT,
+                query_key VARCHAR(64),
+                next_page INT DEFAULT 0,
+                done INT DEFAULT 0,
+                PRIMARY KEY (run_id, query_key)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS scrape_run_jobs (
+                run_id INT,
+                job_url VARCHAR(255),
+                status VARCHAR(16),
+                card TEXT,
+                PRIMARY KEY (run_id, job_url)
+            )
+            """,
+        ]
+    else:
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS scrape_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT,
+                finished_at TEXT,
+                status TEXT,
+                queries_key TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS scrape_run_queries (
+                run_id INTEGER,
+                query_key TEXT,
+                next_page INTEGER DEFAULT 0,
+                done INTEGER DEFAULT 0,
+                PRIMARY KEY (run_id, query_key)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS scrape_run_jobs (
+                run_id INTEGER,
+                job_url TEXT,
+                status TEXT,
+                card TEXT,
+                PRIMARY KEY (run_id, job_url)
+            )
+            """,
+        ]
+    for statement in statements:
+        cursor.execute(statement)
+    conn.commit()
+
+
+def get_queries_key(config):
+    # Fingerprint of the searches of a run, a run can only be resumed with the same searches
+    searches = {
+        "search_queries": config["search_queries"],
+        "rounds": config["rounds"],
+        "pages_to_scrape": config["pages_to_scrape"],
+    }
+    return hashlib.sha1(json.dumps(searches, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class RunState:
+    """
+    Checkpoint of a scrape run, stored in the scrape_runs, scrape_run_queries and scrape_run_jobs tables.
+
+    The pipeline threads record their progress in memory (the next page of every query, the
+    jobs waiting for their description and the jobs that are done), and `flush` writes it to the
+    database in one transaction. Flushing happens on the main thread, right after the jobs have
+    been written, so the checkpoint never claims more than what is stored. An interrupted run is
+    resumed with `RunState.start(..., resume=True)`: finished queries are skipped, the others
+    continue from their next page, and the pending jobs are fetched again without re-scraping
+    the pages they came from.
+    """
+
+    def __init__(self, conn, config, run_id):
+        self.conn = conn
+        self.config = config
+        self.run_id = run_id
+        self.lock = threading.Lock()
+        # query key -> (next page, done)
+        self.queries = {}
+        # job url -> (status, card)
+        self.jobs = {}
+        self.dirty_queries = set()
+        self.dirty_jobs = set()
+
+    @classmethod
+    def start(cls, conn, config, resume=False):
+        # Resume the last unfinished run with the same searches, or start a new run
+        create_run_state_tables(conn, config)
+        queries_key = get_queries_key(config)
+        placeholder = "%s" if is_mysql(config) else "?"
+        cursor = conn.cursor()
+        if resume:
+            cursor.execute(
+                f"SELECT id FROM scrape_runs WHERE status = 'running' AND queries_key = {placeholder} ORDER BY id DESC LIMIT 1",
+                (queries_key,),
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                run = cls(conn, config, row[0])
+                run.load()
+                print(
+                    f"Resuming scrape run {run.run_id}: {sum(done for _, done in run.queries.values())} queries finished,",
+                    f"{len(run.pending_jobs())} jobs waiting for their description",
+                )
+                return run
+            print("No interrupted scrape run to resume, starting a new run")
+
+        cursor.execute(
+            f"INSERT INTO scrape_runs (started_at, status, queries_key) VALUES ({placeholder}, 'running', {placeholder})",
+            (str(datetime.now()), queries_key),
+        )
+        conn.commit()
+        return cls(conn, config, cursor.lastrowid)
+
+    def load(self):
+        # Load the checkpoint of the run from the database
+        placeholder = "%s" if is_mysql(self.config) else "?"
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT query_key, next_page, done FROM scrape_run_queries WHERE run_id = {placeholder}",
+            (self.run_id,),
+        )
+        for query_key, next_page, done in cursor.fetchall():
+            self.queries[query_key] = (next_page, bool(done))
+        cursor.execute(
+            f"SELECT job_url, status, card FROM scrape_run_jobs WHERE run_id = {placeholder}",
+            (self.run_id,),
+        )
+        for job_url, status, card in cursor.fetchall():
+            self.jobs[job_url] = (status, json.loads(card))
+
+    def start_page(self, query_key):
+        # The page to continue the query from, or None if the query is finished
+        with self.lock:
+            next_page, done = self.queries.get(query_key, (0, False))
+        return None if done else next_page
+
+    def pending_jobs(self):
+        # The jobs that were waiting for their description (or failed) when the run was interrupted
+        with self.lock:
+            return [card for status, card in self.jobs.values() if status != DONE]
+
+    def page_done(self, query_key, page):
+        with self.lock:
+            self.queries[query_key] = (page + 1, False)
+            self.dirty_queries.add(query_key)
+
+    def query_done(self, query_key):
+        with self.lock:
+            next_page, _ = self.queries.get(query_key, (0, False))
+            self.queries[query_key] = (next_page, True)
+            self.dirty_queries.add(query_key)
+
+    def set_job_status(self, job, status):
+        with self.lock:
+            self.jobs[job["job_url"]] = (status, job)
+            self.dirty_jobs.add(job["job_url"])
+
+    def flush(self):
+        # Write the progress recorded since the last flush, in a single transaction
+        with self.lock:
+            queries = [
+                (self.run_id, key, *self.queries[key]) for key in self.dirty_queries
+            ]
+            jobs = [
+                (self.run_id, url, self.jobs[url][0], json.dumps(self.jobs[url][1], default=str))
+                for url in self.dirty_jobs
+            ]
+            self.dirty_queries = set()
+            self.dirty_jobs = set()
+        if not queries and not jobs:
+            return
+
+        if is_mysql(self.config):
+            queries_sql = """
+                INSERT INTO scrape_run_queries (run_id, query_key, next_page, done) VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE next_page = VALUES(next_page), done = VALUES(done)
+            """
+            jobs_sql = """
+                INSERT INTO scrape_run_jobs (run_id, job_url, status, card) VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE status = VALUES(status), card = VALUES(card)
+            """
+        else:
+            queries_sql = """
+                INSERT INTO scrape_run_queries (run_id, query_key, next_page, done) VALUES (?, ?, ?, ?)
+                ON CONFLICT (run_id, query_key) DO UPDATE SET next_page = excluded.next_page, done = excluded.done
+            """
+            jobs_sql = """
+                INSERT INTO scrape_run_jobs (run_id, job_url, status, card) VALUES (?, ?, ?, ?)
+                ON CONFLICT (run_id, job_url) DO UPDATE SET status = excluded.status, card = excluded.card
+            """
+        cursor = self.conn.cursor()
+        try:
+            if queries:
+                cursor.executemany(queries_sql, queries)
+            if jobs:
+                cursor.executemany(jobs_sql, jobs)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def finish(self):
+        # Mark the run as finished and drop its job statuses, they are not needed anymore
+        self.flush()
+        placeholder = "%s" if is_mysql(self.config) else "?"
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"UPDATE scrape_runs SET status = 'finished', finished_at = {placeholder} WHERE id = {placeholder}",
+            (str(datetime.now()), self.run_id),
+        )
+        cursor.execute(
+            f"DELETE FROM scrape_run_jobs WHERE run_id = {placeholder}", (self.run_id,)
+        )
+        self.conn.commit()
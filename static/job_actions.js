@@ -1,5 +1,144 @@
 var selectedJob = null;
 
+// State of the job list, loaded a page at a time from /get_all_jobs
+var jobList = {
+    cursor: null,
+    done: false,
+    loading: false,
+    total: 0,
+    // Incremented when the filters change, so that the responses for the old filters are ignored
+    generation: 0
+};
+var JOB_PAGE_SIZE = 50;
+
+function escapeHtml(text) {
+    var div = document.createElement('div');
+    div.textContent = text === null || text === undefined ? '' : String(text);
+    return div.innerHTML;
+}
+
+// Build the list item of a job, same markup as the rest of the page expects
+function renderJobItem(job) {
+    var item = document.createElement('a');
+    item.className = 'job-item';
+    if (job.rejected === 1) {
+        item.classList.add('job-item-rejected');
+    } else if (job.interview === 1) {
+        item.classList.add('job-item-interview');
+    } else if (job.applied === 1) {
+        item.classList.add('job-item-applied');
+    }
+    if (job.starred === 1) {
+        item.classList.add('job-item-starred');
+    }
+    item.href = '#';
+    item.dataset.jobId = job.id;
+    item.addEventListener('click', function(event) {
+        event.preventDefault();
+        showJobDetails(job.id);
+    });
+    var html = '<div class="job-content">';
+    html += '<h3>' + escapeHtml(job.title) + '</h3>';
+    html += '<p>' + escapeHtml(job.company) + ', ' + escapeHtml(job.location) + '</p>';
+    html += '<p>' + escapeHtml(job.date) + '</p>';
+    html += '</div>';
+    if (job.starred === 1) {
+        html += '<span class="job-star-icon">★</span>';
+    }
+    item.innerHTML = html;
+    return item;
+}
+
+// Query string of the current filters: search text, location and the Toggle Applied button
+function jobListParams() {
+    var params = new URLSearchParams();
+    params.set('limit', JOB_PAGE_SIZE);
+    var searchText = document.getElementById('job-search').value.trim();
+    if (searchText) {
+        params.set('q', searchText);
+    }
+    var locationText = document.getElementById('location-search').value.trim();
+    if (locationText) {
+        params.set('location', locationText);
+    }
+    var toggleButton = document.getElementById('toggle-applied-button');
+    if (toggleButton && toggleButton.classList.contains('active')) {
+        params.set('applied', 0);
+        params.set('interview', 0);
+        params.set('rejected', 0);
+    }
+    return params;
+}
+
+// Load the next page of the job list, or the first page again if reset is true (the filters changed)
+async function loadJobs(reset) {
+    var listDiv = document.getElementById('job-list');
+    if (reset) {
+        jobList.generation++;
+        jobList.cursor = null;
+        jobList.done = false;
+        jobList.loading = false;
+        listDiv.innerHTML = '';
+    }
+    if (jobList.loading || jobList.done) {
+        return;
+    }
+    jobList.loading = true;
+    var generation = jobList.generation;
+    var params = jobListParams();
+    if (jobList.cursor) {
+        params.set('cursor', jobList.cursor);
+    }
+    var statusElement = document.getElementById('job-list-status');
+    statusElement.textContent = 'Loading jobs...';
+
+    try {
+        var response = await fetch('/get_all_jobs?' + params.toString());
+        var data = await response.json();
+        if (generation !== jobList.generation) {
+            return;
+        }
+        if (!response.ok) {
+            statusElement.textContent = data.error || 'Could not load the jobs';
+            jobList.loading = false;
+            return;
+        }
+        data.jobs.forEach(function(job) {
+            listDiv.appendChild(renderJobItem(job));
+        });
+        if (data.total !== undefined) {
+            jobList.total = data.total;
+        }
+        jobList.cursor = data.next_cursor;
+        jobList.done = !data.next_cursor;
+        statusElement.textContent = '';
+        updateJobCount();
+    } catch (error) {
+        console.error('Error loading jobs:', error);
+        if (generation === jobList.generation) {
+            statusElement.textContent = 'Could not load the jobs';
+        }
+    }
+    if (generation !== jobList.generation) {
+        return;
+    }
+    jobList.loading = false;
+
+    // Keep loading until the list can be scrolled
+    var listColumn = listDiv.closest('.column');
+    if (!jobList.done && listColumn.scrollHeight <= listColumn.clientHeight) {
+        loadJobs(false);
+    }
+}
+
+// Load the next page when the list is scrolled close to its end
+function onJobListScroll(event) {
+    var listColumn = event.target;
+    if (listColumn.scrollTop + listColumn.clientHeight >= listColumn.scrollHeight - 300) {
+        loadJobs(false);
+    }
+}
+
 async function showJobDetails(jobId) {
     if (selectedJob !== null) {
         selectedJob.classList.remove('job-item-selected');
@@ -267,8 +406,9 @@ function hideJob(jobId) {
                     showJobDetails(nextJobId);
                 }
                 
-                // Hide the current job
-                jobCard.style.display = 'none'; // Or you can remove it from DOM entirely
+                // Remove the current job from the list
+                jobCard.remove();
+                jobList.total--;
 
                 // If no next job exists, clear the job details div
                 if (!nextJobCard) {
@@ -285,132 +425,45 @@ function hideJob(jobId) {
 // Function to toggle visibility of applied/interview/rejected jobs
 function toggleAppliedJobs() {
     const toggleButton = document.getElementById('toggle-applied-button');
-    const jobItems = document.querySelectorAll('.job-item');
-    
-    // Toggle the active state of the button only if this is a user click
-    // (not the initial page load)
-    if (toggleAppliedJobs.initialCall !== true) {
-        toggleButton.classList.toggle('active');
-    }
-    toggleAppliedJobs.initialCall = false;
-    
-    const hideApplied = toggleButton.classList.contains('active');
-    
-    jobItems.forEach(jobItem => {
-        // Check if the job has been applied to, interviewed for, or rejected
-        const isApplied = jobItem.classList.contains('job-item-applied');
-        const isInterview = jobItem.classList.contains('job-item-interview');
-        const isRejected = jobItem.classList.contains('job-item-rejected');
-        
-        if (hideApplied && (isApplied || isInterview || isRejected)) {
-            jobItem.classList.add('applied-hidden');
-        } else {
-            jobItem.classList.remove('applied-hidden');
-        }
-    });
-    
-    // Update the job count
-    updateJobCount();
+    toggleButton.classList.toggle('active');
+    // The server filters the jobs, load the list again
+    loadJobs(true);
 }
 
 // Function to update the job count
 function updateJobCount() {
     const jobCountElement = document.getElementById('job-count');
     if (jobCountElement) {
-        // Count jobs that are visible (not hidden by any filter)
-        const visibleJobs = document.querySelectorAll('.job-item:not([style*="display: none"]):not(.search-hidden):not(.location-hidden):not(.applied-hidden)').length;
-        jobCountElement.textContent = visibleJobs;
+        // Number of jobs matching the filters, including the pages that are not loaded yet
+        jobCountElement.textContent = jobList.total;
     }
 }
 
-// Function to search jobs by title and description
+// Search and location filters are applied by the server, once the user stops typing
+var reloadJobs = debounce(function() {
+    loadJobs(true);
+}, 300);
+
+// Function to search jobs by title, company and description
 function searchJobs() {
-    const searchText = document.getElementById('job-search').value.toLowerCase();
-    const jobItems = document.querySelectorAll('.job-item');
-    
-    jobItems.forEach(async (jobItem) => {
-        const jobId = jobItem.getAttribute('data-job-id');
-        const jobTitle = jobItem.querySelector('h3').textContent.toLowerCase();
-        const jobCompany = jobItem.querySelector('p').textContent.toLowerCase();
-        
-        // Don't process already hidden jobs
-        if (jobItem.style.display === 'none') {
-            return;
-        }
-        
-        // First check if the search term is in the title or company
-        if (searchText === '' || jobTitle.includes(searchText) || jobCompany.includes(searchText)) {
-            jobItem.classList.remove('search-hidden');
-        } else {
-            // If not found in title/company, fetch job details to check description
-            try {
-                const response = await fetch('/job_details/' + jobId);
-                const jobData = await response.json();
-                const jobDescription = jobData.job_description.toLowerCase();
-                
-                if (jobDescription.includes(searchText)) {
-                    jobItem.classList.remove('search-hidden');
-                } else {
-                    jobItem.classList.add('search-hidden');
-                }
-            } catch (error) {
-                console.error('Error fetching job details:', error);
-            }
-        }
-    });
-    
-    // Update the job count after all async operations are done
-    setTimeout(updateJobCount, 500);
+    reloadJobs();
 }
 
 // Function to clear the search
 function clearSearch() {
     document.getElementById('job-search').value = '';
-    const jobItems = document.querySelectorAll('.job-item');
-    
-    jobItems.forEach(jobItem => {
-        jobItem.classList.remove('search-hidden');
-    });
-    
-    // Update the job count
-    updateJobCount();
+    loadJobs(true);
 }
 
 // Function to filter jobs by location
 function filterByLocation() {
-    const locationText = document.getElementById('location-search').value.toLowerCase();
-    const jobItems = document.querySelectorAll('.job-item');
-    
-    jobItems.forEach(jobItem => {
-        // Don't process already hidden jobs
-        if (jobItem.style.display === 'none') {
-            return;
-        }
-        
-        const jobLocation = jobItem.querySelector('p').textContent.toLowerCase();
-        
-        if (locationText === '' || jobLocation.includes(locationText)) {
-            jobItem.classList.remove('location-hidden');
-        } else {
-            jobItem.classList.add('location-hidden');
-        }
-    });
-    
-    // Update the job count
-    updateJobCount();
+    reloadJobs();
 }
 
 // Function to clear the location filter
 function clearLocationFilter() {
     document.getElementById('location-search').value = '';
-    const jobItems = document.querySelectorAll('.job-item');
-    
-    jobItems.forEach(jobItem => {
-        jobItem.classList.remove('location-hidden');
-    });
-    
-    // Update the job count
-    updateJobCount();
+    loadJobs(true);
 }
 
 
@@ -458,12 +511,13 @@ document.addEventListener('DOMContentLoaded', function() {
         toggleAppliedButton.addEventListener('click', toggleAppliedJobs);
         // Set initial state to active (hide applied jobs by default)
         toggleAppliedButton.classList.add('active');
-        // Mark this as the initial call to prevent toggling the button state
-        toggleAppliedJobs.initialCall = true;
-        // Call toggleAppliedJobs immediately to hide applied jobs on page load
-        setTimeout(() => {
-            toggleAppliedJobs();
-        }, 100);
+    }
+
+    // Load the first page of jobs, and the next ones as the list is scrolled
+    var jobListDiv = document.getElementById('job-list');
+    if (jobListDiv) {
+        jobListDiv.closest('.column').addEventListener('scroll', onJobListScroll);
+        loadJobs(true);
     }
     
     // Resizer functionality for notes section
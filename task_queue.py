@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import time as tm
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class TaskQueue:
+    """
+    Work queue shared by the scraper processes, stored in a SQLite file.
+
+    Tasks have a kind ("search" pages, "job" pages) and a key that is unique per kind, so putting
+    a task twice is a no-op. A worker leases tasks for `lease_seconds`: they are invisible to the
+    other workers until they are completed, failed, or the lease runs out because the worker died,
+    after which they are handed out again. Failed tasks and expired leases count as attempts: the
+    task is retried (failed ones after a delay) up to `max_attempts` times, then marked failed. Every process opens its own connection; leasing runs in an immediate
+    transaction, so a task is never leased by two workers at once.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3, retry_delay=60):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Autocommit mode, transactions are started explicitly
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,
+                worker TEXT,
+                error TEXT,
+                updated_at REAL,
+                UNIQUE (kind, key)
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_kind_status ON tasks (kind, status, available_at)"
+        )
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get("task_queue_path", "task_queue.sqlite"),
+            config.get("task_lease_seconds", 300),
+            config.get("task_max_attempts", 3),
+            config.get("task_retry_delay", 60),
+        )
+
+    def put_many(self, kind, tasks):
+        # Queue (key, payload) tasks, skipping the keys already queued. Returns the number of new tasks.
+        now = tm.time()
+        cursor = self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO tasks (kind, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                [(kind, key, json.dumps(payload), now) for key, payload in tasks],
+            )
+            added = cursor.rowcount
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def put(self, kind, key, payload):
+        return self.put_many(kind, [(key, payload)])
+
+    def lease(self, kind, worker, limit=1):
+        # Lease up to limit tasks of the given kind: queued ones, or leased ones whose lease ran out. An expired lease
+        # counts as a failed attempt (the worker died, maybe because of the task): the task is failed after
+        # max_attempts of them. Returns a list of (task id, payload).
+        now = tm.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            leased = []
+            while len(leased) < limit:
+                rows = self.conn.execute(
+                    """
+                    SELECT id, payload, status, attempts, worker FROM tasks
+                    WHERE kind = ? AND status IN ('queued', 'leased') AND available_at <= ?
+                    ORDER BY id LIMIT ?
+                    """,
+                    (kind, now, limit - len(leased)),
+                ).fetchall()
+                if not rows:
+                    break
+                for task_id, payload, status, attempts, previous_worker in rows:
+                    if status == LEASED:
+                        attempts += 1
+                        if attempts >= self.max_attempts:
+                            self.conn.execute(
+                                "UPDATE tasks SET status = 'failed', attempts = ?, error = ?, updated_at = ? WHERE id = ?",
+                                (attempts, f"lease of {previous_worker} expired", now, task_id),
+                            )
+                            continue
+                    self.conn.execute(
+                        """
+                        UPDATE tasks SET status = 'leased', attempts = ?, worker = ?, available_at = ?, updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (attempts, worker, now + self.lease_seconds, now, task_id),
+                    )
+                    leased.append((task_id, payload))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [(task_id, json.loads(payload)) for task_id, payload in leased]
+
+    def complete(self, task_ids, new_tasks=None):
+        # Mark the tasks as done, and queue their follow-up tasks (kind, key, payload) in the same transaction
+        now = tm.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if new_tasks:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tasks (kind, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                    [(kind, key, json.dumps(payload), now) for kind, key, payload in new_tasks],
+                )
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'done', error = NULL, updated_at = ? WHERE id = ?",
+                [(now, task_id) for task_id in task_ids],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def fail(self, task_id, error):
+        # Count a failed attempt, and queue the task again later unless it used all its attempts
+        now = tm.time()
+        self.conn.execute(
+            """
+            UPDATE tasks SET
+                attempts = attempts + 1,
+                status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END,
+                available_at = ?,
+                error = ?,
+                updated_at = ?
+            WHERE id = ?
+            """,
+            (self.max_attempts, now + self.retry_delay, str(error), now, task_id),
+        )
+
+    def pending(self):
+        # Number of tasks that are queued or being worked on
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('queued', 'leased')"
+        ).fetchone()[0]
+
+    def counts(self):
+        # Number of tasks per kind and status
+        counts = {}
+        for kind, status, count in self.conn.execute(
+            "SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status"
+        ):
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,199 @@
+import base64
+import importlib
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from db import close_databases
+import main
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+  # app.py reads config.json from the working directory when it is imported
+  directory = tmp_path_factory.mktemp("app")
+  db_path = directory / "jobs.db"
+  (directory / "config.json").write_text(json.dumps({"db_type": "sqlite", "db_path": str(db_path)}))
+  conn = sqlite3.connect(db_path)
+  conn.execute(
+    "CREATE TABLE jobs (id INTEGER PRIMARY KEY, title TEXT, company TEXT, location TEXT, date TEXT, job_url TEXT,"
+    " job_description TEXT, applied INTEGER DEFAULT 0, hidden INTEGER DEFAULT 0, interview INTEGER DEFAULT 0,"
+    " rejected INTEGER DEFAULT 0, starred INTEGER DEFAULT 0)"
+  )
+  # 30 jobs over 10 days, every fourth one without a date, every fifth one applied to, every seventh one hidden
+  for i in range(1, 31):
+    conn.execute(
+      "INSERT INTO jobs (id, title, company, location, date, job_url, job_description, applied, hidden)"
+      " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+      (
+        i,
+        "Python Developer" if i % 2 else "Data Engineer",
+        f"Company {i}",
+        "Berlin" if i % 3 else "Amsterdam",
+        None if i % 4 == 0 else f"2024-03-{i % 10 + 1:02d}",
+        f"https://www.linkedin.com/jobs/view/{i}/",
+        "Backend work",
+        int(i % 5 == 0),
+        int(i % 7 == 0),
+      ),
+    )
+  conn.commit()
+  cwd = os.getcwd()
+  os.chdir(directory)
+  try:
+    sys.modules.pop("app", None)
+    module = importlib.import_module("app")
+  finally:
+    os.chdir(cwd)
+  module.verify_db_schema()
+  yield module
+  sys.modules.pop("app", None)
+  close_databases()
+
+
+def expected_ids(app, where, order):
+  rows = app.db.query(f"SELECT id FROM jobs WHERE {where} ORDER BY {order}")
+  return [row["id"] for row in rows]
+
+
+def all_pages(client, query):
+  # Walk the job list page by page, returns the ids, the total and the number of pages
+  ids, total, pages, cursor = [], None, 0, None
+  while True:
+    response = client.get("/get_all_jobs?" + query + (f"&cursor={cursor}" if cursor else ""))
+    assert response.status_code == 200
+    result = response.get_json()
+    if total is None:
+      total = result["total"]
+    else:
+      assert "total" not in result
+    ids += [job["id"] for job in result["jobs"]]
+    pages += 1
+    cursor = result["next_cursor"]
+    if cursor is None:
+      return ids, total, pages
+
+
+def test_keyset_pages_by_date_with_jobs_without_a_date(app):
+  client = app.app.test_client()
+  ids, total, pages = all_pages(client, "limit=4")
+  expected = expected_ids(
+    app, "hidden = 0", "CASE WHEN date IS NULL THEN 1 ELSE 0 END, date DESC, id DESC"
+  )
+  assert ids == expected
+  assert total == len(expected) == 26
+  assert pages == 7
+  job = client.get("/get_all_jobs?limit=1").get_json()["jobs"][0]
+  assert sorted(job) == sorted(app.LIST_COLUMNS)
+
+
+def test_filters_and_sort_by_id(app):
+  client = app.app.test_client()
+  ids, total, _ = all_pages(client, "limit=3&sort=id&applied=0&q=python&location=berl")
+  expected = expected_ids(
+    app, "hidden = 0 AND applied = 0 AND title LIKE '%python%' AND location = 'Berlin'", "id DESC"
+  )
+  assert ids == expected and total == len(expected) > 3
+
+  ids, total, _ = all_pages(client, "hidden=1&sort=id")
+  assert ids == [28, 21, 14, 7] and total == 4
+
+
+def make_cursor(values):
+  return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_invalid_requests(app):
+  client = app.app.test_client()
+  for query in [
+    "sort=title",
+    "limit=ten",
+    "applied=yes",
+    "cursor=not-a-cursor",
+    "cursor=" + make_cursor({"id": 3}),
+    "cursor=" + make_cursor([{"date": "2024-03-01"}, 3]),
+    "cursor=" + make_cursor([["2024-03-01"], 3]),
+    "cursor=" + make_cursor(["2024-03-01", "3"]),
+    "cursor=" + make_cursor([3]),
+    "sort=id&cursor=" + make_cursor(["2024-03-01", 3]),
+    "sort=id&cursor=" + make_cursor([True]),
+  ]:
+    response = client.get("/get_all_jobs?" + query)
+    assert response.status_code == 400, query
+    assert "error" in response.get_json()
+
+
+def test_build_job_list_query(app):
+  sql, params, count_sql, count_params, sort, limit = app.build_job_list_query(
+    {"limit": "1000", "starred": "1", "cursor": make_cursor([None, 12])}
+  )
+  assert (sort, limit) == ("date", app.MAX_PAGE_SIZE)
+  assert count_sql is None
+  assert params == [1, 0, 12]
+  assert "(date IS NULL AND id < ?)" in sql and sql.endswith(f"LIMIT {app.MAX_PAGE_SIZE + 1}")
+
+  sql, params, count_sql, count_params, _, limit = app.build_job_list_query({"limit": "0", "hidden": ""})
+  assert limit == 1 and params == count_params == []
+  assert count_sql == "SELECT COUNT(*) AS total FROM jobs"
+
+
+def test_cached_views_are_revalidated_and_rebuilt_after_edits(app, monkeypatch):
+  client = app.app.test_client()
+  # Read the data version with every request, as the other processes see it after check_interval
+  monkeypatch.setattr(app.view_cache, "check_interval", 0)
+  url = "/job_details/2"
+  before = client.get(url).get_json()
+  try:
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"] and response.cache_control.no_cache
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.data == b""
+    assert client.get(url, headers={"If-Modified-Since": response.headers["Last-Modified"]}).status_code == 304
+
+    # Every edit of the web app changes the response
+    for path, body in [
+      ("/hide_job/2", None),
+      ("/mark_applied/2", None),
+      ("/mark_interview/2", None),
+      ("/mark_rejected/2", None),
+      ("/toggle_star/2", None),
+      ("/save_notes/2", {"notes": "Call back on Monday"}),
+    ]:
+      assert client.post(path, json=body).status_code == 200, path
+      response = client.get(url, headers={"If-None-Match": etag})
+      assert response.status_code == 200, path
+      assert response.headers["ETag"] != etag, path
+      etag = response.headers["ETag"]
+    job = response.get_json()
+    assert (job["hidden"], job["applied"], job["interview"], job["rejected"], job["starred"]) == (1, 1, 1, 1, 1)
+    assert job["notes"] == "Call back on Monday"
+
+    # So do the jobs written by the scraper, through the data version
+    url = "/get_all_jobs?sort=id&limit=5"
+    etag = client.get(url).headers["ETag"]
+    conn = sqlite3.connect(app.config["db_path"])
+    sink = main.JobSink(conn, "jobs", None, app.config)
+    sink.add({
+      "title": "Site Reliability Engineer", "company": "Company 31", "location": "Berlin", "date": "2024-03-11",
+      "job_url": "https://www.linkedin.com/jobs/view/31/", "job_description": "Backend work",
+      "applied": 0, "hidden": 0, "interview": 0, "rejected": 0, "starred": 0,
+    })
+    sink.flush()
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert response.get_json()["jobs"][0]["title"] == "Site Reliability Engineer"
+    conn.close()
+  finally:
+    # Leave the jobs of the other tests as they were
+    app.db.execute("DELETE FROM jobs WHERE id > 30")
+    app.db.execute(
+      "UPDATE jobs SET hidden = ?, applied = ?, interview = ?, rejected = ?, starred = ?, notes = ? WHERE id = 2",
+      (before["hidden"], before["applied"], before["interview"], before["rejected"], before["starred"], before.get("notes")),
+    )
+    app.data_changed()
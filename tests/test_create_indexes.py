@@ -0,0 +1,52 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main
+
+CONFIG = {"db_type": "sqlite"}
+
+
+def test_duplicates_are_merged_before_the_unique_indexes_are_built(capsys):
+  conn = sqlite3.connect(":memory:")
+  conn.execute(
+    "CREATE TABLE jobs (id INTEGER PRIMARY KEY, title TEXT, company TEXT, date TEXT, job_url TEXT,"
+    " applied INTEGER, hidden INTEGER, interview INTEGER, rejected INTEGER, starred INTEGER, notes TEXT, resume TEXT)"
+  )
+  rows = [
+    # The user worked on the later copy of job 1
+    (1, "Python Developer", "Acme", "2024-03-01", "https://www.linkedin.com/jobs/view/1/", 0, 0, 0, 0, 0, None, None),
+    (2, "Python Developer", "Acme", "2024-03-01", "https://www.linkedin.com/jobs/view/2/", 1, 0, 1, 0, 1, "Call Anna", None),
+    (3, "Python Developer", "Acme", "2024-03-01", "https://www.linkedin.com/jobs/view/3/", 0, 0, 0, 0, 0, "Old notes", "Resume"),
+    # Same URL as job 4, and two jobs without a date, which don't collide
+    (4, "Data Engineer", "Globex", "2024-03-02", "https://www.linkedin.com/jobs/view/4/", 0, 0, 0, 1, 0, None, None),
+    (5, "Data Engineer (m/f/d)", "Globex", "2024-03-02", "https://www.linkedin.com/jobs/view/4/", 0, 1, 0, 0, 0, None, None),
+    (6, "QA Engineer", "Initech", None, "https://www.linkedin.com/jobs/view/6/", 0, 0, 0, 0, 0, None, None),
+    (7, "QA Engineer", "Initech", None, "https://www.linkedin.com/jobs/view/7/", 0, 0, 0, 0, 0, None, None),
+  ]
+  conn.executemany(f"INSERT INTO jobs VALUES ({', '.join('?' * 12)})", rows)
+
+  main.create_indexes(conn, "jobs", CONFIG)
+
+  assert conn.execute("SELECT * FROM jobs ORDER BY id").fetchall() == [
+    (1, "Python Developer", "Acme", "2024-03-01", "https://www.linkedin.com/jobs/view/1/", 1, 0, 1, 0, 1, "Call Anna", "Resume"),
+    (4, "Data Engineer", "Globex", "2024-03-02", "https://www.linkedin.com/jobs/view/4/", 0, 1, 0, 1, 0, None, None),
+    rows[5],
+    rows[6],
+  ]
+  assert main.get_index_names(conn, "jobs", CONFIG) >= {"uq_jobs_job_url", "uq_jobs_title_company_date"}
+  output = capsys.readouterr().out
+  assert "Removed duplicates of job 1 (https://www.linkedin.com/jobs/view/1/)" in output
+  assert "2 (https://www.linkedin.com/jobs/view/2/), 3 (https://www.linkedin.com/jobs/view/3/)" in output
+
+
+def test_tables_without_user_columns():
+  conn = sqlite3.connect(":memory:")
+  conn.execute("CREATE TABLE filtered_jobs (id INTEGER PRIMARY KEY, title TEXT, company TEXT, date TEXT, job_url TEXT)")
+  conn.executemany(
+    "INSERT INTO filtered_jobs (title, company, date, job_url) VALUES (?, ?, ?, ?)",
+    [("Python Developer", "Acme", "2024-03-01", "https://www.linkedin.com/jobs/view/1/")] * 2,
+  )
+  main.create_indexes(conn, "filtered_jobs", CONFIG)
+  assert conn.execute("SELECT id FROM filtered_jobs").fetchall() == [(1,)]
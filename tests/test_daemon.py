@@ -0,0 +1,47 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from daemon import Scheduler
+
+QUERIES = [
+  {"keywords": "Python developer", "location": "USA", "f_WT": ""},
+  {"keywords": "Backend engineer", "location": "USA", "f_WT": "", "interval_minutes": 60},
+]
+CONFIG = {"daemon_interval_minutes": 15, "daemon_min_interval_minutes": 5, "daemon_jitter": 0.1}
+
+
+def test_first_runs_are_spread_over_the_jitter():
+  scheduler = Scheduler(QUERIES, CONFIG, random.Random(1))
+  now = min(schedule.next_run for schedule in scheduler.schedules)
+  assert [schedule.interval for schedule in scheduler.schedules] == [900, 3600]
+  assert all(schedule.next_run - now <= 0.1 * 3600 for schedule in scheduler.schedules)
+  assert len(scheduler.due(now + 3600)) == 2
+
+
+def test_productive_queries_run_more_often_and_first():
+  scheduler = Scheduler(QUERIES, dict(CONFIG, daemon_jitter=0), random.Random(1))
+  quiet, productive = scheduler.schedules
+  productive.interval = quiet.interval
+
+  scheduler.record(quiet, 0, 1000.0)
+  scheduler.record(productive, 10, 1000.0)
+
+  assert quiet.next_run == 1000.0 + 900
+  # Shortened by the new jobs it found, but not below the minimum interval
+  assert productive.next_run == 1000.0 + 300
+  assert scheduler.due(1000.0 + 900) == [productive, quiet]
+
+
+def test_failed_runs_keep_the_yield():
+  scheduler = Scheduler(QUERIES[:1], dict(CONFIG, daemon_jitter=0), random.Random(1))
+  schedule = scheduler.schedules[0]
+  scheduler.record(schedule, 2, 0.0)
+  score = schedule.yield_score
+
+  scheduler.record(schedule, 0, 10.0, error=ValueError("proxy down"))
+
+  assert schedule.yield_score == score
+  assert schedule.errors == 1
+  assert schedule.last_error == "proxy down"
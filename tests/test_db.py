@@ -0,0 +1,61 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from db import bump_data_version, close_databases, get_data_version, get_database
+
+
+def make_config(tmp_path):
+  return {"db_type": "sqlite", "db_path": str(tmp_path / "jobs.db")}
+
+
+def test_queries_and_statements(tmp_path):
+  db = get_database(make_config(tmp_path))
+  db.execute("CREATE TABLE jobs (id INTEGER PRIMARY KEY, title TEXT, starred INTEGER)")
+  db.execute("INSERT INTO jobs (title, starred) VALUES (?, ?)", ("Python Developer?", 0))
+  assert db.execute("UPDATE jobs SET starred = 1 WHERE id = ?", (1,)) == 1
+
+  assert db.query("SELECT * FROM jobs") == [{"id": 1, "title": "Python Developer?", "starred": 1}]
+  assert db.query_one("SELECT title FROM jobs WHERE id = ?", (2,)) is None
+  assert db.query_one("PRAGMA journal_mode") == {"journal_mode": "wal"}
+  close_databases()
+
+
+def test_connections_are_cached_per_thread_and_reused(tmp_path):
+  config = make_config(tmp_path)
+  db = get_database(config)
+  assert get_database(config) is db
+  conn = db.connect()
+  # Closing the connection of the thread keeps it open for the next request
+  conn.close()
+  assert db.connect() is conn
+
+  def request(connections):
+    connections.append(db.connect())
+    db.query("SELECT 1")
+
+  # A thread per request, like the Flask server: one connection at a time is enough
+  connections = []
+  for _ in range(5):
+    thread = threading.Thread(target=request, args=(connections,))
+    thread.start()
+    thread.join()
+  assert len({id(conn) for conn in connections}) == 1
+  assert connections[0] is not conn
+
+  close_databases()
+  assert get_database(config) is not db
+  close_databases()
+
+
+def test_data_version(tmp_path):
+  config = make_config(tmp_path)
+  db = get_database(config)
+  with db.connection() as conn:
+    assert get_data_version(conn, config) == (0, None)
+    bump_data_version(conn, config)
+    bump_data_version(conn, config)
+    version, updated_at = get_data_version(conn, config)
+  assert version == 2 and updated_at > 0
+  close_databases()
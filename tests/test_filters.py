@@ -0,0 +1,200 @@
+import random
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+from langdetect import DetectorFactory
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from filters import JobFilter, get_date_cutoff, is_too_old
+from language import safe_detect
+
+# Words used both in the config and in the generated jobs, including regex metacharacters
+VOCABULARY = [
+  "python", "Developer", "backend", "BE", "engineer", "frontend", "game", "QA/QC",
+  "c++", "node.js", "(remote)", "[hybrid]", "a|b", "Amsterdam", "Den Haag", "Netherlands",
+  "ClickJobs.io", "ISO 9001", "Entry level", "Internship", "Mid-Senior level", "FDA", "",
+]
+
+DESCRIPTIONS = [
+  "We are looking for a Python developer to join our backend team in Amsterdam.",
+  "Wir suchen einen erfahrenen Softwareentwickler für unser Team in Berlin.",
+  "Nous recherchons un développeur Python pour rejoindre notre équipe à Paris.",
+  "",
+]
+
+
+def original_remove_irrelevant_jobs(joblist, config):
+  # The filter before it was compiled, used as the reference
+  new_joblist = [
+    job
+    for job in joblist
+    if not any(
+      word.lower() in job["job_description"].lower()
+      for word in config["desc_words"]
+    )
+  ]
+  for key, field, include in [
+    ("title_exclude", "title", False),
+    ("title_include", "title", True),
+    ("location_exclude", "location", False),
+    ("location_include", "location", True),
+  ]:
+    if len(config[key]) > 0:
+      new_joblist = [
+        job
+        for job in new_joblist
+        if any(word.lower() in job[field].lower() for word in config[key]) == include
+      ]
+  if len(config["languages"]) > 0:
+    new_joblist = [
+      job for job in new_joblist if safe_detect(job["job_description"]) in config["languages"]
+    ]
+  if len(config["company_exclude"]) > 0:
+    new_joblist = [
+      job
+      for job in new_joblist
+      if not any(word.lower() in job["company"].lower() for word in config["company_exclude"])
+    ]
+  if "seniority_exclude" in config and len(config["seniority_exclude"]) > 0:
+    new_joblist = [
+      job
+      for job in new_joblist
+      if "seniority_level" not in job or not any(
+        level.lower() in job["seniority_level"].lower()
+        for level in config["seniority_exclude"]
+      )
+    ]
+  return new_joblist
+
+
+def random_words(rng, max_words):
+  return rng.sample(VOCABULARY, rng.randint(0, max_words))
+
+
+def random_text(rng):
+  words = [rng.choice(VOCABULARY) for _ in range(rng.randint(0, 4))]
+  text = " ".join(words)
+  return text.upper() if rng.random() < 0.2 else text
+
+
+def random_config(rng, languages):
+  config = {
+    "desc_words": random_words(rng, 3),
+    "title_exclude": random_words(rng, 3),
+    "title_include": random_words(rng, 4),
+    "location_exclude": random_words(rng, 2),
+    "location_include": random_words(rng, 2),
+    "company_exclude": random_words(rng, 2),
+    "languages": languages,
+  }
+  if rng.random() < 0.7:
+    config["seniority_exclude"] = random_words(rng, 2)
+  return config
+
+
+def random_job(rng):
+  job = {
+    "title": random_text(rng),
+    "company": random_text(rng),
+    "location": random_text(rng),
+    "job_description": random_text(rng) + " " + rng.choice(DESCRIPTIONS),
+  }
+  if rng.random() < 0.5:
+    job["seniority_level"] = random_text(rng)
+  return job
+
+
+def test_filter_matches_original_implementation():
+  rng = random.Random(42)
+  for _ in range(300):
+    config = random_config(rng, languages=[])
+    jobs = [random_job(rng) for _ in range(20)]
+    assert list(filter(JobFilter(config), jobs)) == original_remove_irrelevant_jobs(jobs, config)
+
+
+def test_filter_matches_original_implementation_with_languages():
+  DetectorFactory.seed = 0
+  rng = random.Random(7)
+  for _ in range(30):
+    config = random_config(rng, languages=rng.choice([["en"], ["de", "fr"]]))
+    jobs = [random_job(rng) for _ in range(10)]
+    assert list(filter(JobFilter(config), jobs)) == original_remove_irrelevant_jobs(jobs, config)
+
+
+def test_split_reports_the_rejecting_rule():
+  config = {
+    "desc_words": ["FDA"],
+    "title_exclude": ["frontend"],
+    "title_include": ["python", "engineer"],
+    "location_exclude": [],
+    "location_include": ["Netherlands"],
+    "company_exclude": ["ClickJobs.io"],
+    "seniority_exclude": ["Internship"],
+    "languages": [],
+  }
+  base = {"title": "Python Engineer", "company": "Acme", "location": "Amsterdam, Netherlands", "job_description": "Build APIs"}
+  jobs = [
+    base,
+    dict(base, title="Frontend Engineer"),
+    dict(base, title="Data Analyst"),
+    dict(base, location="Berlin, Germany"),
+    dict(base, company="clickjobs.io"),
+    dict(base, job_description="Knowledge of fda rules"),
+    dict(base, seniority_level="Internship"),
+  ]
+
+  kept, rejected, reasons = JobFilter(config).split(jobs)
+
+  assert kept == [base]
+  assert len(rejected) == 6
+  assert reasons == {
+    "title_exclude": 1,
+    "title_include": 1,
+    "location_include": 1,
+    "company_exclude": 1,
+    "desc_words": 1,
+    "seniority_exclude": 1,
+  }
+
+
+def test_card_rules_do_not_need_the_description():
+  config = {
+    "days_to_scrape": 7,
+    "desc_words": ["FDA"],
+    "title_exclude": [],
+    "title_include": ["python"],
+    "location_exclude": [],
+    "location_include": [],
+    "company_exclude": [],
+    "seniority_exclude": ["Internship"],
+    "languages": ["de"],
+  }
+  job_filter = JobFilter(config)
+  cutoff = job_filter.date_cutoff()
+  card = {"title": "Python Engineer", "company": "Acme", "location": "Amsterdam", "date": "", "job_description": ""}
+
+  # A card has no description yet, the language and word rules wait for it
+  assert job_filter.card_rejection_reason(card) is None
+  assert job_filter.card_rejection_reason(dict(card, date="2000-01-01")) == "days_to_scrape"
+  assert job_filter.card_rejection_reason(dict(card, date=cutoff)) is None
+  assert job_filter.card_rejection_reason(dict(card, title="Data Analyst")) == "title_include"
+  assert job_filter.description_rejection_reason(dict(card, job_description="Knowledge of FDA rules")) == "desc_words"
+  assert job_filter.description_rejection_reason(dict(card, seniority_level="Internship")) == "seniority_exclude"
+
+
+def test_date_cutoff_matches_original_implementation():
+  # The original check: the posting day, from midnight, older than days_to_scrape days before now
+  today = date(2024, 3, 1)
+  for now in [datetime.combine(today, time(0, 0, 1)), datetime.combine(today, time(23, 59))]:
+    for days in range(0, 10):
+      cutoff = get_date_cutoff({"days_to_scrape": days}, today)
+      for offset in range(-3, 12):
+        posted = today - timedelta(days=offset)
+        expected = datetime.combine(posted, time()) < now - timedelta(days=days)
+        assert is_too_old({"date": posted.isoformat()}, cutoff) == expected, (days, offset)
+
+  # The boundary day itself is too old, the day after it is kept
+  cutoff = get_date_cutoff({"days_to_scrape": 7}, today)
+  assert is_too_old({"date": "2024-02-23"}, cutoff)
+  assert not is_too_old({"date": "2024-02-24"}, cutoff)
@@ -0,0 +1,181 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import http_client
+from http_client import TokenBucket, backoff_delay, fetch_with_retry, retry_after_seconds
+
+
+class FakeClock:
+  # Stands in for the time module: sleeping moves the clock forward and is recorded
+  def __init__(self):
+    self.now = 1000.0
+    self.sleeps = []
+
+  def monotonic(self):
+    return self.now
+
+  perf_counter = monotonic
+
+  def sleep(self, seconds):
+    self.sleeps.append(round(seconds, 6))
+    self.now += seconds
+
+
+class FakeResponse:
+  def __init__(self, status_code, content=b"", headers=None):
+    self.status_code = status_code
+    self.content = content
+    self.text = content.decode()
+    self.headers = headers or {}
+
+
+class FakeSession:
+  def __init__(self, responses):
+    self.responses = list(responses)
+    self.requests = []
+
+  def get(self, url, **kwargs):
+    self.requests.append(url)
+    return self.responses.pop(0)
+
+  def close(self):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+  clock = FakeClock()
+  monkeypatch.setattr(http_client, "tm", clock)
+  http_client.close_session()
+  yield clock
+  http_client.close_session()
+
+
+def test_token_bucket_limits_the_rate(clock):
+  bucket = TokenBucket(rate=2, burst=2)
+  for _ in range(4):
+    bucket.acquire()
+  # The burst goes out at once, then one request every 1/rate seconds
+  assert clock.sleeps == [0.5, 0.5]
+
+  # Idle time refills the bucket up to the burst only
+  clock.now += 60
+  clock.sleeps = []
+  for _ in range(3):
+    bucket.acquire()
+  assert clock.sleeps == [0.5]
+
+
+def test_token_bucket_adapts_to_throttling(clock):
+  bucket = TokenBucket(rate=2, burst=1)
+  bucket.acquire()
+  bucket.throttled(30)
+  assert bucket.rate == 1
+  # All requests wait for the pause
+  bucket.acquire()
+  assert clock.sleeps == [30]
+
+  bucket.throttled(0)
+  bucket.throttled(0)
+  assert bucket.rate == 0.25
+  # The rate recovers by a tenth of the configured rate per success, up to the configured rate
+  bucket.succeeded()
+  assert bucket.rate == pytest.approx(0.45)
+  for _ in range(20):
+    bucket.succeeded()
+  assert bucket.rate == 2
+
+  # Repeated throttling doesn't go below the minimum rate
+  for _ in range(10):
+    bucket.throttled(0)
+  assert bucket.rate == 0.05
+
+
+def test_unlimited_bucket_still_honors_pauses(clock):
+  bucket = TokenBucket(rate=0)
+  for _ in range(5):
+    bucket.acquire()
+  assert clock.sleeps == []
+  bucket.throttled(12)
+  bucket.acquire()
+  assert clock.sleeps == [12]
+
+
+def test_retry_after_parsing():
+  def parse(value):
+    return retry_after_seconds(FakeResponse(429, headers={"Retry-After": value} if value is not None else {}))
+
+  assert parse("120") == 120
+  assert parse("1.5") == 1.5
+  assert parse("-5") == 0
+  assert parse(None) is None
+  assert parse("soon") is None
+  in_five_minutes = datetime.now(timezone.utc) + timedelta(seconds=300)
+  assert parse(format_datetime(in_five_minutes, usegmt=True)) == pytest.approx(300, abs=2)
+  assert parse("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+
+def test_backoff_delay_is_jittered_and_capped(monkeypatch):
+  monkeypatch.setattr(http_client.random, "uniform", lambda low, high: high)
+  assert [backoff_delay(attempt, 1, 60) for attempt in range(8)] == [1, 2, 4, 8, 16, 32, 60, 60]
+  monkeypatch.setattr(http_client.random, "uniform", lambda low, high: low)
+  assert backoff_delay(3, 1, 60) == 0
+
+
+def make_config(**kwargs):
+  return dict({"headers": {}, "proxies": {}, "requests_per_second": 0, "retry_delay": 1, "max_backoff": 60}, **kwargs)
+
+
+def use_session(monkeypatch, responses):
+  session = FakeSession(responses)
+  monkeypatch.setattr(http_client, "get_session", lambda config, proxy=None: session)
+  return session
+
+
+def test_retry_after_is_honored_beyond_max_backoff(clock, monkeypatch):
+  session = use_session(
+    monkeypatch, [FakeResponse(429, headers={"Retry-After": "300"}), FakeResponse(200, b"page")]
+  )
+  assert fetch_with_retry("https://www.linkedin.com/jobs/view/1/", make_config()) == b"page"
+  assert clock.sleeps == [300]
+  assert len(session.requests) == 2
+
+
+def test_retry_after_is_capped_at_max_retry_after(clock, monkeypatch):
+  use_session(monkeypatch, [FakeResponse(999, headers={"Retry-After": "86400"}), FakeResponse(200, b"page")])
+  assert fetch_with_retry("https://www.linkedin.com/jobs/view/1/", make_config(max_retry_after=600)) == b"page"
+  assert clock.sleeps == [600]
+
+
+def test_server_errors_are_retried_with_backoff(clock, monkeypatch):
+  monkeypatch.setattr(http_client.random, "uniform", lambda low, high: high)
+  use_session(monkeypatch, [FakeResponse(503), FakeResponse(502), FakeResponse(503)])
+  assert fetch_with_retry("https://www.linkedin.com/jobs/view/1/", make_config(), retries=3) is None
+  # No backoff after the last attempt
+  assert clock.sleeps == [1, 2]
+
+
+def test_error_pages_are_not_a_success(clock, monkeypatch, tmp_path):
+  url = "https://www.linkedin.com/jobs/view/1/"
+  config = make_config(requests_per_second=2, http_cache={"path": str(tmp_path / "http.sqlite"), "ttl": {"job": 60}})
+  session = use_session(monkeypatch, [FakeResponse(429, headers={"Retry-After": "1"}), FakeResponse(404, b"gone")])
+  assert fetch_with_retry(url, config) is None
+  assert len(session.requests) == 2
+  # The throttled rate doesn't recover, the proxy has no latency sample and nothing is cached
+  bucket = http_client.get_rate_limiter(config).bucket(url, "direct")
+  assert bucket.rate < bucket.max_rate
+  assert http_client.get_proxy_pool(config).proxies[0].latency is None
+  use_session(monkeypatch, [FakeResponse(200, b"page")])
+  assert fetch_with_retry(url, config) == b"page"
+
+
+def test_session_pool_fits_the_fetching_threads():
+  # The search page scrapers and the description fetchers, not the parse workers
+  session = http_client.create_session({"headers": {}, "max_workers": 3, "parse_workers": 8})
+  assert session.get_adapter("https://www.linkedin.com")._pool_maxsize == 6
+  session.close()
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+from langdetect import DetectorFactory, detect
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import language
+from language import LanguageDetector
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+TEXTS = {
+  "en": (FIXTURES / "job_page.md").read_text(),
+  "de": "Wir suchen einen erfahrenen Softwareentwickler für unser Team in Berlin. Sie arbeiten mit Python und Django.",
+  "fr": "Nous recherchons un développeur Python pour rejoindre notre équipe à Paris et construire nos services.",
+  "nl": "Wij zoeken een ervaren ontwikkelaar voor ons team in Amsterdam. Je werkt met Python en PostgreSQL.",
+}
+
+
+def test_detection_is_deterministic():
+  # Fresh detectors without a cache, so that every call runs langdetect
+  results = [
+    {expected: LanguageDetector(cache_size=0).detect(text) for expected, text in TEXTS.items()}
+    for _ in range(5)
+  ]
+  assert all(result == results[0] for result in results)
+  assert results[0] == {code: code for code in TEXTS}
+  # Short, ambiguous texts too
+  assert len({LanguageDetector(cache_size=0).detect("Python SQL AWS") for _ in range(10)}) == 1
+
+
+def test_sample_and_memoization_match_the_full_text():
+  text = "\n\n".join([TEXTS["en"]] * 5)
+  assert len(text) > 1000
+  DetectorFactory.seed = 0
+  full_text_language = detect(text)
+
+  detector = LanguageDetector()
+  calls = []
+  detect_sample = detector._detect
+  detector._detect = lambda sample: calls.append(sample) or detect_sample(sample)
+
+  assert detector.detect(text) == full_text_language == "en"
+  assert len(calls[0]) == 1000
+  # The same description, or one that only differs after the sample, is not analysed again
+  assert detector.detect(text) == "en"
+  assert detector.detect(text + " Wir suchen einen Entwickler.") == "en"
+  assert len(calls) == 1
+  assert detector.detect("") == "en"
+
+
+def test_memoization_is_bounded():
+  detector = LanguageDetector(cache_size=2)
+  for text in TEXTS.values():
+    detector.detect(text)
+  assert len(detector.cache) == 2
+
+
+def test_fasttext_backend_falls_back_to_langdetect(monkeypatch, capsys):
+  monkeypatch.setattr(language, "fasttext", None)
+  detector = LanguageDetector(backend="fasttext", model_path="lid.176.ftz")
+  assert detector.model is None
+  assert "using langdetect" in capsys.readouterr().out
+  assert detector.detect(TEXTS["de"]) == "de"
@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import parsers
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+# Saved job pages, with the expected Markdown of their description next to them
+JOB_PAGES = sorted(path.stem for path in FIXTURES.glob("job_page*.html"))
+BACKENDS = [
+  backend for backend in parsers.PARSER_BACKENDS if parsers.get_parser_backend({"html_parser": backend}) == backend
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("page", JOB_PAGES)
+def test_description_matches_golden_file(page, backend):
+  content = (FIXTURES / f"{page}.html").read_bytes()
+  expected = (FIXTURES / f"{page}.md").read_text(encoding="utf-8").strip()
+
+  assert parsers.parse_job(content, {"html_parser": backend})["description"] == expected
+
+
+def test_inline_markup_keeps_surrounding_spaces():
+  soup = parsers.make_soup("<div>A<b> bold </b>move,<i></i> <a href='https://x.example'>link</a>!</div>")
+
+  assert parsers.description_to_markdown(soup.div) == "A **bold** move, [link](https://x.example)!"
+
+
+def test_missing_lxml_falls_back_to_html_parser(monkeypatch):
+  monkeypatch.setattr(parsers, "lxml", None)
+  config = {"html_parser": "lxml"}
+  assert parsers.get_parser_backend(config) == "html.parser"
+  content = (FIXTURES / "job_page.html").read_bytes()
+  expected = (FIXTURES / "job_page.md").read_text(encoding="utf-8").strip()
+  assert parsers.parse_job(content, config)["description"] == expected
@@ -0,0 +1,104 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import near_duplicates
+from near_duplicates import NearDuplicates
+from parsers import MISSING_DESCRIPTION
+
+CONFIG = {"db_type": "sqlite", "jobs_tablename": "jobs", "filtered_jobs_tablename": "filtered_jobs"}
+DESCRIPTION = (
+  "We are looking for a senior Python developer to join our backend team in Amsterdam. You will design "
+  "and build APIs, work closely with product and data teams, and help us scale our platform to millions "
+  "of users. Experience with Django, PostgreSQL and cloud infrastructure is a plus."
+)
+
+
+def make_job(job_id, title="Senior Python Developer", company="Acme", description=DESCRIPTION, location="Amsterdam"):
+  return {
+    "title": title, "company": company, "location": location, "job_description": description,
+    "job_url": f"https://www.linkedin.com/jobs/view/{job_id}/",
+  }
+
+
+def test_near_duplicate_cards_and_descriptions():
+  conn = sqlite3.connect(":memory:")
+  index = NearDuplicates.load(conn, CONFIG)
+  job = make_job(1)
+  assert index.match_card(job) is None
+  assert index.match_description(job) is None
+  # Nothing is indexed until the job is stored
+  assert index.match_card(make_job(2, "Senior Python Developer (m/f/d)")) is None
+  index.add(job)
+
+  # Reposted with a gender tag, or with different punctuation
+  assert index.match_card(make_job(2, "Senior Python Developer (m/f/d)")) == job["job_url"]
+  assert index.match_card(make_job(3, "Senior Python-Developer")) == job["job_url"]
+  # Other roles, or the same role at another company
+  assert index.match_card(make_job(4, "Senior Java Developer")) is None
+  assert index.match_card(make_job(5, "Senior Python Developer", "Globex")) is None
+  assert index.match_card(make_job(9, location="Rotterdam")) is None
+  # The staffing agency repost only shows in the description
+  agency_job = make_job(6, "Python Engineer", "Staffing Co", "Our client: " + DESCRIPTION)
+  assert index.match_description(agency_job) == job["job_url"]
+  assert index.match_description(make_job(7, description="Wir suchen einen erfahrenen Softwareentwickler.")) is None
+  # The same description in another city
+  assert index.match_description(make_job(11, location="Rotterdam")) is None
+  # A job is not a duplicate of itself
+  assert index.match_description(job) is None
+
+  # Only the signatures of the stored jobs are saved
+  index.save()
+  index = NearDuplicates.load(conn, CONFIG)
+  assert set(index.signatures[near_duplicates.CARD]) == {job["job_url"]}
+  assert set(index.signatures[near_duplicates.DESCRIPTION]) == {job["job_url"]}
+  assert index.match_card(make_job(8, "Senior Python Developer [Remote]")) == job["job_url"]
+
+  # The description signature computed with the job page is used and dropped from the job
+  repost = make_job(10, "Backend Engineer", "Staffing Co")
+  repost["description_minhash"] = near_duplicates.description_signature(DESCRIPTION, "Amsterdam")
+  assert index.match_description(repost) == job["job_url"]
+  assert "description_minhash" not in repost
+
+
+def test_placeholder_and_short_descriptions_are_not_compared():
+  conn = sqlite3.connect(":memory:")
+  index = NearDuplicates.load(conn, CONFIG)
+  for job_id, description in enumerate([MISSING_DESCRIPTION, "", None, "Python developer wanted in Amsterdam."]):
+    job = make_job(job_id, f"Job {job_id}", f"Company {job_id}", description)
+    assert near_duplicates.description_signature(description, "Amsterdam") is None
+    assert index.match_description(job) is None
+    index.add(job)
+    assert index.match_description(make_job(100 + job_id, "Other job", "Other company", description)) is None
+  assert index.signatures[near_duplicates.DESCRIPTION] == {}
+
+
+def test_signatures_of_stored_jobs_are_computed_once():
+  conn = sqlite3.connect(":memory:")
+  conn.execute(
+    "CREATE TABLE jobs (id INTEGER PRIMARY KEY, job_url TEXT, title TEXT, company TEXT, location TEXT, job_description TEXT)"
+  )
+
+  def store(job):
+    conn.execute(
+      "INSERT INTO jobs (job_url, title, company, location, job_description) VALUES (?, ?, ?, ?, ?)",
+      (job["job_url"], job["title"], job["company"], job["location"], job["job_description"]),
+    )
+
+  jobs = [make_job(i, f"Python Developer {i}", f"Company {i}", f"Description number {i}: {DESCRIPTION}") for i in range(1, 6)]
+  for job in jobs:
+    store(job)
+
+  index = NearDuplicates.load(conn, CONFIG)
+  assert conn.execute("SELECT COUNT(*) FROM job_minhash").fetchone()[0] == 10
+  assert index.match_card(make_job(9, "Python Developer 1", "Company 1")) == jobs[0]["job_url"]
+
+  # Only the jobs stored since then are hashed, batch by batch
+  store(make_job(6))
+  # Too short to compare, only its card is hashed
+  store(make_job(8, "Data Engineer", "Globex", "Another description"))
+  index.index_stored_jobs(batch_size=1)
+  assert index.unsaved == []
+  assert conn.execute("SELECT COUNT(*) FROM job_minhash").fetchone()[0] == 13
+  assert index.match_card(make_job(7, "Senior Python Developers")) == make_job(6)["job_url"]
@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+PAGES = {path.name: path.read_bytes() for path in sorted(FIXTURES.glob("job_page*.html"))}
+CONFIG = {"parse_processes": 2, "parse_workers": 2, "max_workers": 2, "languages": ["en"], "near_duplicates": True}
+
+
+def test_process_pool_parses_like_the_threads(monkeypatch):
+  pool = main.get_parse_pool(CONFIG)
+  assert main.get_parse_pool(CONFIG) is pool
+  # Not forked from a process whose other threads may hold locks
+  assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+  try:
+    for name, content in PAGES.items():
+      assert pool.submit(main.parse_job_page, content, CONFIG).result() == main.parse_job_page(content, CONFIG), name
+
+    # The whole describe stage, with the pages parsed by the worker processes
+    monkeypatch.setattr(main, "fetch_with_retry", lambda url, config: PAGES[url.rsplit("/", 1)[1]])
+    jobs = [{"title": name, "company": "Acme", "job_url": f"https://www.linkedin.com/jobs/view/{name}"} for name in PAGES]
+    described = {job["title"]: job for job in main.iter_job_descriptions(jobs, CONFIG)}
+    for name, content in PAGES.items():
+      expected = main.describe_job({"title": name}, content, dict(CONFIG, parse_processes=0))
+      assert described[name]["job_description"] == expected["job_description"]
+      assert described[name]["language"] == expected["language"]
+      assert list(described[name]["description_minhash"]) == list(expected["description_minhash"])
+    processes = list(pool._processes.values())
+    assert len(processes) == 2
+  finally:
+    main.close_parse_pool()
+
+  # The worker processes are gone, and the next run starts a new pool
+  assert main._parse_pool is None
+  assert not any(process.is_alive() for process in processes)
+  assert main.get_parse_pool(dict(CONFIG, parse_processes=0)) is None
@@ -0,0 +1,238 @@
+import csv
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main
+from db import close_databases
+from filters import JobFilter
+from near_duplicates import NearDuplicates
+from parsers import MISSING_DESCRIPTION, parse_cards
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+SEARCH_PAGE = (FIXTURES / "search_page.html").read_text()
+JOB_PAGE = (FIXTURES / "job_page.html").read_bytes()
+FRONTEND = len(re.findall(r"<h3[^>]*>\s*Frontend", SEARCH_PAGE))
+DESCRIPTION_WORDS = "Design build and operate Python services that stream orders from Kafka topics to PostgreSQL".split()
+
+
+def job_page(url):
+  # The job page of the fixture, with a description of its own (still mentioning Kafka), so that the jobs are not
+  # near duplicates of each other
+  words = list(DESCRIPTION_WORDS * 2)
+  random.Random(url).shuffle(words)
+  markup = "<p>" + " ".join(words) + "</p>"
+  return re.sub(rb"(show-more-less-html__markup[^>]*>).*?(</div>)", lambda m: m[1] + markup.encode() + m[2], JOB_PAGE, flags=re.S)
+
+
+def fake_fetch(url, config, retries=None, delay=None):
+  # Search pages 0 and 1 have 10 cards each, with unique posting ids, titles and locations per page, the next ones
+  # are empty
+  if "/jobs/view/" in url:
+    return job_page(url)
+  page = int(re.search(r"start=(\d+)", url).group(1)) // 10
+  if page >= 2:
+    return b""
+  return (
+    SEARCH_PAGE.replace("jobPosting:4012345", f"jobPosting:{page}12345")
+    .replace("</h3>", f" {page}</h3>")
+    .replace("Netherlands\n", f"Netherlands {page}\n")
+  ).encode()
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+  # The sinks write their CSV files to the working directory
+  monkeypatch.chdir(tmp_path)
+  monkeypatch.setattr(main, "fetch_with_retry", fake_fetch)
+  yield {
+    "headers": {}, "proxies": {},
+    "search_queries": [{"keywords": "Python developer", "location": "USA", "f_WT": ""}],
+    "desc_words": ["Kafka"], "title_include": [], "title_exclude": ["Frontend"], "location_include": [],
+    "location_exclude": [], "company_exclude": [], "languages": [],
+    "timespan": "r604800", "jobs_tablename": "jobs", "filtered_jobs_tablename": "filtered_jobs",
+    "db_type": "sqlite", "db_path": str(tmp_path / "jobs.db"),
+    "pages_to_scrape": 5, "rounds": 1, "days_to_scrape": 100000, "jobs_per_page": 10,
+    "max_workers": 2, "parse_workers": 2, "db_batch_size": 4, "requests_per_second": 0,
+  }
+  close_databases()
+
+
+def read_csv(path):
+  with open(path, newline="", encoding="utf-8") as f:
+    return list(csv.DictReader(f))
+
+
+def test_pipeline_writes_new_jobs_in_batches(config):
+  conn, _ = main.create_connection(config)
+  stats = main.run_pipeline(config, conn)
+  expected = 2 * (10 - FRONTEND)
+  assert stats["cards"] == 20
+  assert stats["rejected card: title_exclude"] == 2 * FRONTEND
+  assert stats["described"] == expected
+
+  # The description of the fixture mentions Kafka, every job is filtered out, with the reason
+  db = sqlite3.connect(config["db_path"])
+  assert db.execute("SELECT COUNT(*), COUNT(DISTINCT job_url) FROM filtered_jobs").fetchone() == (expected, expected)
+  assert db.execute("SELECT DISTINCT filter_reason FROM filtered_jobs").fetchall() == [("desc_words",)]
+  rows = read_csv("linkedin_jobs_filtered.csv")
+  assert len(rows) == expected and rows[0]["filter_reason"] == "desc_words"
+
+  # Nothing is fetched again by the next run
+  stats = main.run_pipeline(config, conn)
+  assert stats["known"] == expected and stats["described"] == 0
+
+
+def test_job_sink_appends_batches_to_the_csv_file(config):
+  conn, _ = main.create_connection(config)
+  sink = main.JobSink(conn, "jobs", "jobs.csv", config)
+  jobs = [
+    {"title": f"Python Developer {i}", "company": "Acme", "date": "2024-03-01", "job_url": f"https://www.linkedin.com/jobs/view/{i}/"}
+    for i in range(9)
+  ]
+  for job in jobs:
+    sink.add(job)
+  # Two full batches are written, the last job waits for the next flush
+  assert sink.written == 8 and len(sink.batch) == 1
+  assert len(read_csv("jobs.csv")) == 8
+  sink.flush()
+  rows = read_csv("jobs.csv")
+  assert [row["job_url"] for row in rows] == [job["job_url"] for job in jobs]
+  assert list(rows[0]) == main.JOB_COLUMNS + ["date_loaded"]
+  assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 9
+
+
+def test_crash_keeps_the_jobs_processed_so_far(config):
+  conn, _ = main.create_connection(config)
+
+  class CrashingFilter(JobFilter):
+    # Fails on the 6th described job
+    checked = 0
+
+    def description_rejection_reason(self, job):
+      self.checked += 1
+      if self.checked == 6:
+        raise RuntimeError("crash")
+      return None
+
+  with pytest.raises(RuntimeError):
+    main.run_pipeline(config, conn, job_filter=CrashingFilter(config))
+  # The 5 jobs processed before the crash were flushed by the checkpoint on the way out
+  db = sqlite3.connect(config["db_path"])
+  assert db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 5
+  assert len(read_csv("linkedin_jobs.csv")) == 5
+
+
+def test_input_is_closed_by_the_consuming_thread(config):
+  closed_by = []
+
+  def cards():
+    try:
+      for i in range(100):
+        yield {"title": "Python Developer", "company": "Acme", "job_url": f"https://www.linkedin.com/jobs/view/{i}/"}
+    finally:
+      closed_by.append(threading.current_thread())
+
+  described = main.iter_job_descriptions(cards(), dict(config, languages=["en"]))
+  next(described)
+  described.close()
+  assert closed_by == [threading.current_thread()]
+
+
+def test_near_duplicate_cards_go_to_the_filtered_jobs_without_a_fetch(config):
+  conn, _ = main.create_connection(config)
+  index = NearDuplicates.load(conn, config)
+  cards = [card for card in parse_cards(fake_fetch("start=0", config), config) if "Frontend" not in card["title"]]
+  # Stored reposts of the first two cards, and of the third card in another city
+  for card in cards[:2]:
+    index.add(dict(card, job_url=card["job_url"] + "?repost", title=card["title"] + " (m/f/d)"))
+  index.add(dict(cards[2], job_url=cards[2]["job_url"] + "?other", location="Somewhere else"))
+
+  stats = main.run_pipeline(dict(config, pages_to_scrape=1, desc_words=[]), conn, near_duplicates=index)
+  assert stats["near duplicates"] == 2
+  assert stats["described"] == len(cards) - 2
+  db = sqlite3.connect(config["db_path"])
+  assert db.execute("SELECT job_url, job_description FROM filtered_jobs").fetchall() == [
+    (card["job_url"], "") for card in cards[:2]
+  ]
+  assert db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == len(cards) - 2
+  # The stored jobs are indexed, the next run finds their reposts
+  assert index.match_card(dict(cards[3], job_url=cards[3]["job_url"] + "?repost")) == cards[3]["job_url"]
+
+
+def test_job_pages_without_a_description_are_not_near_duplicates(config, monkeypatch):
+  # Job pages that could not be parsed all have the same placeholder description
+  def fetch(url, *args, **kwargs):
+    return b"<html></html>" if "/jobs/view/" in url else fake_fetch(url, config)
+
+  monkeypatch.setattr(main, "fetch_with_retry", fetch)
+  conn, _ = main.create_connection(config)
+  stats = main.run_pipeline(dict(config, desc_words=[]), conn)
+  assert stats["described"] == stats["added"] == 2 * (10 - FRONTEND)
+  assert stats["filtered"] == 0
+  db = sqlite3.connect(config["db_path"])
+  assert db.execute("SELECT DISTINCT job_description FROM jobs").fetchall() == [(MISSING_DESCRIPTION,)]
+
+
+def test_same_description_in_another_city_is_not_a_near_duplicate(config, monkeypatch):
+  # The jobs of page 1 have the descriptions of the jobs of page 0, in other cities
+  def fetch(url, *args, **kwargs):
+    return job_page(re.sub(r"/view/\d", "/view/", url)) if "/jobs/view/" in url else fake_fetch(url, config)
+
+  monkeypatch.setattr(main, "fetch_with_retry", fetch)
+  conn, _ = main.create_connection(config)
+  stats = main.run_pipeline(dict(config, desc_words=[]), conn)
+  assert stats["described"] == stats["added"] == 2 * (10 - FRONTEND)
+  assert stats["filtered"] == 0
+
+
+def test_cards_come_out_in_query_order(config, monkeypatch):
+  # The second query answers first, with the same postings as the first one under other titles
+  def fetch(url, *args, **kwargs):
+    if "USA" in url:
+      time.sleep(0.2)
+      return fake_fetch(url, config)
+    return fake_fetch(url, config).replace(b"</h3>", b" (Remote)</h3>")
+
+  monkeypatch.setattr(main, "fetch_with_retry", fetch)
+  queries = [
+    {"keywords": "Python developer", "location": "USA", "f_WT": ""},
+    {"keywords": "Python developer", "location": "Remote", "f_WT": "2"},
+  ]
+  cards = list(main.iter_jobcards(dict(config, max_workers=2), queries))
+  sequential = [
+    card
+    for query in queries
+    for page in range(2)
+    for card in parse_cards(fetch(main.build_search_url(query, config, page)), config)
+  ]
+  assert cards == sequential
+  # The pipeline keeps the cards of the first query
+  conn, _ = main.create_connection(config)
+  main.run_pipeline(dict(config, search_queries=queries, desc_words=[], title_exclude=[]), conn)
+  db = sqlite3.connect(config["db_path"])
+  assert db.execute("SELECT COUNT(*) FROM jobs WHERE title LIKE '%(Remote)%'").fetchone()[0] == 0
+
+
+def test_queued_queries_are_dropped_when_the_consumer_stops(config, monkeypatch):
+  fetched = []
+
+  def fetch(url, *args, **kwargs):
+    fetched.append(url)
+    return fake_fetch(url, config)
+
+  monkeypatch.setattr(main, "fetch_with_retry", fetch)
+  queries = [{"keywords": f"Query {i}", "location": "USA", "f_WT": ""} for i in range(5)]
+  cards = main.iter_jobcards(dict(config, max_workers=1, card_queue_size=1), queries)
+  next(cards)
+  cards.close()
+  time.sleep(0.3)
+  # The running query stops at its next page, the others never start
+  assert {re.search(r"keywords=([^&]+)", url).group(1) for url in fetched} == {"Query%200"}
@@ -1,39 +1,114 @@
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
 import requests
-import json
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import http_client
+
+
+def start_server(name, status=200):
+  # Start a stand-in server on localhost. Used as a proxy it answers every request itself,
+  # so the response body tells which proxy (or the target server) handled the request.
+  seen = []
+
+  class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+      seen.append(self.path)
+      self.send_response(status)
+      self.end_headers()
+      self.wfile.write(name.encode())
+
+    def log_message(self, *args):
+      pass
+
+  server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server, seen
+
+
+def free_port():
+  # A port nobody listens on, to simulate a dead proxy
+  with socket.socket() as s:
+    s.bind(("127.0.0.1", 0))
+    return s.getsockname()[1]
+
+
+def proxy_config(*proxy_urls):
+  http_client.close_session()
+  return {
+    "headers": {},
+    "proxies": {},
+    "proxy_pool": [{"http": url, "https": url} for url in proxy_urls],
+    "requests_per_second": 0,
+    "retries": 4,
+    "retry_delay": 0.01,
+    "proxy_max_failures": 2,
+  }
+
 
 def test_proxy_connection():
+  target, _ = start_server("direct")
+  proxy, proxy_seen = start_server("proxy")
+  url = f"http://127.0.0.1:{target.server_port}/ip"
+  proxy_url = f"http://127.0.0.1:{proxy.server_port}"
+
+  # Make the first call without using the proxy
+  response1 = requests.get(url, proxies={"http": None})
+  # Make the second call using the proxy
+  response2 = requests.get(url, proxies={"http": proxy_url})
+
+  # Verify that the second request went through the proxy
+  assert response1.text == "direct"
+  assert response2.text == "proxy"
+  assert proxy_seen == [url]
+
+
+def test_proxy_pool_rotates_between_proxies():
+  proxy1, seen1 = start_server("proxy1")
+  proxy2, seen2 = start_server("proxy2")
+  config = proxy_config(
+    f"http://127.0.0.1:{proxy1.server_port}", f"http://127.0.0.1:{proxy2.server_port}"
+  )
+
+  bodies = [
+    http_client.fetch_with_retry(f"http://jobs.example/{i}", config) for i in range(10)
+  ]
+
+  assert set(bodies) == {b"proxy1", b"proxy2"}
+  assert len(seen1) + len(seen2) == 10
+  assert abs(len(seen1) - len(seen2)) <= 2
 
-  url = "https://api.ipify.org?format=json"
 
-  # Load proxy configuration from config.json
-  with open('config.json') as config_file:
-    config = json.load(config_file)
-    proxy = config['proxies']
+def test_dead_proxy_is_ejected():
+  proxy, seen = start_server("proxy")
+  dead_url = f"http://127.0.0.1:{free_port()}"
+  config = proxy_config(dead_url, f"http://127.0.0.1:{proxy.server_port}")
 
-  # Make the first API call without using the proxy
-  try:
-    response1 = requests.get(url)
-    response1.raise_for_status()
-    ip1 = response1.json()['ip']
-  except requests.exceptions.RequestException as e:
-    assert False, f"Proxy connection test failed: Failed to make the first API call without proxy. Reason: {str(e)}"
+  bodies = [
+    http_client.fetch_with_retry(f"http://jobs.example/{i}", config) for i in range(10)
+  ]
 
-  # Make the second API call using the proxy
-  try:
-    response2 = requests.get(url, proxies=proxy)
-    response2.raise_for_status()
-    ip2 = response2.json()['ip']
-  except requests.exceptions.RequestException as e:
-    assert False, f"Proxy connection test failed: Failed to make the second API call with proxy. Reason: {str(e)}"
+  assert bodies == [b"proxy"] * 10
+  stats = {s["proxy"]: s for s in http_client.get_proxy_pool(config).stats()}
+  assert stats[dead_url]["ejected"]
+  # once ejected, the dead proxy gets no more traffic
+  assert len(seen) == 10
 
-  # Verify that the two IP addresses are different
-  assert ip1 != ip2, "Proxy connection test failed: IP addresses are the same"
 
-  # Print the IP addresses for verification
-  print(f"Personal IP: {ip1}")
-  print(f"Proxy IP: {ip2}")
-  print("Proxy connection was successfully used for request.")
+def test_throttling_proxy_loses_score():
+  throttled, _ = start_server("throttled", status=429)
+  healthy, _ = start_server("healthy")
+  throttled_url = f"http://127.0.0.1:{throttled.server_port}"
+  healthy_url = f"http://127.0.0.1:{healthy.server_port}"
+  config = proxy_config(throttled_url, healthy_url)
+  config["max_backoff"] = 0
 
+  for i in range(4):
+    assert http_client.fetch_with_retry(f"http://jobs.example/{i}", config) == b"healthy"
 
-if __name__ == '__main__':
-  test_proxy_connection()
+  stats = {s["proxy"]: s for s in http_client.get_proxy_pool(config).stats()}
+  assert stats[throttled_url]["score"] < stats[healthy_url]["score"]
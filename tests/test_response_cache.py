@@ -0,0 +1,127 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import http_client
+import response_cache
+from response_cache import ResponseCache, conditional_headers
+
+SEARCH_URL = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=python&start=0"
+JOB_URL = "https://www.linkedin.com/jobs/view/4012345/"
+
+
+class FakeTime:
+  def __init__(self):
+    self.now = 1700000000.0
+
+  def time(self):
+    return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+  clock = FakeTime()
+  monkeypatch.setattr(response_cache, "tm", clock)
+  return clock
+
+
+def test_ttl_per_url_type(tmp_path, clock):
+  cache = ResponseCache(str(tmp_path / "cache" / "http.sqlite"), {"search": 60})
+  assert cache.get(SEARCH_URL) is None
+  cache.put(SEARCH_URL, b"search page", '"v1"', "Wed, 21 Oct 2015 07:28:00 GMT")
+  cache.put(JOB_URL, b"job page")
+
+  clock.now += 59
+  assert cache.get(SEARCH_URL).fresh
+  clock.now += 2
+  # Search pages expire after their configured TTL, job pages keep the default of a week
+  stale = cache.get(SEARCH_URL)
+  assert (stale.body, stale.fresh) == (b"search page", False)
+  assert conditional_headers(stale) == {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"}
+  assert cache.get(JOB_URL).fresh
+  clock.now += 7 * 24 * 60 * 60
+  assert not cache.get(JOB_URL).fresh
+
+  # A 304 makes the entry fresh again
+  cache.refresh(SEARCH_URL)
+  assert cache.get(SEARCH_URL).fresh
+  cache.close()
+
+
+def test_bodies_are_compressed(tmp_path, clock):
+  path = str(tmp_path / "http.sqlite")
+  cache = ResponseCache(path)
+  body = b"<li>Python Developer</li>" * 1000
+  cache.put(JOB_URL, body)
+  assert cache.size < len(body) / 10
+  cache.close()
+  # The size survives a restart
+  cache = ResponseCache(path)
+  assert cache.get(JOB_URL).body == body
+  assert cache.size > 0
+  cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_down_to_90_percent(tmp_path, clock):
+  # Random bodies don't compress, so every entry takes about 1000 bytes
+  cache = ResponseCache(str(tmp_path / "http.sqlite"), max_size=5000)
+  urls = [f"https://www.linkedin.com/jobs/view/{i}/" for i in range(5)]
+  for url in urls[:4]:
+    clock.now += 1
+    cache.put(url, os.urandom(1000))
+  clock.now += 1
+  cache.get(urls[0])
+  clock.now += 1
+  cache.put(urls[4], os.urandom(1000))
+
+  # Over the limit: the least recently used entry (1, as 0 was just read) is dropped
+  assert [cache.get(url) is not None for url in urls] == [True, False, True, True, True]
+  assert cache.size <= 5000 * 0.9
+
+  # Replacing an entry doesn't count its old size twice
+  size = cache.size
+  cache.put(urls[2], os.urandom(1000))
+  assert abs(cache.size - size) < 20
+  cache.close()
+
+
+def test_stale_entries_are_revalidated(tmp_path, clock, monkeypatch):
+  class Response:
+    def __init__(self, status_code, content=b"", headers=None):
+      self.status_code, self.content, self.headers = status_code, content, headers or {}
+      self.text = content.decode()
+
+  class Session:
+    def __init__(self):
+      self.responses = [Response(200, b"job page", {"ETag": '"v1"'}), Response(304)]
+      self.headers = []
+
+    def get(self, url, headers=None, **kwargs):
+      self.headers.append(headers)
+      return self.responses.pop(0)
+
+    def close(self):
+      pass
+
+  session = Session()
+  monkeypatch.setattr(http_client, "get_session", lambda config, proxy=None: session)
+  config = {
+    "headers": {}, "proxies": {}, "requests_per_second": 0,
+    "http_cache": {"path": str(tmp_path / "http.sqlite"), "ttl": {"job": 60}},
+  }
+  http_client.close_session()
+  try:
+    assert http_client.fetch_with_retry(JOB_URL, config) == b"job page"
+    # Fresh: no request
+    assert http_client.fetch_with_retry(JOB_URL, config) == b"job page"
+    assert len(session.headers) == 1
+    # Stale: revalidated with the ETag, the 304 returns the cached page
+    clock.now += 61
+    assert http_client.fetch_with_retry(JOB_URL, config) == b"job page"
+    assert session.headers[1] == {"If-None-Match": '"v1"'}
+    assert http_client.get_response_cache(config).get(JOB_URL).fresh
+  finally:
+    http_client.close_session()
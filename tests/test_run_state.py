@@ -0,0 +1,51 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from run_state import RunState, PENDING, DONE, FAILED
+
+CONFIG = {
+  "db_type": "sqlite",
+  "search_queries": [{"keywords": "Python developer", "location": "USA", "f_WT": ""}],
+  "rounds": 1,
+  "pages_to_scrape": 10,
+}
+
+
+def make_job(job_id):
+  return {"title": "Python Developer", "company": "Acme", "date": "2026-10-17", "job_url": f"https://www.linkedin.com/jobs/view/{job_id}/"}
+
+
+def test_resume_continues_where_the_run_stopped():
+  conn = sqlite3.connect(":memory:")
+  run = RunState.start(conn, CONFIG)
+  run.page_done("0:0", 0)
+  run.page_done("0:0", 1)
+  run.query_done("0:1")
+  run.set_job_status(make_job(1), DONE)
+  run.set_job_status(make_job(2), PENDING)
+  run.set_job_status(make_job(3), FAILED)
+  run.flush()
+  # Not flushed, lost with the interrupted run
+  run.page_done("0:0", 2)
+
+  resumed = RunState.start(conn, CONFIG, resume=True)
+
+  assert resumed.run_id == run.run_id
+  assert resumed.start_page("0:0") == 2
+  assert resumed.start_page("0:1") is None
+  assert resumed.start_page("0:2") == 0
+  assert sorted(job["job_url"] for job in resumed.pending_jobs()) == [make_job(2)["job_url"], make_job(3)["job_url"]]
+
+
+def test_finished_runs_are_not_resumed():
+  conn = sqlite3.connect(":memory:")
+  run = RunState.start(conn, CONFIG)
+  run.page_done("0:0", 0)
+  run.finish()
+
+  assert RunState.start(conn, CONFIG, resume=True).run_id != run.run_id
+  # Runs with different searches are not resumed either
+  other = RunState.start(conn, CONFIG)
+  assert RunState.start(conn, dict(CONFIG, pages_to_scrape=5), resume=True).run_id != other.run_id
@@ -0,0 +1,68 @@
+import multiprocessing
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from task_queue import TaskQueue
+
+
+def lease_all(path, worker, results):
+  # Lease tasks one by one until the queue is empty
+  task_queue = TaskQueue(path)
+  leased = []
+  while True:
+    tasks = task_queue.lease("job", worker, 3)
+    if not tasks:
+      break
+    task_queue.complete([task_id for task_id, _ in tasks])
+    leased.extend(payload["n"] for _, payload in tasks)
+  results.put(leased)
+
+
+def test_tasks_are_leased_once_across_processes(tmp_path):
+  path = str(tmp_path / "queue.sqlite")
+  task_queue = TaskQueue(path)
+  assert task_queue.put_many("job", [(str(n), {"n": n}) for n in range(300)]) == 300
+  # Queued tasks are not queued twice
+  assert task_queue.put("job", "7", {"n": 7}) == 0
+
+  context = multiprocessing.get_context("spawn")
+  results = context.Queue()
+  processes = [context.Process(target=lease_all, args=(path, f"worker{i}", results)) for i in range(4)]
+  for process in processes:
+    process.start()
+  leased = [n for _ in processes for n in results.get(timeout=60)]
+  for process in processes:
+    process.join()
+
+  assert sorted(leased) == list(range(300))
+  assert task_queue.counts() == {"job": {"done": 300}}
+  assert task_queue.pending() == 0
+
+
+def test_expired_leases_and_failures_are_retried(tmp_path):
+  task_queue = TaskQueue(str(tmp_path / "queue.sqlite"), lease_seconds=0, max_attempts=3, retry_delay=0)
+  task_queue.put("job", "a", {"n": 1})
+
+  [(task_id, _)] = task_queue.lease("job", "dead worker")
+  # The lease ran out, another worker gets the task
+  assert task_queue.lease("job", "worker") == [(task_id, {"n": 1})]
+
+  task_queue.fail(task_id, "timeout")
+  assert task_queue.lease("job", "worker") == [(task_id, {"n": 1})]
+  task_queue.fail(task_id, "timeout")
+  assert task_queue.lease("job", "worker") == []
+  assert task_queue.counts() == {"job": {"failed": 1}}
+
+
+def test_tasks_that_keep_losing_their_lease_are_failed(tmp_path):
+  task_queue = TaskQueue(str(tmp_path / "queue.sqlite"), lease_seconds=0, max_attempts=3)
+  task_queue.put_many("job", [("a", {"n": 1}), ("b", {"n": 2})])
+  task_id = task_queue.lease("job", "worker0")[0][0]
+  # Every worker leasing the first task dies
+  for worker in ["worker1", "worker2"]:
+    assert task_queue.lease("job", worker) == [(task_id, {"n": 1})]
+  assert task_queue.lease("job", "worker3") == [(task_id + 1, {"n": 2})]
+  assert task_queue.counts() == {"job": {"failed": 1, "leased": 1}}
+  attempts, error = task_queue.conn.execute("SELECT attempts, error FROM tasks WHERE id = ?", (task_id,)).fetchone()
+  assert attempts == 3 and error == "lease of worker2 expired"
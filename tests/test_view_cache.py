@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from view_cache import ViewCache
+
+
+class Versions:
+  # Data version stand-in, counting the reads
+  def __init__(self):
+    self.version = 1
+    self.reads = 0
+
+  def __call__(self):
+    self.reads += 1
+    return self.version, 1700000000.0
+
+
+def test_entries_follow_the_data_version():
+  versions = Versions()
+  cache = ViewCache(versions, max_entries=10, check_interval=60)
+  version, last_modified = cache.current()
+  assert (version, last_modified) == (1, 1700000000.0)
+  entry = cache.put("/get_all_jobs?", version, b'{"jobs": []}', "application/json")
+  assert cache.get("/get_all_jobs?") == entry
+  assert entry.etag == cache.put("/other?", version, b'{"jobs": []}', "application/json").etag
+
+  # The version is only read again after check_interval seconds
+  versions.version = 2
+  cache.current()
+  assert versions.reads == 1
+  assert cache.get("/get_all_jobs?") == entry
+
+  # Edits of this process are visible right away
+  cache.invalidate()
+  assert cache.get("/get_all_jobs?") is None
+  assert cache.current()[0] == 2
+  assert versions.reads == 2
+  # A response built from the old version is not cached
+  cache.put("/get_all_jobs?", 1, b"old", "application/json")
+  assert cache.get("/get_all_jobs?") is None
+
+
+def test_version_checks_and_size_bound():
+  versions = Versions()
+  cache = ViewCache(versions, max_entries=2, check_interval=0)
+  version = cache.current()[0]
+  for key in ["a", "b", "c"]:
+    cache.put(key, version, key.encode(), "text/plain")
+  assert cache.get("a") is None
+  assert cache.get("b").body == b"b"
+
+  # Changes of other processes drop the entries on the next check
+  versions.version = 2
+  assert cache.current()[0] == 2
+  assert cache.get("b") is None
@@ -0,0 +1,32 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from watermarks import QueryWatermarks
+
+CONFIG = {"db_type": "sqlite"}
+QUERY = {"keywords": "Python developer", "location": "USA", "f_WT": ""}
+
+
+def make_job(job_id, date="2026-10-17"):
+  return {"title": "Python Developer", "company": "Acme", "date": date, "job_url": f"https://www.linkedin.com/jobs/view/{job_id}/"}
+
+
+def test_watermarks_are_raised_and_persisted():
+  conn = sqlite3.connect(":memory:")
+  watermarks = QueryWatermarks.load(conn, CONFIG)
+  assert not watermarks.is_seen(QUERY, make_job(100))
+
+  watermarks.observe(QUERY, [make_job(100), make_job(300, "2026-10-16"), make_job(200)])
+  # Only raised for the next run, once the run is complete
+  assert not watermarks.is_seen(QUERY, make_job(100))
+  watermarks.save()
+
+  watermarks = QueryWatermarks.load(conn, CONFIG)
+  assert watermarks.is_seen(QUERY, make_job(300))
+  assert watermarks.is_seen(QUERY, make_job(50, "2026-10-01"))
+  assert not watermarks.is_seen(QUERY, make_job(301))
+  # A repost of an older posting is newer than the watermark
+  assert not watermarks.is_seen(QUERY, make_job(50, "2026-10-18"))
+  assert not watermarks.is_seen(dict(QUERY, location="Canada"), make_job(50))
@@ -0,0 +1,107 @@
+import multiprocessing
+import random
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main
+import workers
+from task_queue import TaskQueue
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+SEARCH_PAGE = (FIXTURES / "search_page.html").read_text()
+JOB_PAGE = (FIXTURES / "job_page.html").read_bytes()
+
+
+DESCRIPTION_WORDS = "Design build and operate Python services that stream orders from Kafka topics to PostgreSQL".split()
+
+
+def job_page(url):
+  # The job page of the fixture, with a description of its own, so that the jobs are not near duplicates of each other
+  words = list(DESCRIPTION_WORDS * 2)
+  random.Random(url).shuffle(words)
+  markup = "<p>" + " ".join(words) + "</p>"
+  return re.sub(rb"(show-more-less-html__markup[^>]*>).*?(</div>)", lambda m: m[1] + markup.encode() + m[2], JOB_PAGE, flags=re.S)
+
+
+def fake_fetch(url, config, retries=None, delay=None):
+  # Search pages 0-2 have 10 cards each, with unique posting ids, titles and locations per query and page,
+  # and the pages after them are empty.
+  if "/jobs/view/" in url:
+    return job_page(url)
+  page = int(re.search(r"start=(\d+)", url).group(1)) // 10
+  query = 1 if "USA" in url else 2
+  if page >= 3:
+    return b""
+  return (
+    SEARCH_PAGE.replace("jobPosting:4012345", f"jobPosting:{query}{page}12345")
+    .replace("</h3>", f" {query}-{page}</h3>")
+    .replace("Netherlands\n", f"Netherlands {query}-{page}\n")
+  ).encode()
+
+
+def make_config(tmp_path):
+  return {
+    "headers": {},
+    "proxies": {},
+    "search_queries": [
+      {"keywords": "Python developer", "location": "USA", "f_WT": ""},
+      {"keywords": "Python developer", "location": "Netherlands", "f_WT": "2"},
+    ],
+    "desc_words": [], "title_include": [], "title_exclude": ["Frontend"], "location_include": [],
+    "location_exclude": [], "company_exclude": [], "languages": [],
+    "timespan": "r604800", "jobs_tablename": "jobs", "filtered_jobs_tablename": "filtered_jobs",
+    "db_type": "sqlite", "db_path": str(tmp_path / "jobs.db"), "task_queue_path": str(tmp_path / "queue.sqlite"),
+    "pages_to_scrape": 10, "rounds": 1, "days_to_scrape": 100000, "jobs_per_page": 10,
+    "max_workers": 2, "parse_workers": 1, "db_batch_size": 4, "requests_per_second": 0,
+  }
+
+
+def run_worker(config, name):
+  # Runs in a forked process, with the network replaced by the saved pages
+  main.fetch_with_retry = fake_fetch
+  workers.fetch_with_retry = fake_fetch
+  worker = workers.Worker(config, TaskQueue.from_config(config), name)
+  worker.run(exit_when_idle=True, poll_interval=0.05)
+  worker.close()
+
+
+def test_workers_drain_the_queue_into_the_database(tmp_path):
+  config = make_config(tmp_path)
+  task_queue = TaskQueue.from_config(config)
+  assert workers.produce(config, task_queue, "batch1") == 2
+
+  context = multiprocessing.get_context("fork")
+  processes = [context.Process(target=run_worker, args=(config, f"worker{i}")) for i in range(3)]
+  for process in processes:
+    process.start()
+  for process in processes:
+    process.join(timeout=120)
+    assert process.exitcode == 0
+
+  conn = sqlite3.connect(config["db_path"])
+  urls = [row[0] for row in conn.execute("SELECT job_url FROM jobs")]
+  # 2 queries x 3 pages x 10 cards, minus the frontend jobs
+  frontend = len(re.findall(r"<h3[^>]*>\s*Frontend", SEARCH_PAGE))
+  assert len(urls) == len(set(urls)) == 2 * 3 * (10 - frontend)
+  assert task_queue.counts() == {"search": {"done": 8}, "job": {"done": len(urls)}}
+
+  # Producing the same batch again is a no-op
+  assert workers.produce(config, task_queue, "batch1") == 0
+
+
+def test_search_task_stats_count_the_rejected_cards(tmp_path, monkeypatch):
+  config = make_config(tmp_path)
+  task_queue = TaskQueue.from_config(config)
+  workers.produce(config, task_queue, "batch1")
+  monkeypatch.setattr(workers, "fetch_with_retry", fake_fetch)
+  worker = workers.Worker(config, task_queue, "worker", roles=("search",))
+  try:
+    assert worker.run_once()
+  finally:
+    worker.close()
+  frontend = len(re.findall(r"<h3[^>]*>\s*Frontend", SEARCH_PAGE))
+  assert worker.stats["pages"] == 1
+  assert worker.stats["skipped"] == worker.stats["rejected card: title_exclude"] == frontend
@@ -0,0 +1,71 @@
+import hashlib
+import threading
+import time as tm
+from collections import OrderedDict, namedtuple
+
+
+CachedView = namedtuple("CachedView", ["body", "mimetype", "etag", "version"])
+
+
+class ViewCache:
+    """
+    In-process cache of the responses of the web app, keyed by request path and query string.
+
+    Every entry belongs to a version of the data (see db.bump_data_version), which changes when
+    the scraper stores new jobs or the web app edits one. The version is read from the database at
+    most every `check_interval` seconds, so repeated requests are answered from memory; a new
+    version drops all the entries. `invalidate` is called after the edits of this process, so they
+    show up on the next request. Up to `max_entries` responses are kept, least recently used first
+    out. The ETag of an entry is the hash of its body.
+    """
+
+    def __init__(self, load_version, max_entries=512, check_interval=5):
+        self.load_version = load_version
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.version = None
+        self.last_modified = None
+        self.checked_at = None
+
+    def current(self):
+        # The (version, time of the last change) of the data, reloaded every check_interval seconds
+        now = tm.monotonic()
+        with self.lock:
+            if self.checked_at is not None and now - self.checked_at < self.check_interval:
+                return self.version, self.last_modified
+        version, updated_at = self.load_version()
+        with self.lock:
+            self.checked_at = now
+            if version != self.version:
+                self.version = version
+                self.last_modified = updated_at or tm.time()
+                self.entries.clear()
+            return self.version, self.last_modified
+
+    def invalidate(self):
+        # The data was changed by this process: drop the entries and read the version with the next request
+        with self.lock:
+            self.entries.clear()
+            self.checked_at = None
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.version != self.version:
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, body, mimetype):
+        # Cache a response built from the given version of the data, unless the data changed since
+        entry = CachedView(body, mimetype, hashlib.sha1(body).hexdigest(), version)
+        with self.lock:
+            if version != self.version or self.checked_at is None:
+                return entry
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
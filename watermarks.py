@@ -0,0 +1,118 @@
+import hashlib
+import json
+import threading
+from datetime import datetime
+from db import is_mysql
+
+
+def get_query_key(query):
+    # Identify a search query by its parameters
+    return hashlib.sha1(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def posting_id(job):
+    # The numeric LinkedIn posting id at the end of the job URL, ids grow over time
+    try:
+        return int(job["job_url"].rstrip("/").split("/")[-1])
+    except (KeyError, ValueError):
+        return None
+
+
+class QueryWatermarks:
+    """
+    High-water marks of the search queries: the newest posting id and date seen by the last
+    completed run of every query, stored in the query_watermarks table.
+
+    A card at or below the watermark of its query was already seen (stored, or rejected by the
+    filters) by an earlier run. The scraping threads read the watermarks loaded at the start of
+    the run, the pipeline raises them in memory as it consumes the pages, and `save` persists
+    them (main thread) once the run is complete, so an interrupted run never advances them.
+    """
+
+    def __init__(self, conn, config):
+        self.conn = conn
+        self.config = config
+        self.lock = threading.Lock()
+        # query key -> (newest posting id, newest date)
+        self.marks = {}
+        self.seen = {}
+
+    @classmethod
+    def load(cls, conn, config):
+        cursor = conn.cursor()
+        if is_mysql(config):
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_watermarks (
+                    query_key VARCHAR(64) PRIMARY KEY,
+                    newest_posting_id BIGINT,
+                    newest_date VARCHAR(32),
+                    updated_at TEXT
+                )
+                """
+            )
+        else:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_watermarks (
+                    query_key TEXT PRIMARY KEY,
+                    newest_posting_id INTEGER,
+                    newest_date TEXT,
+                    updated_at TEXT
+                )
+                """
+            )
+        conn.commit()
+        watermarks = cls(conn, config)
+        cursor.execute("SELECT query_key, newest_posting_id, newest_date FROM query_watermarks")
+        for query_key, newest_id, newest_date in cursor.fetchall():
+            watermarks.marks[query_key] = (newest_id, newest_date)
+        return watermarks
+
+    def is_seen(self, query, job):
+        # True if the card is not newer than the newest card of the query seen by the last run
+        mark = self.marks.get(get_query_key(query))
+        job_id = posting_id(job)
+        if mark is None or job_id is None or mark[0] is None:
+            return False
+        newest_id, newest_date = mark
+        return job_id <= newest_id and (not job["date"] or not newest_date or job["date"] <= newest_date)
+
+    def observe(self, query, jobs):
+        # Raise the watermark of the query with the cards of a page consumed by the pipeline
+        ids = [job_id for job_id in map(posting_id, jobs) if job_id is not None]
+        dates = [job["date"] for job in jobs if job["date"]]
+        if not ids:
+            return
+        query_key = get_query_key(query)
+        with self.lock:
+            newest_id, newest_date = self.seen.get(query_key) or self.marks.get(query_key) or (None, None)
+            newest_id = max(ids + ([newest_id] if newest_id is not None else []))
+            newest_date = max(dates + ([newest_date] if newest_date else []), default=None)
+            self.seen[query_key] = (newest_id, newest_date)
+
+    def save(self):
+        # Persist the watermarks raised during the run
+        with self.lock:
+            rows = [
+                (query_key, newest_id, newest_date, str(datetime.now()))
+                for query_key, (newest_id, newest_date) in self.seen.items()
+            ]
+            self.marks.update(self.seen)
+            self.seen = {}
+        if not rows:
+            return
+        if is_mysql(self.config):
+            sql = """
+                INSERT INTO query_watermarks (query_key, newest_posting_id, newest_date, updated_at) VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE newest_posting_id = VALUES(newest_posting_id), newest_date = VALUES(newest_date), updated_at = VALUES(updated_at)
+            """
+        else:
+            sql = """
+                INSERT INTO query_watermarks (query_key, newest_posting_id, newest_date, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (query_key) DO UPDATE SET newest_posting_id = excluded.newest_posting_id,
+                    newest_date = excluded.newest_date, updated_at = excluded.updated_at
+            """
+        cursor = self.conn.cursor()
+        cursor.executemany(sql, rows)
+        self.conn.commit()
@@ -0,0 +1,224 @@
+import argparse
+import os
+import socket
+import time as tm
+from collections import Counter
+from datetime import datetime
+from db import close_databases
+from filters import JobFilter
+from http_client import close_session, fetch_with_retry
+from main import (
+    FILTERED_JOB_COLUMNS,
+    JobSink,
+    build_search_url,
+    close_parse_pool,
+    create_connection,
+    get_date_cutoff,
+    get_known_jobs,
+    is_too_old,
+    iter_job_descriptions,
+    load_config,
+)
+from near_duplicates import NearDuplicates
+from parsers import parse_cards
+from task_queue import TaskQueue
+from watermarks import get_query_key
+
+# Distributed scraping: a producer queues the first search page of every query, and any number of worker
+# processes (on this machine, each possibly with its own proxy) pull tasks from the shared task queue:
+# search pages, which queue the new jobs found on them and the next page, and job pages, whose descriptions
+# are written to the database. Writes skip the jobs that are already stored, so a task that is run twice
+# (a worker died after writing but before completing it) does no harm.
+
+
+def search_task(batch, round_number, query, page):
+    # A search page task, its key is unique per batch of searches
+    key = f"{batch}:{round_number}:{get_query_key(query)}:{page}"
+    return "search", key, {"batch": batch, "round": round_number, "query": query, "page": page}
+
+
+def produce(config, task_queue, batch=None):
+    # Queue the first search page of every query. Returns the number of queued tasks.
+    batch = batch or datetime.now().isoformat(timespec="seconds")
+    tasks = [
+        search_task(batch, k, query, 0)
+        for k in range(0, config["rounds"])
+        for query in config["search_queries"]
+    ]
+    added = task_queue.put_many("search", [(key, payload) for _, key, payload in tasks])
+    print(f"Queued {added} search tasks for batch {batch}")
+    return added
+
+
+class Worker:
+    """
+    Scraper worker process. Leases search page tasks first (so that the job queue fills up) and
+    then job page tasks in batches of db_batch_size, until it is stopped or, with exit_when_idle,
+    until no task is queued or being worked on by another worker.
+    """
+
+    def __init__(self, config, task_queue, worker_id=None, roles=("search", "job")):
+        self.config = config
+        self.task_queue = task_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.roles = roles
+        self.job_filter = JobFilter(config)
+        self.conn, _ = create_connection(config)
+        self.known = get_known_jobs(self.conn, config)
+        self.near_duplicates = None
+        if self.conn is not None and config.get("near_duplicates", True):
+            self.near_duplicates = NearDuplicates.load(self.conn, config)
+        self.stats = Counter()
+
+    def filtered_sink(self):
+        return JobSink(
+            self.conn,
+            self.config["filtered_jobs_tablename"],
+            None,
+            self.config,
+            FILTERED_JOB_COLUMNS,
+            self.near_duplicates,
+        )
+
+    def process_search_task(self, task_id, payload):
+        query, page = payload["query"], payload["page"]
+        url = build_search_url(query, self.config, page)
+        content = fetch_with_retry(url, self.config)
+        if content is None:
+            self.task_queue.fail(task_id, f"could not fetch {url}")
+            return
+        cards = parse_cards(content, self.config)
+        self.stats["pages"] += 1
+        cutoff = get_date_cutoff(self.config)
+
+        new_tasks = []
+        known_or_old = 0
+        # Near duplicates of a known job are not fetched, their cards are written to the filtered jobs
+        filtered_sink = self.filtered_sink()
+        for job in cards:
+            if is_too_old(job, cutoff) or job in self.known:
+                known_or_old += 1
+                self.stats["skipped"] += 1
+                continue
+            reason = self.job_filter.card_rejection_reason(job)
+            if reason is not None:
+                self.stats["skipped"] += 1
+                self.stats["rejected card: " + reason] += 1
+            elif self.near_duplicates is not None and self.near_duplicates.match_card(job) is not None:
+                self.stats["near duplicates"] += 1
+                job["filter_reason"] = "near_duplicate_card"
+                filtered_sink.add(job)
+                self.known.add(job)
+            else:
+                new_tasks.append(("job", job["job_url"], job))
+        filtered_sink.flush()
+        self.stats["filtered"] += filtered_sink.written
+        # Same stopping rules as a single process run: an empty page, or (in incremental mode, first round only)
+        # a page of only known or old jobs (cards rejected by the filters don't count, like in run_pipeline)
+        stop_early = self.config.get("incremental", False) and payload["round"] == 0
+        if cards and page + 1 < self.config["pages_to_scrape"] and not (stop_early and known_or_old == len(cards)):
+            new_tasks.append(search_task(payload["batch"], payload["round"], query, page + 1))
+        self.task_queue.complete([task_id], new_tasks)
+        print(f"Finished scraping page: {url} with {len(cards)} jobs, {len(new_tasks)} new tasks")
+
+    def process_job_tasks(self, tasks):
+        # Fetch and describe the jobs concurrently, and write them in one batch per table
+        task_ids = {payload["job_url"]: task_id for task_id, payload in tasks}
+        failed = set()
+
+        def on_failed(job):
+            failed.add(job["job_url"])
+
+        jobs_sink = JobSink(
+            self.conn, self.config["jobs_tablename"], None, self.config, near_duplicates=self.near_duplicates
+        )
+        filtered_sink = self.filtered_sink()
+        jobs = [payload for _, payload in tasks]
+        for job in iter_job_descriptions(jobs, self.config, self.stats, on_failed):
+            reason = self.job_filter.description_rejection_reason(job)
+            if reason is None and self.near_duplicates is not None and self.near_duplicates.match_description(job) is not None:
+                reason = "near_duplicate"
+            if reason is None:
+                jobs_sink.add(job)
+            else:
+                job["filter_reason"] = reason
+                filtered_sink.add(job)
+            self.known.add(job)
+        jobs_sink.flush()
+        filtered_sink.flush()
+        self.stats["added"] += jobs_sink.written
+        self.stats["filtered"] += filtered_sink.written
+
+        for job_url in failed:
+            self.task_queue.fail(task_ids[job_url], "could not fetch or parse the job page")
+        self.task_queue.complete([task_id for url, task_id in task_ids.items() if url not in failed])
+
+    def run_once(self):
+        # Process one lease of tasks, returns False if there was nothing to do
+        if "search" in self.roles:
+            tasks = self.task_queue.lease("search", self.worker_id)
+            if tasks:
+                for task_id, payload in tasks:
+                    self.process_search_task(task_id, payload)
+                return True
+        if "job" in self.roles:
+            tasks = self.task_queue.lease("job", self.worker_id, self.config.get("db_batch_size", 25))
+            if tasks:
+                self.process_job_tasks(tasks)
+                return True
+        return False
+
+    def run(self, exit_when_idle=False, poll_interval=5):
+        print(f"Worker {self.worker_id} started")
+        while True:
+            if self.run_once():
+                continue
+            if exit_when_idle and self.task_queue.pending() == 0:
+                break
+            tm.sleep(poll_interval)
+        print(
+            f"Worker {self.worker_id} finished: {self.stats['pages']} pages, {self.stats['skipped']} cards skipped,",
+            f"{self.stats['described']} jobs described,",
+            f"{self.stats['failed']} failed, {self.stats['added']} added, {self.stats['filtered']} filtered out",
+        )
+        return self.stats
+
+    def close(self):
+        close_session()
+        close_parse_pool()
+        if self.conn is not None:
+            self.conn.close()
+        close_databases()
+
+
+def with_proxy(config, proxy):
+    # Use a single proxy for this worker instead of the configured ones
+    if not proxy:
+        return config
+    return dict(config, proxies={"http": proxy, "https": proxy}, proxy_pool=[])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed scraping over a shared task queue")
+    parser.add_argument("role", choices=["produce", "work", "status"])
+    parser.add_argument("config_file", nargs="?", default="config.json")
+    parser.add_argument("--proxy", help="proxy URL used by this worker, e.g. http://proxy1:8888")
+    parser.add_argument("--id", help="worker name shown in the task queue (default: host:pid)")
+    parser.add_argument("--roles", default="search,job", help="task kinds this worker handles (default: search,job)")
+    parser.add_argument("--exit-when-idle", action="store_true", help="stop once no task is queued or running")
+    args = parser.parse_args()
+
+    config = with_proxy(load_config(args.config_file), args.proxy)
+    task_queue = TaskQueue.from_config(config)
+    if args.role == "produce":
+        produce(config, task_queue)
+    elif args.role == "status":
+        for kind, counts in sorted(task_queue.counts().items()):
+            print(kind, counts)
+    else:
+        worker = Worker(config, task_queue, args.id, tuple(args.roles.split(",")))
+        try:
+            worker.run(args.exit_when_idle, config.get("task_poll_interval", 5))
+        finally:
+            worker.close()
+    task_queue.close()